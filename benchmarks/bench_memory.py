@@ -0,0 +1,107 @@
+"""Memory benchmark of tree storage, reported as bytes per node.
+
+Compares the original dict based node, the __slots__ BinaryTreeNode, the
+struct of arrays storage of ArrayBinarySearchTree and the many keys per node
+of BPlusTree. Keys and items are the same ints in every layout so the
+difference is the node storage.
+
+Run from the directory containing the datastructures package::
+
+    python -m datastructures.benchmarks.bench_memory [n_nodes]
+
+Functions
+---------
+bytes_per_node - peak traced allocation per node of building a tree.
+main - print bytes per node of each layout.
+"""
+
+from collections import OrderedDict
+import random
+import sys
+import tracemalloc
+
+from datastructures.trees import ArrayBinarySearchTree
+from datastructures.trees import BinarySearchTree
+from datastructures.trees import BPlusTree
+
+
+class _DictBinaryTreeNode:
+    # Node layout before __slots__, a __dict__ per node behind properties.
+    def __init__(self, key, item, parent, right_child=None, left_child=None):
+        self._parent = parent
+        self._key = key
+        self._item = item
+        self._left_child = left_child
+        self._right_child = right_child
+        self._size = 1
+
+    @property
+    def key(self):
+        return self._key
+
+    @property
+    def parent(self):
+        return self._parent
+
+    @parent.setter
+    def parent(self, node):
+        self._parent = node
+
+    @property
+    def size(self):
+        return self._size
+
+    @size.setter
+    def size(self, size):
+        self._size = size
+
+    @property
+    def left_child(self):
+        return self._left_child
+
+    @left_child.setter
+    def left_child(self, node):
+        self._left_child = node
+
+    @property
+    def right_child(self):
+        return self._right_child
+
+    @right_child.setter
+    def right_child(self, node):
+        self._right_child = node
+
+
+class _DictNodeBinarySearchTree(BinarySearchTree):
+    _node_class = _DictBinaryTreeNode
+
+
+def bytes_per_node(build, pairs):
+    """Peak traced bytes allocated by build(pairs) divided by node count."""
+    tracemalloc.start()
+    tree = build(pairs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / len(tree)
+
+
+def main(n_nodes=100000):
+    """Print bytes per node of each layout for n_nodes random int keys."""
+    keys = random.Random(0).sample(range(2 ** 40), n_nodes)
+    pairs = OrderedDict(zip(keys, keys))
+
+    layouts = [
+        ('dict node (before)', _DictNodeBinarySearchTree),
+        ('__slots__ node', BinarySearchTree),
+        ('arrays, list keys', ArrayBinarySearchTree),
+        ('arrays, packed keys',
+         lambda dict_: ArrayBinarySearchTree(dict_, key_typecode='q')),
+        ('B+ tree, order 64', BPlusTree),
+    ]
+    print('{:<22}{:>16}'.format('layout', 'bytes / node'))
+    for name, build in layouts:
+        print('{:<22}{:>16.1f}'.format(name, bytes_per_node(build, pairs)))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
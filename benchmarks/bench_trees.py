@@ -0,0 +1,308 @@
+"""Benchmark suite for tree construction, lookup and traversal.
+
+Each tree class is run against generated workloads of several sizes and
+reports throughput, per operation latency percentiles and peak traced
+memory. Results can be saved as a baseline and later runs compared with
+it, flagging operations which got slower than the tolerance. Timings are
+only comparable on the same, otherwise idle, machine so regenerate the
+baseline with --save when moving machines.
+
+Run from the directory containing the datastructures package::
+
+    python -m datastructures.benchmarks.bench_trees
+    python -m datastructures.benchmarks.bench_trees --sizes 1000 10000000
+    python -m datastructures.benchmarks.bench_trees --save
+
+Workloads
+---------
+random - unique keys in random order, lookups uniform over the keys.
+sorted - unique keys in ascending order.
+reverse - unique keys in descending order.
+zipfian - unique keys in random order, lookups skewed by a zipf law.
+
+Node hops
+---------
+With --hops the lookups of each workload are instead counted by the tree
+instrumentation and the average node hops per lookup printed, see
+node_hops. Counts do not depend on the machine, e.g. they show SplayTree
+adapting to zipfian lookups where static trees pay the same depth on every
+lookup::
+
+    python -m datastructures.benchmarks.bench_trees --hops --workloads zipfian
+
+Operations
+----------
+build - BinaryTree.__init__ from the keys in level order.
+setitem - BinarySearchTree.__setitem__ one key at a time.
+update - BinarySearchTree.update with all the pairs.
+getitem - BinarySearchTree.__getitem__ (the _get_node descent).
+items_as_tree - padded level order export.
+hash - first __hash__ of the tree.
+
+Functions
+---------
+generate_workload - insert and lookup keys for a workload.
+run - benchmark every combination and return the results.
+node_hops - average node hops per lookup of every combination.
+compare - relative change of results against a baseline.
+main - command line entry point.
+"""
+
+import argparse
+from collections import OrderedDict
+import gc
+import json
+import os
+import random
+import statistics
+import time
+import tracemalloc
+
+from datastructures.trees import AVLTree
+from datastructures.trees import BinarySearchTree
+from datastructures.trees import BinaryTree
+from datastructures.trees import SplayTree
+
+WORKLOADS = ('random', 'sorted', 'reverse', 'zipfian')
+TREE_CLASSES = {'BinarySearchTree': BinarySearchTree, 'AVLTree': AVLTree,
+                'SplayTree': SplayTree}
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# Unbalanced trees degrade to lists on sorted input, which is quadratic to
+# build key by key, so larger runs of that combination are skipped.
+MAX_DEGENERATE_SIZE = 1000
+LATENCY_SAMPLES = 2000
+REPEATS = 5
+TIME_BUDGET = 1.0
+ZIPF_EXPONENT = 1.1
+
+
+def generate_workload(workload, size, seed=0):
+    """Insert keys and lookup keys for a workload of size unique keys."""
+    rng = random.Random(seed)
+    keys = rng.sample(range(size * 10), size)
+    if workload == 'sorted':
+        keys.sort()
+    elif workload == 'reverse':
+        keys.sort(reverse=True)
+    elif workload not in WORKLOADS:
+        raise ValueError('Unknown workload {}.'.format(workload))
+
+    if workload == 'zipfian':
+        weights = [1 / rank ** ZIPF_EXPONENT for rank in range(1, size + 1)]
+        lookups = rng.choices(keys, weights=weights, k=size)
+    else:
+        lookups = rng.choices(keys, k=size)
+    return keys, lookups
+
+
+def _time_operation(operation, count):
+    # Operations per second of the best of repeated calls of operation()
+    # which does count ops, repeats stop early once TIME_BUDGET is spent.
+    best = float('inf')
+    total = 0
+    for _ in range(REPEATS):
+        gc.collect()
+        start = time.perf_counter()
+        operation()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+        if total > TIME_BUDGET:
+            break
+    return count / best if best > 0 else float('inf')
+
+
+def _latencies(operation, arguments):
+    # p50 and p99 latency in microseconds of operation per argument.
+    samples = []
+    perf_counter_ns = time.perf_counter_ns
+    for argument in arguments[:LATENCY_SAMPLES]:
+        start = perf_counter_ns()
+        operation(argument)
+        samples.append((perf_counter_ns() - start) / 1000)
+    if len(samples) < 2:
+        return samples * 2 if samples else [0.0, 0.0]
+    percentiles = statistics.quantiles(samples, n=100)
+    return [percentiles[49], percentiles[98]]
+
+
+def _peak_memory(operation):
+    # Peak traced bytes allocated by operation().
+    gc.collect()
+    tracemalloc.start()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def _benchmark(tree_class, workload, size):
+    # Results of every operation for one tree class, workload and size.
+    keys, lookups = generate_workload(workload, size)
+    pairs = OrderedDict(zip(keys, keys))
+    results = {}
+
+    def setitem():
+        tree = tree_class(OrderedDict())
+        for key in keys:
+            tree[key] = key
+        return tree
+
+    def record(operation, count, latency_operation, arguments):
+        results[operation.__name__] = {
+            'ops_per_sec': _time_operation(operation, count),
+            'p50_us': None, 'p99_us': None,
+            'peak_bytes': _peak_memory(operation),
+        }
+        if latency_operation is not None:
+            p50, p99 = _latencies(latency_operation, arguments)
+            results[operation.__name__].update(p50_us=p50, p99_us=p99)
+
+    tree = tree_class(pairs)
+    level_order = tree.keys_as_tree()
+
+    def build():
+        BinaryTree(level_order)
+
+    def update():
+        tree_class(OrderedDict()).update(pairs)
+
+    def getitem():
+        for key in lookups:
+            tree[key]
+
+    def items_as_tree():
+        tree.items_as_tree()
+
+    def hash():
+        tree._hash = None
+        tree.__hash__()
+
+    latency_tree = tree_class(OrderedDict())
+    record(build, size, None, None)
+    record(setitem, size,
+           lambda key: latency_tree.__setitem__(key, key), keys)
+    record(update, size, None, None)
+    record(getitem, size, tree.__getitem__, lookups)
+    record(items_as_tree, size, None, None)
+    record(hash, size, None, None)
+    return results
+
+
+def run(sizes=DEFAULT_SIZES, workloads=WORKLOADS, tree_names=None):
+    """Benchmark results keyed by 'tree/workload/size/operation'."""
+    results = {}
+    for tree_name in tree_names or TREE_CLASSES:
+        tree_class = TREE_CLASSES[tree_name]
+        for workload in workloads:
+            for size in sizes:
+                if (not tree_class._balanced
+                        and workload in ('sorted', 'reverse')
+                        and size > MAX_DEGENERATE_SIZE):
+                    continue
+                for operation, result in _benchmark(tree_class, workload,
+                                                    size).items():
+                    key = '/'.join([tree_name, workload, str(size),
+                                    operation])
+                    results[key] = result
+    return results
+
+
+def node_hops(sizes=DEFAULT_SIZES, workloads=WORKLOADS, tree_names=None):
+    """Average node hops per lookup keyed by 'tree/workload/size'.
+
+    Every tree starts from the same perfectly balanced shape (from_sorted)
+    and then runs the workload lookups in order with instrumentation, so
+    the insert order does not place the hot keys and static trees keep
+    their shape while self-adjusting ones adapt.
+    """
+    hops = {}
+    for tree_name in tree_names or TREE_CLASSES:
+        tree_class = TREE_CLASSES[tree_name]
+        for workload in workloads:
+            for size in sizes:
+                keys, lookups = generate_workload(workload, size)
+                tree = tree_class.from_sorted(keys, keys, sort=True)
+                tree.enable_instrumentation()
+                for key in lookups:
+                    tree[key]
+                key = '/'.join([tree_name, workload, str(size)])
+                hops[key] = tree.stats()['node_hops'] / len(lookups)
+    return hops
+
+
+def compare(results, baseline, tolerance=0.2):
+    """Relative throughput change per result also in baseline.
+
+    Returns a dict of key to (change, is_regression), where change is the
+    fractional change in ops_per_sec and a regression is a drop of more
+    than tolerance.
+    """
+    changes = {}
+    for key, result in results.items():
+        if key in baseline:
+            before = baseline[key]['ops_per_sec']
+            change = result['ops_per_sec'] / before - 1
+            changes[key] = (change, change < -tolerance)
+    return changes
+
+
+def _format_row(key, result, change=None):
+    def optional(value, fmt):
+        return fmt.format(value) if value is not None else '-'
+    row = '{:<52}{:>14,.0f}{:>10}{:>10}{:>14,}'.format(
+        key, result['ops_per_sec'], optional(result['p50_us'], '{:.2f}'),
+        optional(result['p99_us'], '{:.2f}'), result['peak_bytes'])
+    if change is not None:
+        row += '{:>+9.0%}{}'.format(change[0], ' REGRESSION' if change[1]
+                                    else '')
+    return row
+
+
+def main(argv=None):
+    """Run the benchmarks, print a table and optionally save or compare."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=list(DEFAULT_SIZES))
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS,
+                        default=list(WORKLOADS))
+    parser.add_argument('--trees', nargs='+', choices=list(TREE_CLASSES),
+                        default=list(TREE_CLASSES))
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                        help='baseline json to compare with or save to')
+    parser.add_argument('--save', action='store_true',
+                        help='save the results as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='throughput drop flagged as a regression')
+    parser.add_argument('--hops', action='store_true',
+                        help='print node hops per lookup instead of timings')
+    args = parser.parse_args(argv)
+
+    if args.hops:
+        print('{:<52}{:>14}'.format('tree/workload/size', 'hops/lookup'))
+        for key, hops in node_hops(args.sizes, args.workloads,
+                                   args.trees).items():
+            print('{:<52}{:>14.2f}'.format(key, hops))
+        return 0
+
+    results = run(args.sizes, args.workloads, args.trees)
+    changes = {}
+    if not args.save and os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            changes = compare(results, json.load(file), args.tolerance)
+
+    print('{:<52}{:>14}{:>10}{:>10}{:>14}{}'.format(
+        'tree/workload/size/operation', 'ops/s', 'p50 us', 'p99 us',
+        'peak bytes', '   change' if changes else ''))
+    for key, result in results.items():
+        print(_format_row(key, result, changes.get(key)))
+
+    if args.save:
+        with open(args.baseline, 'w') as file:
+            json.dump(results, file, indent=1, sort_keys=True)
+    return 1 if any(regressed for _, regressed in changes.values()) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
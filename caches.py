@@ -0,0 +1,226 @@
+"""Capacity bounded ordered caches.
+
+Classes
+-------
+BoundedTreeCache - ordered map of at most capacity keys with an eviction
+    policy and hit, miss and eviction counters.
+"""
+
+from collections import OrderedDict
+
+from datastructures.trees import AVLTree
+
+POLICIES = ('lru', 'lfu', 'lowest')
+_MISSING = object()
+
+
+class _LRUPolicy:
+    # Keys from least to most recently used, O(1) per operation.
+
+    def __init__(self):
+        self._keys = OrderedDict()
+
+    def add(self, key):
+        self._keys[key] = None
+
+    def touch(self, key):
+        self._keys.move_to_end(key)
+
+    def remove(self, key):
+        del self._keys[key]
+
+    def victim(self, tree):
+        return next(iter(self._keys))
+
+
+class _LFUPolicy:
+    # Keys ordered by (use count, tick of last use) in an AVL tree, so the
+    # least frequently used key, least recently used among ties, is the
+    # minimum. O(log n) per operation.
+
+    def __init__(self):
+        self._uses = {}
+        self._order = AVLTree(OrderedDict())
+        self._tick = 0
+
+    def add(self, key):
+        self._tick += 1
+        self._uses[key] = (1, self._tick)
+        self._order[(1, self._tick)] = key
+
+    def touch(self, key):
+        count, tick = self._uses[key]
+        del self._order[(count, tick)]
+        self._tick += 1
+        self._uses[key] = (count + 1, self._tick)
+        self._order[(count + 1, self._tick)] = key
+
+    def remove(self, key):
+        del self._order[self._uses.pop(key)]
+
+    def victim(self, tree):
+        return self._order[self._order.min()]
+
+
+class _LowestKeyPolicy:
+    # The smallest key of the cache itself, O(log n) on a balanced tree.
+
+    def add(self, key):
+        pass
+
+    def touch(self, key):
+        pass
+
+    def remove(self, key):
+        pass
+
+    def victim(self, tree):
+        return tree.min()
+
+
+_POLICY_CLASSES = {'lru': _LRUPolicy, 'lfu': _LFUPolicy,
+                   'lowest': _LowestKeyPolicy}
+
+
+class BoundedTreeCache:
+    """An ordered map of at most capacity keys which evicts to make room.
+
+    Entries live in a binary search tree, so ordered access (irange, floor,
+    ceiling, min, max) works as on the tree. Inserting a new key into a
+    full cache first evicts one key chosen by the policy:
+
+    lru - the least recently used key.
+    lfu - the least frequently used key, least recently used among ties.
+    lowest - the smallest key.
+
+    Getting or setting a key counts as a use, membership tests and ordered
+    access do not. With the default AVLTree every operation is O(log n).
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of keys, at least 1.
+    policy : str
+        One of 'lru', 'lfu' or 'lowest'.
+    tree_class : type
+        BinarySearchTree subclass holding the entries.
+
+    Raises
+    ------
+    ValueError
+        Capacity below 1 or an unknown policy.
+
+    Examples
+    --------
+    >>> cache = BoundedTreeCache(2)
+    >>> cache[1] = 'a'
+    >>> cache[2] = 'b'
+    >>> cache[1]
+    'a'
+    >>> cache[3] = 'c'
+    >>> list(cache.irange()), cache.stats()['evictions']
+    ([1, 3], 1)
+    """
+
+    def __init__(self, capacity, policy='lru', tree_class=AVLTree):
+        if capacity < 1:
+            raise ValueError('Capacity must be at least 1, got {}.'.format(
+                capacity))
+        if policy not in _POLICY_CLASSES:
+            raise ValueError('Unknown policy {}, expected one of {}.'.format(
+                policy, ', '.join(POLICIES)))
+        self.capacity = capacity
+        self.policy = policy
+        self._tree = tree_class(OrderedDict())
+        self._policy = _POLICY_CLASSES[policy]()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._tree)
+
+    def __contains__(self, key):
+        """Contains key, without counting as a use."""
+        return key in self._tree
+
+    def __iter__(self):
+        """Keys in ascending order."""
+        return self._tree.irange()
+
+    def __getitem__(self, key):
+        """Item of key counted as a hit and a use, else a miss and KeyError."""
+        try:
+            item = self._tree[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        self._policy.touch(key)
+        return item
+
+    def get(self, key, default=None):
+        """Item of key, or default on a miss."""
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, item):
+        """Update or add key, evicting a key first if the cache is full."""
+        if key in self._tree:
+            self._tree[key] = item
+            self._policy.touch(key)
+            return
+        if len(self._tree) >= self.capacity:
+            self._evict()
+        self._tree[key] = item
+        self._policy.add(key)
+
+    def __delitem__(self, key):
+        """Delete key, KeyError if missing."""
+        del self._tree[key]
+        self._policy.remove(key)
+
+    def pop(self, key, default=_MISSING):
+        """Delete key and return its item, or default if given and missing."""
+        if key not in self._tree:
+            if default is _MISSING:
+                raise KeyError('{}'.format(key))
+            return default
+        self._policy.remove(key)
+        return self._tree.pop(key)
+
+    def _evict(self):
+        key = self._policy.victim(self._tree)
+        self._policy.remove(key)
+        del self._tree[key]
+        self.evictions += 1
+
+    def irange(self, low=None, high=None):
+        """Keys from low to high inclusive in ascending order."""
+        return self._tree.irange(low, high)
+
+    def floor(self, key):
+        """Largest key <= key, KeyError if there is none."""
+        return self._tree.floor(key)
+
+    def ceiling(self, key):
+        """Smallest key >= key, KeyError if there is none."""
+        return self._tree.ceiling(key)
+
+    def min(self):
+        """Smallest key, KeyError if empty."""
+        return self._tree.min()
+
+    def max(self):
+        """Largest key, KeyError if empty."""
+        return self._tree.max()
+
+    def stats(self):
+        """Size, capacity and the hit, miss and eviction counters."""
+        return {'size': len(self), 'capacity': self.capacity,
+                'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+    def __repr__(self):
+        return '{}(capacity={}, policy={!r}, size={})'.format(
+            self.__class__.__name__, self.capacity, self.policy, len(self))
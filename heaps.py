@@ -0,0 +1,205 @@
+"""Array backed priority queues.
+
+Classes
+-------
+ArrayHeap - binary or d-ary min heap in level order lists with handles.
+HeapHandle - position of an entry in an ArrayHeap, for decrease_key.
+"""
+
+from datastructures.nodes import NULL_INDEX
+
+
+class HeapHandle:
+    """Position of an entry in an ArrayHeap, returned by push.
+
+    The heap keeps index up to date as the entry moves, it is NULL_INDEX
+    once the entry has been popped.
+    """
+
+    __slots__ = ('index',)
+
+    def __init__(self, index):
+        self.index = index
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, self.index)
+
+
+class ArrayHeap:
+    """A min heap of (priority, item) entries stored in level order lists.
+
+    Entry i has the children arity * i + 1 up to arity * i + arity, for the
+    default arity of 2 that is 2i + 1 and 2i + 2, the same layout as
+    BinaryTree.items_as_tree of a complete tree, so BinaryTree(
+    heap.items_as_tree()) is the heap as a tree. Priorities, items and
+    handles live in parallel lists rather than node objects. Wider heaps are
+    shallower, cheaper to push and decrease and dearer to pop.
+
+    Only priorities are compared, items may be of any type. push and pop
+    are O(log n), peek O(1), decrease_key O(log n) and building from pairs
+    is O(n).
+
+    Parameters
+    ----------
+    pairs : iterable (optional)
+        Initial (priority, item) pairs, heapified in linear time.
+    arity : int
+        Children per entry, at least 2.
+
+    Raises
+    ------
+    ValueError
+        Arity below 2.
+
+    Examples
+    --------
+    >>> heap = ArrayHeap([(5, 'e'), (3, 'c'), (4, 'd')])
+    >>> handle = heap.push(6, 'f')
+    >>> heap.decrease_key(handle, 1)
+    >>> heap.peek()
+    (1, 'f')
+    >>> heap.items_as_tree()
+    ['f', 'c', 'd', 'e']
+    >>> [heap.pop() for _ in range(len(heap))]
+    [(1, 'f'), (3, 'c'), (4, 'd'), (5, 'e')]
+    """
+
+    def __init__(self, pairs=(), arity=2):
+        if arity < 2:
+            raise ValueError('Arity must be at least 2, got {}.'.format(
+                arity))
+        self.arity = arity
+        self._priorities = []
+        self._items = []
+        self._handles = []
+        for priority, item in pairs:
+            self._handles.append(HeapHandle(len(self._priorities)))
+            self._priorities.append(priority)
+            self._items.append(item)
+        # Sift down every entry with children, bottom up.
+        for index in reversed(range((len(self) - 2) // arity + 1)):
+            self._sift_down(index)
+
+    def __len__(self):
+        return len(self._priorities)
+
+    def push(self, priority, item):
+        """Add an entry, returns its handle."""
+        handle = HeapHandle(len(self))
+        self._priorities.append(priority)
+        self._items.append(item)
+        self._handles.append(handle)
+        self._sift_up(handle.index)
+        return handle
+
+    def peek(self):
+        """(priority, item) of the smallest priority, IndexError if empty."""
+        if not self._priorities:
+            raise IndexError('peek from empty heap')
+        return self._priorities[0], self._items[0]
+
+    def pop(self):
+        """Remove the smallest (priority, item), IndexError if empty."""
+        if not self._priorities:
+            raise IndexError('pop from empty heap')
+        top = self._priorities[0], self._items[0]
+        self._handles[0].index = NULL_INDEX
+
+        # The last entry fills the root and sinks to its place.
+        priority = self._priorities.pop()
+        item = self._items.pop()
+        handle = self._handles.pop()
+        if self._priorities:
+            self._priorities[0] = priority
+            self._items[0] = item
+            self._handles[0] = handle
+            handle.index = 0
+            self._sift_down(0)
+        return top
+
+    def decrease_key(self, handle, priority):
+        """Lower the priority of the entry of handle.
+
+        Raises
+        ------
+        ValueError
+            If the entry was popped, handle is of another heap or priority
+            is larger than its current priority.
+        """
+        index = self._index_of(handle)
+        if self._priorities[index] < priority:
+            raise ValueError('Priority {!r} is larger than {!r}.'.format(
+                priority, self._priorities[index]))
+        self._priorities[index] = priority
+        self._sift_up(index)
+
+    def priority(self, handle):
+        """Current priority of the entry of handle."""
+        return self._priorities[self._index_of(handle)]
+
+    def _index_of(self, handle):
+        # Index of the entry of handle, popped handles and handles of other
+        # heaps are rejected.
+        index = handle.index
+        if not 0 <= index < len(self) or self._handles[index] is not handle:
+            raise ValueError('{} is not in the heap.'.format(handle))
+        return index
+
+    def keys_as_tree(self):
+        """Priorities in level order, a complete tree so no padding."""
+        return list(self._priorities)
+
+    def items_as_tree(self):
+        """Items in level order, a complete tree so no padding."""
+        return list(self._items)
+
+    def _move(self, source, target):
+        # Entry at source moves to target, leaving a hole at source.
+        self._priorities[target] = self._priorities[source]
+        self._items[target] = self._items[source]
+        self._handles[target] = self._handles[source]
+        self._handles[target].index = target
+
+    def _place(self, index, priority, item, handle):
+        self._priorities[index] = priority
+        self._items[index] = item
+        self._handles[index] = handle
+        handle.index = index
+
+    def _sift_up(self, index):
+        # Move the entry at index towards the root past larger parents,
+        # shifting the parents down into the hole instead of swapping.
+        priorities = self._priorities
+        entry = priorities[index], self._items[index], self._handles[index]
+        while index > 0:
+            parent = (index - 1) // self.arity
+            if not entry[0] < priorities[parent]:
+                break
+            self._move(parent, index)
+            index = parent
+        self._place(index, *entry)
+
+    def _sift_down(self, index):
+        # Move the entry at index away from the root past smaller children.
+        priorities = self._priorities
+        size = len(priorities)
+        arity = self.arity
+        entry = priorities[index], self._items[index], self._handles[index]
+        while True:
+            first = arity * index + 1
+            if first >= size:
+                break
+            child = first
+            for other in range(first + 1, min(first + arity, size)):
+                if priorities[other] < priorities[child]:
+                    child = other
+            if not priorities[child] < entry[0]:
+                break
+            self._move(child, index)
+            index = child
+        self._place(index, *entry)
+
+    def __repr__(self):
+        return '{}({}, arity={})'.format(
+            self.__class__.__name__,
+            list(zip(self._priorities, self._items)), self.arity)
@@ -0,0 +1,130 @@
+"""Synchronization primitives for sharing trees across threads.
+
+Classes
+-------
+ReadWriteLock - many concurrent readers or a single writer.
+
+Functions
+---------
+with_read_lock - run a method while holding the instance read lock.
+with_write_lock - run a method while holding the instance write lock.
+"""
+
+from contextlib import contextmanager
+import functools
+import threading
+
+
+class ReadWriteLock:
+    """A lock shared by many readers or held by a single writer.
+
+    Writers are preferred, new readers wait while a writer is waiting so
+    writers are not starved by a steady stream of readers. A thread which
+    already holds the lock may acquire it again for reading, and the writer
+    may acquire it again for writing.
+
+    Raises
+    ------
+    RuntimeError
+        Acquiring for writing while holding the lock for reading.
+
+    Examples
+    --------
+    >>> lock = ReadWriteLock()
+    >>> with lock.read_locked():
+    ...     with lock.read_locked():
+    ...         'many readers'
+    'many readers'
+    >>> with lock.write_locked():
+    ...     'one writer'
+    'one writer'
+
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writers_waiting = 0
+        self._writer = None
+        self._write_depth = 0
+        self._local = threading.local()
+
+    def acquire_read(self):
+        """Block until no writer holds or waits for the lock."""
+        depth = getattr(self._local, 'read_depth', 0)
+        with self._condition:
+            # Reentrant reads and the writer itself must not wait, or they
+            # would deadlock on a waiting writer.
+            if depth == 0 and self._writer != threading.get_ident():
+                while self._writer is not None or self._writers_waiting:
+                    self._condition.wait()
+            self._readers += 1
+        self._local.read_depth = depth + 1
+
+    def release_read(self):
+        """Release one read acquisition."""
+        with self._condition:
+            self._readers -= 1
+            if self._readers == 0:
+                self._condition.notify_all()
+        self._local.read_depth -= 1
+
+    def acquire_write(self):
+        """Block until no other thread holds the lock."""
+        if getattr(self._local, 'read_depth', 0) > 0:
+            raise RuntimeError('Cannot upgrade a read lock to a write lock.')
+
+        with self._condition:
+            if self._writer == threading.get_ident():
+                self._write_depth += 1
+                return
+            self._writers_waiting += 1
+            while self._writer is not None or self._readers > 0:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writer = threading.get_ident()
+            self._write_depth = 1
+
+    def release_write(self):
+        """Release one write acquisition."""
+        with self._condition:
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._condition.notify_all()
+
+    @contextmanager
+    def read_locked(self):
+        """Context manager holding the lock for reading."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self):
+        """Context manager holding the lock for writing."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+def with_read_lock(method):
+    """Wrap method to run holding the read lock of self._lock."""
+    @functools.wraps(method)
+    def _read_locked(self, *args, **kwargs):
+        with self._lock.read_locked():
+            return method(self, *args, **kwargs)
+    return _read_locked
+
+
+def with_write_lock(method):
+    """Wrap method to run holding the write lock of self._lock."""
+    @functools.wraps(method)
+    def _write_locked(self, *args, **kwargs):
+        with self._lock.write_locked():
+            return method(self, *args, **kwargs)
+    return _write_locked
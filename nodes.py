@@ -3,13 +3,29 @@
 Classes
 -------
 BinaryTreeNode - node with key, value and parent with <=2 children.
+LazyBinaryTreeNode - binary tree node whose children are read on first use.
+BinarySearchTreeNode - binary tree node which also tracks its subtree size.
+AVLTreeNode - search tree node which also tracks the height of its subtree.
+IntervalTreeNode - AVL tree node which also tracks the largest interval end.
+AggregateBinarySearchTreeNode - search tree node with a subtree aggregate.
+AggregateAVLTreeNode - AVL tree node with a subtree aggregate.
+AggregateIntervalTreeNode - interval tree node with a subtree aggregate.
+BPlusTreeNode - B+ tree node with many keys in a sorted list.
+BinaryTreeArrays - struct of arrays storage of binary tree nodes by index.
 
 """
 
+from array import array
+
+NULL_INDEX = -1
+
 
 class BinaryTreeNode:
     """A binary tree node with 0 -> 2 children.
 
+    Attributes are plain slots rather than properties to keep nodes compact
+    and child hops cheap for large trees.
+
     Parameters
     ----------
     key : Any
@@ -51,54 +67,331 @@ class BinaryTreeNode:
 
     """
 
+    __slots__ = ('key', 'item', 'parent', 'left_child', 'right_child')
+
     def __init__(self, key, item, parent, right_child=None, left_child=None):
-        self._parent = parent
-        self._key = key
-        self._item = item
-        self._left_child = left_child
-        self._right_child = right_child
+        self.parent = parent
+        self.key = key
+        self.item = item
+        self.left_child = left_child
+        self.right_child = right_child
 
-    @property
-    def key(self):
-        """Key of the node."""
-        return self._key
+    def is_leaf(self):
+        """Is node a leaf."""
+        return self.right_child is None and self.left_child is None
 
-    @property
-    def item(self):
-        """Item of the node."""
-        return self._item
+    def is_root(self):
+        """Is node a root."""
+        return self.parent is None
 
-    @item.setter
-    def item(self, new_item):
-        self._item = new_item
 
-    @property
-    def right_child(self):
-        """Right child node."""
-        return self._right_child
+# Slot descriptors the lazy node properties store children in.
+_LEFT_CHILD = BinaryTreeNode.left_child
+_RIGHT_CHILD = BinaryTreeNode.right_child
 
-    @right_child.setter
-    def right_child(self, node):
-        self._right_child = node
+
+class LazyBinaryTreeNode(BinaryTreeNode):
+    """A binary tree node whose children are created on first access.
+
+    Until then builder holds an object whose expand(node) method creates
+    the children of node and sets node.builder to None.
+
+    Parameters
+    ----------
+    key : Any
+        Key of the node.
+    item : Any
+        Value of the node.
+    parent : LazyBinaryTreeNode or None
+        Parent to this node.
+    builder : object
+        Creates the children on the first access of either.
+
+    Examples
+    --------
+    >>> class Builder:
+    ...     def expand(self, node):
+    ...         node.builder = None
+    ...         node.left_child = LazyBinaryTreeNode(2, 'b', node, self)
+    >>> node = LazyBinaryTreeNode(1, 'a', None, Builder())
+    >>> node.left_child.key, node.right_child
+    (2, None)
+
+    """
+
+    __slots__ = ('builder',)
+
+    def __init__(self, key, item, parent, builder):
+        super().__init__(key, item, parent)
+        self.builder = builder
 
     @property
     def left_child(self):
-        """Left child node."""
-        return self._left_child
+        if self.builder is not None:
+            self.builder.expand(self)
+        return _LEFT_CHILD.__get__(self)
 
     @left_child.setter
     def left_child(self, node):
-        self._left_child = node
+        _LEFT_CHILD.__set__(self, node)
 
     @property
-    def parent(self):
-        """Parent of the node."""
-        return self._parent
+    def right_child(self):
+        if self.builder is not None:
+            self.builder.expand(self)
+        return _RIGHT_CHILD.__get__(self)
+
+    @right_child.setter
+    def right_child(self, node):
+        _RIGHT_CHILD.__set__(self, node)
+
+
+class BinarySearchTreeNode(BinaryTreeNode):
+    """A binary tree node which tracks the number of nodes in its subtree.
+
+    A leaf has size 1.
+
+    Parameters
+    ----------
+    key : Any
+        Key of the node.
+    item : Any
+        Value of the node.
+    parent : BinarySearchTreeNode or None
+        Parent to this node.
+    right_child : BinarySearchTreeNode (optional)
+        Right child of  node.
+    left_child : BinarySearchTreeNode (optional)
+        Left child of node.
+
+    Examples
+    --------
+    >>> node = BinarySearchTreeNode(1, 'a', None)
+    >>> node.size
+    1
+
+    """
+
+    __slots__ = ('size',)
+
+    def __init__(self, key, item, parent, right_child=None, left_child=None):
+        super().__init__(key, item, parent, right_child, left_child)
+        self.size = 1
+
+
+class AVLTreeNode(BinarySearchTreeNode):
+    """A binary tree node which tracks the height of the subtree it roots.
+
+    A leaf has height 1.
+
+    Parameters
+    ----------
+    key : Any
+        Key of the node.
+    item : Any
+        Value of the node.
+    parent : AVLTreeNode or None
+        Parent to this node.
+    right_child : AVLTreeNode (optional)
+        Right child of  node.
+    left_child : AVLTreeNode (optional)
+        Left child of node.
+
+    Examples
+    --------
+    >>> node = AVLTreeNode(1, 'a', None)
+    >>> node.height
+    1
+    >>> node.height = 2
+    >>> node.height
+    2
+
+    """
+
+    __slots__ = ('height',)
+
+    def __init__(self, key, item, parent, right_child=None, left_child=None):
+        super().__init__(key, item, parent, right_child, left_child)
+        self.height = 1
+
+
+class IntervalTreeNode(AVLTreeNode):
+    """An AVL tree node keyed by a (start, end) interval.
+
+    Tracks the largest end of all intervals in the subtree it roots, a leaf
+    has its own end.
+
+    Parameters
+    ----------
+    key : tuple
+        Interval (start, end) of the node.
+    item : Any
+        Value of the node.
+    parent : IntervalTreeNode or None
+        Parent to this node.
+    right_child : IntervalTreeNode (optional)
+        Right child of  node.
+    left_child : IntervalTreeNode (optional)
+        Left child of node.
+
+    Examples
+    --------
+    >>> node = IntervalTreeNode((1, 5), 'a', None)
+    >>> node.max_end
+    5
+
+    """
+
+    __slots__ = ('max_end',)
+
+    def __init__(self, key, item, parent, right_child=None, left_child=None):
+        super().__init__(key, item, parent, right_child, left_child)
+        self.max_end = key[1]
+
+
+class AggregateBinarySearchTreeNode(BinarySearchTreeNode):
+    """A search tree node which also holds the aggregate of its subtree.
+
+    Node of trees built with an aggregate, which set aggregate as they
+    link the node in. A separate class so nodes of trees without one do not
+    carry the slot.
+
+    Parameters
+    ----------
+    key : Any
+        Key of the node.
+    item : Any
+        Value of the node.
+    parent : AggregateBinarySearchTreeNode or None
+        Parent to this node.
+    right_child : AggregateBinarySearchTreeNode (optional)
+        Right child of  node.
+    left_child : AggregateBinarySearchTreeNode (optional)
+        Left child of node.
+
+    """
+
+    __slots__ = ('aggregate',)
+
+
+class AggregateAVLTreeNode(AVLTreeNode):
+    """An AVL tree node which also holds the aggregate of its subtree.
+
+    See AggregateBinarySearchTreeNode.
+    """
+
+    __slots__ = ('aggregate',)
+
+
+class AggregateIntervalTreeNode(IntervalTreeNode):
+    """An interval tree node which also holds the aggregate of its subtree.
+
+    See AggregateBinarySearchTreeNode.
+    """
+
+    __slots__ = ('aggregate',)
+
+
+class BPlusTreeNode:
+    """A B+ tree node with many keys in a sorted list.
+
+    Leaves pair keys with items and link to the next leaf in key order.
+    Internal nodes pair separator keys with children, child i holds the keys
+    >= keys[i - 1] and < keys[i].
+
+    Parameters
+    ----------
+    keys : list
+        Sorted keys of a leaf or separator keys of an internal node.
+    items : list (optional)
+        Items paired with keys, leaves only.
+    children : list (optional)
+        One more child than keys, internal nodes only.
+    next_leaf : BPlusTreeNode (optional)
+        Next leaf in key order, leaves only.
+
+    Examples
+    --------
+    >>> right = BPlusTreeNode([3, 4], ['c', 'd'])
+    >>> left = BPlusTreeNode([1, 2], ['a', 'b'], next_leaf=right)
+    >>> root = BPlusTreeNode([3], children=[left, right])
+    >>> root.is_leaf(), left.is_leaf()
+    (False, True)
+    >>> left.next_leaf.keys
+    [3, 4]
+
+    """
+
+    __slots__ = ('keys', 'items', 'children', 'next_leaf')
+
+    def __init__(self, keys, items=None, children=None, next_leaf=None):
+        self.keys = keys
+        self.items = items
+        self.children = children
+        self.next_leaf = next_leaf
 
     def is_leaf(self):
         """Is node a leaf."""
-        return self.right_child is None and self.left_child is None
+        return self.children is None
 
-    def is_root(self):
-        """Is node a root."""
-        return self.parent is None
+
+class BinaryTreeArrays:
+    """Struct of arrays storage for binary tree nodes addressed by index.
+
+    Node i is described by keys[i], items[i], parent[i], left[i] and
+    right[i], where links are indices into the same arrays and NULL_INDEX
+    marks a missing node. Links are packed 8 byte ints instead of pointers
+    to node objects, so a node costs a few dozen bytes instead of a
+    Python object.
+
+    Parameters
+    ----------
+    key_typecode : str (optional)
+        array typecode for packed keys e.g. 'q' or 'd'. Keys are stored in a
+        list when not given, which accepts any key.
+
+    Examples
+    --------
+    >>> nodes = BinaryTreeArrays('q')
+    >>> root = nodes.append(1, 'a')
+    >>> nodes.left[root] = nodes.append(2, 'b', root)
+    >>> nodes.keys[nodes.left[root]]
+    2
+    >>> nodes.is_leaf(root), nodes.is_root(root)
+    (False, True)
+    >>> nodes.right[root] == NULL_INDEX
+    True
+    >>> len(nodes)
+    2
+
+    """
+
+    __slots__ = ('keys', 'items', 'parent', 'left', 'right')
+
+    def __init__(self, key_typecode=None):
+        self.keys = array(key_typecode) if key_typecode else []
+        self.items = []
+        self.parent = array('q')
+        self.left = array('q')
+        self.right = array('q')
+
+    def append(self, key, item, parent=NULL_INDEX):
+        """Add a node without children and return its index."""
+        self.keys.append(key)
+        self.items.append(item)
+        self.parent.append(parent)
+        self.left.append(NULL_INDEX)
+        self.right.append(NULL_INDEX)
+        return len(self.items) - 1
+
+    def is_leaf(self, index):
+        """Is node at index a leaf."""
+        return self.left[index] == NULL_INDEX and self.right[index] == NULL_INDEX
+
+    def is_root(self, index):
+        """Is node at index a root."""
+        return self.parent[index] == NULL_INDEX
+
+    def __len__(self):
+        """Number of nodes stored."""
+        return len(self.items)
@@ -0,0 +1,262 @@
+"""Multi-process bulk loading and batch lookups of binary search trees.
+
+Shards are partitioned by key range, using splitter keys drawn from a
+sample, so every process works on a disjoint slice of the key space.
+Tree nodes cannot be shared between processes and unpickling a subtree
+costs more than building it, so a parallel build only sorts in the
+workers (the O(n log n) part) and builds the tree in the calling process.
+
+Classes
+-------
+ShardedBinarySearchTree - key range shards in worker processes answering
+    batched lookups.
+
+Functions
+---------
+parallel_build - build a BinarySearchTree with a process pool.
+"""
+
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import os
+import random
+
+from datastructures.trees import _check_key
+from datastructures.trees import _last_of_equal
+from datastructures.trees import _sorted_pairs
+from datastructures.trees import BinarySearchTree
+
+SAMPLES_PER_PARTITION = 100
+_MISSING = object()
+# Tree of the shard held by a ShardedBinarySearchTree worker process.
+_shard_tree = None
+
+
+def _partition(pairs, count):
+    # Split pairs into at most count lists by key range, keeping the input
+    # order within each. Returns the non empty partitions and the smallest
+    # key bound of every partition but the first, for bisect_right.
+    if hasattr(pairs, 'items'):
+        pairs = pairs.items()
+    pairs = list(pairs)
+    if count <= 1 or len(pairs) <= 1:
+        return [pairs] if pairs else [], []
+
+    sample = sorted(key for key, _ in random.Random(0).sample(
+        pairs, min(len(pairs), count * SAMPLES_PER_PARTITION)))
+    splitters = sorted(set(sample[len(sample) * index // count]
+                           for index in range(1, count)))
+    partitions = [[] for _ in range(len(splitters) + 1)]
+    for pair in pairs:
+        partitions[bisect_right(splitters, pair[0])].append(pair)
+
+    kept = [(bound, partition) for bound, partition
+            in zip([None] + splitters, partitions) if partition]
+    return ([partition for _, partition in kept],
+            [bound for bound, _ in kept[1:]])
+
+
+def _sort_partition(pairs):
+    # Keys and items of pairs in ascending key order, last item wins.
+    return _sorted_pairs([key for key, _ in pairs],
+                         [item for _, item in pairs], True)
+
+
+def _sorted_run(keys, offset):
+    # Positions (from offset) of a slice of keys in stable ascending key
+    # order.
+    for key in keys:
+        _check_key(key)
+    return [offset + index
+            for index in sorted(range(len(keys)), key=keys.__getitem__)]
+
+
+def parallel_build(pairs, tree_class=BinarySearchTree, workers=None):
+    """Build a tree from unsorted pairs using a process pool.
+
+    The keys are cut into one contiguous slice per worker, the workers sort
+    their slices in parallel and the sorted runs are merged in this
+    process, which costs O(n log workers) rather than O(n log n). Same
+    result as tree_class.from_sorted(keys, items, sort=True), which is what
+    runs for one worker.
+
+    Only the sort runs in parallel. Nodes cannot be shared between
+    processes, so deduplicating the keys and creating the nodes stay in
+    this process. They take about 70% of from_sorted(sort=True) on a
+    million int keys, so the speedup is at most about 1.4x however many
+    workers, less the cost of sending the keys.
+
+    Parameters
+    ----------
+    pairs : mapping or iterable
+        Key, item pairs in any order, the last item wins for duplicate keys.
+    tree_class : type
+        BinarySearchTree subclass to build.
+    workers : int (optional)
+        Number of processes, defaults to the number of CPUs.
+
+    Raises
+    ------
+    ValueError
+        For a key which is not equal to itself, such as NaN.
+
+    Examples
+    --------
+    >>> tree = parallel_build([(3, 'c'), (1, 'a'), (2, 'b')], workers=1)
+    >>> tree.keys_as_tree()
+    [2, 1, 3]
+    """
+    if hasattr(pairs, 'items'):
+        pairs = pairs.items()
+    if not isinstance(pairs, list):
+        pairs = list(pairs)
+    workers = min(workers or os.cpu_count() or 1, len(pairs))
+    if workers <= 1:
+        return tree_class.from_sorted([key for key, _ in pairs],
+                                      [item for _, item in pairs], sort=True)
+
+    keys = [key for key, _ in pairs]
+    bounds = [len(keys) * index // workers for index in range(workers + 1)]
+    order = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for run in executor.map(_sorted_run,
+                                [keys[low:high] for low, high
+                                 in zip(bounds, bounds[1:])],
+                                bounds):
+            order.extend(run)
+    # The sort finds the sorted runs and only merges them. Runs are in
+    # input order and the sort is stable, so the last of equal keys still
+    # comes last.
+    order.sort(key=keys.__getitem__)
+    unique = _last_of_equal(keys, order)
+    tree = tree_class(OrderedDict())
+    tree._root = tree._build_balanced([keys[index] for index in unique],
+                                      [pairs[index][1] for index in unique],
+                                      0, len(unique), None)
+    tree._size = len(unique)
+    return tree
+
+
+def _load_shard(tree_class, pairs):
+    # Runs in a shard worker process, keeps the shard tree for lookups.
+    global _shard_tree
+    keys, items = _sort_partition(pairs)
+    _shard_tree = tree_class.from_sorted(keys, items)
+    return len(_shard_tree)
+
+
+def _lookup_shard(keys):
+    # Runs in a shard worker process. Items of keys, None for missing keys
+    # which are listed by position as well.
+    items = []
+    missing = []
+    get_node = _shard_tree._get_node
+    for position, key in enumerate(keys):
+        node = get_node(key)
+        if node is None:
+            missing.append(position)
+            items.append(None)
+        else:
+            items.append(node.item)
+    return items, missing
+
+
+class ShardedBinarySearchTree:
+    """Read only key range shards served by one worker process each.
+
+    The pairs are partitioned by key range and every shard builds its own
+    tree in a dedicated single process pool. Batched lookups are grouped by
+    shard with a bisect on the splitter keys, sent to all shards at once
+    and reassembled in request order, so a batch costs one round trip per
+    shard instead of one per key.
+
+    Parameters
+    ----------
+    pairs : mapping or iterable
+        Key, item pairs in any order, the last item wins for duplicate keys.
+    shards : int (optional)
+        Number of shards and processes, defaults to the number of CPUs.
+    tree_class : type
+        BinarySearchTree subclass of the shard trees.
+
+    Raises
+    ------
+    ValueError
+        For a key which is not equal to itself, such as NaN.
+
+    Examples
+    --------
+    >>> with ShardedBinarySearchTree({1: 'a', 2: 'b', 3: 'c'},
+    ...                              shards=2) as tree:
+    ...     tree.get_many([3, 1, 4], default=None)
+    ['c', 'a', None]
+    """
+
+    def __init__(self, pairs, shards=None, tree_class=BinarySearchTree):
+        partitions, self._splitters = _partition(
+            pairs, shards or os.cpu_count() or 1)
+        self._executors = [ProcessPoolExecutor(max_workers=1)
+                           for _ in partitions]
+        try:
+            loads = [executor.submit(_load_shard, tree_class, partition)
+                     for executor, partition
+                     in zip(self._executors, partitions)]
+            self._size = sum(load.result() for load in loads)
+        except BaseException:
+            self.close()
+            raise
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, key):
+        """Get item by key, a batch of one."""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys, default=_MISSING):
+        """Items of keys in the same order, looked up by all shards at once.
+
+        Missing keys get default if given, else KeyError for the first
+        missing key.
+        """
+        keys = list(keys)
+        batches = [([], []) for _ in self._executors]
+        for position, key in enumerate(keys if batches else []):
+            batch_keys, positions = batches[bisect_right(self._splitters,
+                                                         key)]
+            batch_keys.append(key)
+            positions.append(position)
+
+        lookups = [(executor.submit(_lookup_shard, batch_keys), positions)
+                   for executor, (batch_keys, positions)
+                   in zip(self._executors, batches) if batch_keys]
+        items = [default] * len(keys)
+        # Every key is missing from an empty tree.
+        missing = [] if batches else list(range(len(keys)))
+        for lookup, positions in lookups:
+            shard_items, shard_missing = lookup.result()
+            for position, item in zip(positions, shard_items):
+                items[position] = item
+            for index in shard_missing:
+                items[positions[index]] = default
+                missing.append(positions[index])
+        if missing and default is _MISSING:
+            raise KeyError('{}'.format(keys[min(missing)]))
+        return items
+
+    def close(self):
+        """Shut down the shard processes."""
+        for executor in self._executors:
+            executor.shutdown()
+        self._executors = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return '{}(shards={}, size={})'.format(
+            self.__class__.__name__, len(self._executors), len(self))
@@ -0,0 +1,294 @@
+"""Binary file format for trees and read only memory mapped trees.
+
+A tree file is a header followed by fixed width node columns in breadth
+first order, so node i is row i of every column and the root is node 0::
+
+    header    magic, byte order, key typecode, flags, node count
+    keys      node count 8 byte ints or floats, absent if keys are items
+    parent    node count 8 byte ints, -1 for none
+    left      node count 8 byte ints, -1 for none
+    right     node count 8 byte ints, -1 for none
+    offsets   node count + 1 8 byte ints into the payload
+    payload   pickled items back to back
+
+Columns are in native byte order and 8 byte aligned so they are served
+straight from the mapped pages.
+
+Classes
+-------
+MappedBinaryTree - read only BinaryTree served from a memory mapped file.
+MappedBinarySearchTree - read only BinarySearchTree served from a file.
+
+Functions
+---------
+dump - write a tree to a file.
+load - memory map a tree file as the matching read only tree.
+"""
+
+from array import array
+from collections import deque
+import mmap
+import pickle
+import struct
+import sys
+
+from datastructures.nodes import BinaryTreeArrays
+from datastructures.nodes import NULL_INDEX
+from datastructures.trees import ArrayBinarySearchTree
+from datastructures.trees import ArrayBinaryTree
+from datastructures.trees import BinarySearchTree
+
+MAGIC = b'DSTREE01'
+# Magic, byte order, key typecode, flags, node count.
+_HEADER = struct.Struct('<8sccB5xq')
+_BYTE_ORDER = {'little': b'<', 'big': b'>'}
+_KEYS_ARE_ITEMS = b'-'
+_SEARCH_TREE_FLAG = 1
+_COLUMN_WIDTH = 8
+
+
+def dump(tree, path):
+    """Write a node or array based tree to path.
+
+    Parameters
+    ----------
+    tree : BinaryTree
+        BinaryTree, BinarySearchTree, their array variants or subclasses.
+    path : str
+        File to write.
+
+    Raises
+    ------
+    ValueError
+        Search tree keys which do not fit 8 byte ints or floats.
+    """
+    is_search_tree = isinstance(tree, (BinarySearchTree,
+                                       ArrayBinarySearchTree))
+    columns = BinaryTreeArrays()
+    for key, item, parent, is_right in _breadth_first(tree):
+        index = columns.append(key, item, parent)
+        if is_right:
+            columns.right[parent] = index
+        elif parent != NULL_INDEX:
+            columns.left[parent] = index
+
+    key_typecode = (_key_typecode(columns.keys) if is_search_tree
+                    else _KEYS_ARE_ITEMS)
+    payload = [pickle.dumps(item, pickle.HIGHEST_PROTOCOL)
+               for item in columns.items]
+    offsets = array('q', [0])
+    for pickled in payload:
+        offsets.append(offsets[-1] + len(pickled))
+
+    with open(path, 'wb') as file:
+        file.write(_HEADER.pack(MAGIC, _BYTE_ORDER[sys.byteorder],
+                                key_typecode,
+                                _SEARCH_TREE_FLAG if is_search_tree else 0,
+                                len(columns)))
+        if key_typecode != _KEYS_ARE_ITEMS:
+            array(key_typecode.decode(), columns.keys).tofile(file)
+        for column in (columns.parent, columns.left, columns.right, offsets):
+            column.tofile(file)
+        for pickled in payload:
+            file.write(pickled)
+
+
+def load(path):
+    """Memory map path as a MappedBinarySearchTree or MappedBinaryTree."""
+    with open(path, 'rb') as file:
+        header = _read_header(file.read(_HEADER.size))
+    if header[2] & _SEARCH_TREE_FLAG:
+        return MappedBinarySearchTree(path)
+    return MappedBinaryTree(path)
+
+
+def _breadth_first(tree):
+    # (key, item, parent index, is right child) in breadth first sequence
+    # for node or array based trees, indices are assigned in that sequence.
+    if isinstance(tree, ArrayBinaryTree):
+        nodes = tree._nodes
+        missing = NULL_INDEX
+
+        def node_data(index):
+            return nodes.keys[index], nodes.items[index]
+
+        def children(index):
+            return nodes.left[index], nodes.right[index]
+    else:
+        missing = None
+
+        def node_data(node):
+            return node.key, node.item
+
+        def children(node):
+            return node.left_child, node.right_child
+
+    frontier = deque([])
+    if len(tree) > 0:
+        frontier.append((tree._root, NULL_INDEX, False))
+    index = 0
+    while frontier:
+        node, parent, is_right = frontier.popleft()
+        yield node_data(node) + (parent, is_right)
+        left_child, right_child = children(node)
+        if left_child != missing:
+            frontier.append((left_child, index, False))
+        if right_child != missing:
+            frontier.append((right_child, index, True))
+        index += 1
+
+
+def _key_typecode(keys):
+    # Narrowest 8 byte column holding every key exactly.
+    if all(isinstance(key, int) and -2 ** 63 <= key < 2 ** 63
+           for key in keys):
+        return b'q'
+    if all(isinstance(key, (int, float)) and float(key) == key
+           for key in keys):
+        return b'd'
+    raise ValueError('Keys must fit 8 byte ints or floats.')
+
+
+def _read_header(data):
+    # (key typecode, node count, flags) after validating the header.
+    if len(data) < _HEADER.size:
+        raise ValueError('Not a tree file, too short.')
+    magic, byte_order, key_typecode, flags, size = _HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError('Not a tree file, bad magic {!r}.'.format(magic))
+    if byte_order != _BYTE_ORDER[sys.byteorder]:
+        raise ValueError('Tree file written with another byte order.')
+    return key_typecode, size, flags
+
+
+class _PickledItems:
+    # Sequence of items unpickled on access from the payload section.
+
+    def __init__(self, offsets, payload):
+        self._offsets = offsets
+        self._payload = payload
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError('Item index out of range.')
+        return pickle.loads(
+            self._payload[self._offsets[index]:self._offsets[index + 1]])
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+
+class MappedBinaryTree(ArrayBinaryTree):
+    """A read only BinaryTree served from a memory mapped tree file.
+
+    Opening is O(1), nothing is parsed up front and no node objects are
+    created. Links and keys are read directly from the mapped pages and
+    items are unpickled as they are accessed. Close the tree, or use it as
+    a context manager, to release the file.
+
+    Parameters
+    ----------
+    path : str
+        Tree file written by dump.
+
+    Raises
+    ------
+    ValueError
+        If path is not a tree file readable on this machine.
+
+    Examples
+    --------
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'tree.bin')
+    >>> from datastructures.trees import BinaryTree
+    >>> dump(BinaryTree([1, None, 2, 3]), path)
+    >>> with MappedBinaryTree(path) as tree:
+    ...     tree.items_as_tree()
+    [1, None, 2, 3]
+
+    """
+
+    def __init__(self, path):
+        self._path = path
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            key_typecode, size, flags = _read_header(
+                self._mmap[:_HEADER.size])
+        except ValueError:
+            self._mmap.close()
+            raise
+
+        self._views = [memoryview(self._mmap)]
+        offset = _HEADER.size
+
+        def column(typecode, length):
+            nonlocal offset
+            view = self._views[0][offset:offset + length * _COLUMN_WIDTH]
+            offset += length * _COLUMN_WIDTH
+            self._views.extend([view, view.cast(typecode)])
+            return self._views[-1]
+
+        keys = (None if key_typecode == _KEYS_ARE_ITEMS
+                else column(key_typecode.decode(), size))
+        nodes = BinaryTreeArrays.__new__(BinaryTreeArrays)
+        nodes.parent = column('q', size)
+        nodes.left = column('q', size)
+        nodes.right = column('q', size)
+        offsets = column('q', size + 1)
+        self._views.append(self._views[0][offset:])
+        nodes.items = _PickledItems(offsets, self._views[-1])
+        nodes.keys = keys if keys is not None else nodes.items
+
+        self._nodes = nodes
+        self._size = size
+        self._root = 0 if size > 0 else NULL_INDEX
+        self._hash = None
+
+    def close(self):
+        """Release the mapped file, the tree is unusable afterwards."""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        # Can instantiate by copy and paste.
+        return '{}({!r})'.format(self.__class__.__name__, self._path)
+
+
+class MappedBinarySearchTree(MappedBinaryTree, ArrayBinarySearchTree):
+    """A read only BinarySearchTree served from a memory mapped tree file.
+
+    Lookups binary search the mapped key and link columns, see
+    MappedBinaryTree.
+
+    Parameters
+    ----------
+    path : str
+        Tree file written by dump from a search tree.
+
+    Examples
+    --------
+    >>> import os, tempfile
+    >>> from collections import OrderedDict
+    >>> path = os.path.join(tempfile.mkdtemp(), 'tree.bin')
+    >>> from datastructures.trees import AVLTree
+    >>> dump(AVLTree(OrderedDict([(1, 'a'), (2, 'b'), (3, 'c')])), path)
+    >>> tree = load(path)
+    >>> tree[3], 4 in tree, tree.keys_as_tree()
+    ('c', False, [2, 1, 3])
+    >>> tree.close()
+    """
+
+    def __setitem__(self, key, item):
+        raise TypeError('{} is read only.'.format(self.__class__.__name__))
+
+    def update(self, pairs):
+        raise TypeError('{} is read only.'.format(self.__class__.__name__))
@@ -0,0 +1,53 @@
+"""Test for benchmarks package helpers."""
+
+from collections import Counter
+
+import pytest
+
+from datastructures.benchmarks.bench_trees import compare
+from datastructures.benchmarks.bench_trees import generate_workload
+from datastructures.benchmarks.bench_trees import node_hops
+from datastructures.benchmarks.bench_trees import run
+from datastructures.benchmarks.bench_trees import WORKLOADS
+
+
+@pytest.mark.parametrize('workload', WORKLOADS)
+def test_generate_workload(workload):
+    """Test workloads have unique keys and lookups of those keys."""
+    keys, lookups = generate_workload(workload, 500)
+    assert len(set(keys)) == len(keys) == 500
+    assert set(lookups) <= set(keys)
+    if workload == 'sorted':
+        assert keys == sorted(keys)
+    elif workload == 'reverse':
+        assert keys == sorted(keys, reverse=True)
+    assert generate_workload(workload, 500) == (keys, lookups)
+
+
+def test_zipfian_lookups_skewed():
+    """Test zipfian lookups concentrate on few keys."""
+    _, lookups = generate_workload('zipfian', 1000)
+    most_common = Counter(lookups).most_common(10)
+    assert sum(count for _, count in most_common) > len(lookups) / 4
+
+
+def test_run_and_compare():
+    """Test results cover every operation and regressions are flagged."""
+    results = run(sizes=[50], workloads=['random'])
+    assert 'AVLTree/random/50/getitem' in results
+    assert all(result['ops_per_sec'] > 0 for result in results.values())
+
+    baseline = {key: {'ops_per_sec': result['ops_per_sec'] * 2}
+                for key, result in results.items()}
+    changes = compare(results, baseline, tolerance=0.2)
+    assert all(regressed for _, regressed in changes.values())
+    assert not any(regressed for _, regressed
+                   in compare(results, results).values())
+
+
+def test_splay_tree_fewer_hops_on_zipfian():
+    """Test the self-adjusting tree beats static trees on skewed lookups."""
+    hops = node_hops(sizes=[1000], workloads=['zipfian'])
+    assert hops['SplayTree/zipfian/1000'] < hops['AVLTree/zipfian/1000']
+    assert hops['SplayTree/zipfian/1000'] < \
+        hops['BinarySearchTree/zipfian/1000']
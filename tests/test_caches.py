@@ -0,0 +1,124 @@
+"""Test for caches module."""
+
+from hypothesis import given
+import hypothesis.strategies as st
+import pytest
+
+from datastructures.caches import BoundedTreeCache
+from datastructures.caches import POLICIES
+from datastructures.trees import BinarySearchTree
+
+
+class _ModelCache:
+    # Reference cache, victims chosen by a linear scan.
+
+    def __init__(self, capacity, policy):
+        self.capacity = capacity
+        self.policy = policy
+        self.items = {}
+        self.uses = {}
+        self.tick = 0
+
+    def use(self, key, first=False):
+        self.tick += 1
+        count = 1 if first else self.uses[key][0] + 1
+        self.uses[key] = (count, self.tick)
+
+    def get(self, key):
+        if key not in self.items:
+            return None
+        self.use(key)
+        return self.items[key]
+
+    def set(self, key, item):
+        if key in self.items:
+            self.use(key)
+        else:
+            if len(self.items) >= self.capacity:
+                if self.policy == 'lru':
+                    victim = min(self.uses, key=lambda k: self.uses[k][1])
+                elif self.policy == 'lfu':
+                    victim = min(self.uses, key=self.uses.get)
+                else:
+                    victim = min(self.items)
+                del self.items[victim], self.uses[victim]
+            self.use(key, first=True)
+        self.items[key] = item
+
+
+@pytest.mark.parametrize('policy', POLICIES)
+@given(capacity=st.integers(1, 8),
+       operations=st.lists(st.tuples(st.booleans(), st.integers(0, 15))))
+def test_matches_model(policy, capacity, operations):
+    """Test evictions and counters match a reference for every policy."""
+    cache = BoundedTreeCache(capacity, policy)
+    model = _ModelCache(capacity, policy)
+    hits = misses = 0
+    for is_set, key in operations:
+        if is_set:
+            cache[key] = str(key)
+            model.set(key, str(key))
+        else:
+            expected = model.get(key)
+            assert cache.get(key) == expected
+            hits += expected is not None
+            misses += expected is None
+        assert len(cache) <= capacity
+        assert list(cache) == sorted(model.items)
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (hits, misses)
+    assert stats['size'] == len(model.items)
+
+
+def test_lfu_evicts_least_used():
+    """Test LFU keeps frequently used keys and breaks ties by recency."""
+    cache = BoundedTreeCache(3, 'lfu')
+    for key in 'abc':
+        cache[key] = key.upper()
+    cache['a'], cache['a'], cache['b']
+    cache['d'] = 'D'
+    assert list(cache) == ['a', 'b', 'd']
+    cache['e'] = 'E'
+    assert list(cache) == ['a', 'b', 'e']
+    assert cache.stats() == {'size': 3, 'capacity': 3, 'hits': 3,
+                             'misses': 0, 'evictions': 2}
+
+
+def test_ordered_access_not_a_use():
+    """Test membership and range access leave the LRU order alone."""
+    cache = BoundedTreeCache(3)
+    for key in range(3):
+        cache[key] = key
+    assert 0 in cache
+    assert list(cache.irange(0, 1)) == [0, 1]
+    assert (cache.floor(5), cache.ceiling(-1)) == (2, 0)
+    assert (cache.min(), cache.max()) == (0, 2)
+    cache[3] = 3
+    assert list(cache) == [1, 2, 3]
+    assert cache.stats()['hits'] == 0
+
+
+def test_delete_and_pop():
+    """Test deleted keys leave the policy and free capacity."""
+    cache = BoundedTreeCache(2, 'lfu', tree_class=BinarySearchTree)
+    cache[1] = 'a'
+    cache[2] = 'b'
+    del cache[1]
+    assert cache.pop(2) == 'b'
+    assert cache.pop(2, None) is None
+    with pytest.raises(KeyError):
+        cache.pop(2)
+    with pytest.raises(KeyError):
+        cache[2]
+    cache[3] = 'c'
+    cache[4] = 'd'
+    assert list(cache) == [3, 4]
+    assert cache.stats()['evictions'] == 0
+
+
+@pytest.mark.parametrize('capacity, policy', [(0, 'lru'), (2, 'fifo')])
+def test_invalid(capacity, policy):
+    """Test capacity below one and unknown policies are rejected."""
+    with pytest.raises(ValueError):
+        BoundedTreeCache(capacity, policy)
@@ -0,0 +1,104 @@
+"""Test for heaps module."""
+
+import heapq
+
+from hypothesis import given
+import hypothesis.strategies as st
+import pytest
+
+from datastructures.heaps import ArrayHeap
+from datastructures.nodes import NULL_INDEX
+from datastructures.trees import BinaryTree
+
+
+def _is_heap(heap):
+    # Every entry is no smaller than its parent and handles point back.
+    priorities = heap.keys_as_tree()
+    return (all(priorities[(index - 1) // heap.arity] <= priorities[index]
+                for index in range(1, len(priorities)))
+            and all(handle.index == index
+                    for index, handle in enumerate(heap._handles)))
+
+
+@pytest.mark.parametrize('arity', [2, 3, 4])
+@given(gen_input=st.lists(st.integers()),
+       gen_pushed=st.lists(st.integers()))
+def test_heapify_push_pop(arity, gen_input, gen_pushed):
+    """Test entries pop in priority order like heapq."""
+    heap = ArrayHeap(((priority, str(priority)) for priority in gen_input),
+                     arity)
+    assert _is_heap(heap)
+    for priority in gen_pushed:
+        heap.push(priority, str(priority))
+    assert _is_heap(heap)
+
+    expected = sorted(gen_input + gen_pushed)
+    if expected:
+        assert heap.peek()[0] == expected[0]
+    popped = [heap.pop() for _ in range(len(heap))]
+    assert [priority for priority, _ in popped] == expected
+    assert all(item == str(priority) for priority, item in popped)
+    with pytest.raises(IndexError):
+        heap.pop()
+
+
+@pytest.mark.parametrize('arity', [2, 5])
+@given(gen_input=st.lists(st.integers(0, 1000), min_size=1),
+       gen_decreases=st.lists(st.tuples(st.integers(0, 100),
+                                        st.integers(0, 500))))
+def test_decrease_key(arity, gen_input, gen_decreases):
+    """Test decrease_key against a heapq reference."""
+    heap = ArrayHeap(arity=arity)
+    handles = [heap.push(priority, position)
+               for position, priority in enumerate(gen_input)]
+    priorities = list(gen_input)
+    for position, decrease in gen_decreases:
+        position %= len(handles)
+        priorities[position] -= decrease
+        heap.decrease_key(handles[position], priorities[position])
+        assert heap.priority(handles[position]) == priorities[position]
+    assert _is_heap(heap)
+
+    expected = [(priority, position)
+                for position, priority in enumerate(priorities)]
+    heapq.heapify(expected)
+    while expected:
+        priority, position = heap.pop()
+        assert priority == heapq.heappop(expected)[0]
+        assert priorities[position] == priority
+        assert handles[position].index == NULL_INDEX
+
+
+def test_decrease_key_invalid():
+    """Test popped handles and larger priorities are rejected."""
+    heap = ArrayHeap()
+    handle = heap.push(3, 'c')
+    with pytest.raises(ValueError):
+        heap.decrease_key(handle, 4)
+    heap.pop()
+    with pytest.raises(ValueError):
+        heap.decrease_key(handle, 1)
+    with pytest.raises(ValueError):
+        ArrayHeap(arity=1)
+
+
+def test_foreign_handles_rejected():
+    """Test handles of another heap raise ValueError whatever their index."""
+    heap = ArrayHeap([(1, 'a')])
+    other = ArrayHeap([(priority, priority) for priority in range(5)])
+    for handle in (other.push(0, 'x'), other.push(9, 'y')):
+        with pytest.raises(ValueError):
+            heap.decrease_key(handle, -1)
+        with pytest.raises(ValueError):
+            heap.priority(handle)
+    assert heap.peek() == (1, 'a')
+
+
+def test_items_as_tree_layout():
+    """Test the binary heap level order is a BinaryTree layout."""
+    heap = ArrayHeap([(priority, priority) for priority in range(10, 0, -1)])
+    tree = BinaryTree(heap.items_as_tree())
+    for node in tree:
+        for child in (node.left_child, node.right_child):
+            assert child is None or node.item <= child.item
+    assert len(tree) == len(heap)
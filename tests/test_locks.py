@@ -0,0 +1,63 @@
+"""Test for locks module."""
+
+import threading
+
+import pytest
+
+from datastructures.locks import ReadWriteLock
+
+
+def test_readers_share_lock():
+    """Test two readers hold the lock at the same time."""
+    lock = ReadWriteLock()
+    barrier = threading.Barrier(2, timeout=5)
+
+    def reader():
+        with lock.read_locked():
+            barrier.wait()
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    reader()
+    thread.join()
+
+
+def test_writer_excludes_readers():
+    """Test readers wait for the writer to finish."""
+    lock = ReadWriteLock()
+    events = []
+    lock.acquire_write()
+
+    def reader():
+        with lock.read_locked():
+            events.append('read')
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    thread.join(0.1)
+    events.append('write done')
+    lock.release_write()
+    thread.join()
+    assert events == ['write done', 'read']
+
+
+def test_reentrant():
+    """Test reacquiring by the owning thread does not deadlock."""
+    lock = ReadWriteLock()
+    with lock.write_locked():
+        with lock.write_locked():
+            with lock.read_locked():
+                pass
+    with lock.read_locked():
+        with lock.read_locked():
+            pass
+
+
+def test_upgrade_exception():
+    """Test read lock can not be upgraded to a write lock."""
+    lock = ReadWriteLock()
+    with lock.read_locked():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+    with lock.write_locked():
+        pass
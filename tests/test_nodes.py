@@ -11,7 +11,14 @@ from hypothesis import given
 import hypothesis.strategies as st
 import pytest
 
+from datastructures.nodes import AggregateIntervalTreeNode
+from datastructures.nodes import AVLTreeNode
+from datastructures.nodes import BinaryTreeArrays
 from datastructures.nodes import BinaryTreeNode
+from datastructures.nodes import BPlusTreeNode
+from datastructures.nodes import IntervalTreeNode
+from datastructures.nodes import LazyBinaryTreeNode
+from datastructures.nodes import NULL_INDEX
 
 
 @pytest.fixture
@@ -45,6 +52,32 @@ def test_add_node(set_up_fixture):
     assert root_node.left_child.left_child.key == 4
 
 
+def test_nodes_are_slotted():
+    """Test nodes carry no per instance __dict__."""
+    for node in (BinaryTreeNode(1, 1, None), AVLTreeNode(1, 1, None),
+                 BPlusTreeNode([1], [1]), IntervalTreeNode((1, 2), 1, None),
+                 LazyBinaryTreeNode(1, 1, None, None),
+                 AggregateIntervalTreeNode((1, 2), 1, None)):
+        assert not hasattr(node, '__dict__')
+        with pytest.raises(AttributeError):
+            node.color = 'red'
+
+
+@pytest.mark.parametrize('key_typecode', [None, 'q', 'd'])
+def test_tree_arrays_append(key_typecode):
+    """Test array storage links nodes by index."""
+    nodes = BinaryTreeArrays(key_typecode)
+    root = nodes.append(5, 'e')
+    nodes.right[root] = nodes.append(7, 'g', root)
+    right = nodes.right[root]
+    assert len(nodes) == 2
+    assert nodes.keys[right] == 7 and nodes.items[right] == 'g'
+    assert nodes.parent[right] == root
+    assert nodes.left[root] == NULL_INDEX
+    assert nodes.is_root(root) and not nodes.is_root(right)
+    assert nodes.is_leaf(right) and not nodes.is_leaf(root)
+
+
 @given(st.integers(), st.integers())
 def test_ints_are_commutative(x, y):
     """Example showing how to use hypothesis."""
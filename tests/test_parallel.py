@@ -0,0 +1,83 @@
+"""Test for parallel module."""
+
+from collections import OrderedDict
+import random
+
+from hypothesis import given
+import hypothesis.strategies as st
+import pytest
+
+from datastructures.parallel import _partition
+from datastructures.parallel import parallel_build
+from datastructures.parallel import ShardedBinarySearchTree
+from datastructures.trees import AVLTree
+from datastructures.trees import BinarySearchTree
+
+
+def _random_pairs(size, seed=0):
+    rng = random.Random(seed)
+    return [(rng.randrange(size * 2), rng.random()) for _ in range(size)]
+
+
+@given(pairs=st.lists(st.tuples(st.integers(-50, 50), st.integers())),
+       count=st.integers(1, 8))
+def test_partition(pairs, count):
+    """Test partitions are non empty, keep order and split by key range."""
+    partitions, splitters = _partition(pairs, count)
+    assert len(partitions) <= count
+    assert len(splitters) == max(len(partitions) - 1, 0)
+    assert all(partitions)
+    assert sorted(pair for partition in partitions for pair in partition) \
+        == sorted(pairs)
+    for index, partition in enumerate(partitions):
+        for key, _ in partition:
+            assert index == 0 or splitters[index - 1] <= key
+            assert index == len(splitters) or key < splitters[index]
+
+
+@pytest.mark.parametrize('tree_class', [BinarySearchTree, AVLTree])
+@pytest.mark.parametrize('size, workers', [(0, 2), (1, 2), (5, 1),
+                                           (1000, 3), (2000, 4)])
+def test_parallel_build(tree_class, size, workers):
+    """Test the tree matches a sorted bulk load."""
+    pairs = _random_pairs(size)
+    tree = parallel_build(pairs, tree_class, workers=workers)
+    expected = tree_class(OrderedDict(pairs))
+    assert len(tree) == len(expected)
+    assert list(tree.irange()) == list(expected.irange())
+    assert all(tree[key] == expected[key] for key, _ in pairs)
+    assert tree._root is None or tree._root.size == len(tree)
+    if size:
+        assert tree.stats()['height'] == len(tree).bit_length()
+
+
+def test_parallel_build_nan():
+    """Test NaN keys raise from the workers."""
+    with pytest.raises(ValueError):
+        parallel_build([(1.0, 'a'), (float('nan'), 'b'), (2.0, 'c')],
+                       workers=2)
+
+
+def test_sharded_get_many():
+    """Test batched lookups come back in request order from every shard."""
+    pairs = dict(_random_pairs(500))
+    with ShardedBinarySearchTree(pairs, shards=3) as tree:
+        assert len(tree) == len(pairs)
+        keys = list(range(-5, 1005))
+        random.Random(1).shuffle(keys)
+        assert tree.get_many(keys, default=None) == \
+            [pairs.get(key) for key in keys]
+        key = next(iter(pairs))
+        assert tree[key] == pairs[key]
+        with pytest.raises(KeyError):
+            tree.get_many([key, -1])
+        assert tree.get_many([]) == []
+
+
+def test_sharded_empty():
+    """Test an empty sharded tree misses every key."""
+    with ShardedBinarySearchTree([]) as tree:
+        assert len(tree) == 0
+        assert tree.get_many([1], default='x') == ['x']
+        with pytest.raises(KeyError):
+            tree[1]
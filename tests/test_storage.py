@@ -0,0 +1,133 @@
+"""Test for storage module."""
+
+from collections import OrderedDict
+import mmap
+import os
+import tempfile
+
+from hypothesis import given
+import hypothesis.strategies as st
+import pytest
+
+from datastructures.storage import dump
+from datastructures.storage import load
+from datastructures.storage import MappedBinarySearchTree
+from datastructures.storage import MappedBinaryTree
+from datastructures.trees import ArrayBinarySearchTree
+from datastructures.trees import ArrayBinaryTree
+from datastructures.trees import AVLTree
+from datastructures.trees import BinarySearchTree
+from datastructures.trees import BinaryTree
+
+
+@pytest.fixture
+def tree_path(tmp_path):
+    """Path of a tree file in a temporary directory."""
+    return str(tmp_path / 'tree.bin')
+
+
+@pytest.mark.parametrize('tree', [BinaryTree([]),
+                                  BinaryTree([1, None, 2, 3]),
+                                  BinaryTree(['a', 'b', None, (1, 2)]),
+                                  ArrayBinaryTree([5, 4, 7, 3, None, 2])],
+                         ids=['empty', 'ints', 'objects', 'array'])
+def test_binary_tree_round_trip(tree_path, tree):
+    """Test mapped tree has the shape and items of the dumped tree."""
+    dump(tree, tree_path)
+    with load(tree_path) as mapped:
+        assert isinstance(mapped, MappedBinaryTree)
+        assert not isinstance(mapped, MappedBinarySearchTree)
+        assert mapped.items_as_tree() == tree.items_as_tree()
+        assert mapped.keys_as_list() == tree.keys_as_list()
+        assert len(mapped) == len(tree)
+        assert ([mapped._nodes.items[index] for index in mapped.iter_inorder()]
+                == [node.item for node in BinaryTree(
+                    tree.items_as_tree()).iter_inorder()])
+
+
+@pytest.mark.parametrize('tree_class', [BinarySearchTree, AVLTree,
+                                        ArrayBinarySearchTree])
+@given(gen_input=st.dictionaries(st.integers(-2 ** 63, 2 ** 63 - 1),
+                                 st.one_of(st.none(), st.text(),
+                                           st.integers())))
+def test_search_tree_round_trip(tree_class, gen_input):
+    """Test mapped search tree serves lookups of the dumped tree."""
+    tree = tree_class(OrderedDict(gen_input))
+    with tempfile.TemporaryDirectory() as directory:
+        tree_path = os.path.join(directory, 'tree.bin')
+        dump(tree, tree_path)
+        with MappedBinarySearchTree(tree_path) as mapped:
+            assert mapped.keys_as_tree() == tree.keys_as_tree()
+            assert mapped.items_as_tree() == tree.items_as_tree()
+            for key, item in gen_input.items():
+                assert key in mapped
+                assert mapped[key] == item
+            if not isinstance(tree, ArrayBinarySearchTree):
+                tree = ArrayBinarySearchTree.from_tree(tree)
+            assert mapped == tree
+
+
+def test_float_keys(tree_path):
+    """Test mixed int and float keys are stored as floats."""
+    dump(BinarySearchTree(OrderedDict([(1.5, 'a'), (1, 'b'), (3, 'c')])),
+         tree_path)
+    with load(tree_path) as mapped:
+        assert mapped[1] == 'b' and mapped[1.5] == 'a'
+        assert 2 not in mapped
+        with pytest.raises(KeyError):
+            mapped[2]
+
+
+def test_keys_too_large_exception(tree_path):
+    """Test keys which do not fit a column are rejected."""
+    with pytest.raises(ValueError):
+        dump(BinarySearchTree(OrderedDict([(2 ** 64 + 1, 'a'), (0.5, 'b')])),
+             tree_path)
+
+
+def test_not_tree_file_exception(tree_path):
+    """Test other files are rejected."""
+    with open(tree_path, 'wb') as file:
+        file.write(b'not a tree file at all, not at all')
+    with pytest.raises(ValueError):
+        load(tree_path)
+
+
+def test_not_tree_file_unmapped(tree_path, monkeypatch):
+    """Test the file is unmapped again when the header is rejected."""
+    mapped_files = []
+
+    def recording_mmap(*args, **kwargs):
+        mapped_files.append(real_mmap(*args, **kwargs))
+        return mapped_files[-1]
+
+    real_mmap = mmap.mmap
+    monkeypatch.setattr(mmap, 'mmap', recording_mmap)
+    with open(tree_path, 'wb') as file:
+        file.write(b'not a tree file at all, not at all')
+    with pytest.raises(ValueError):
+        MappedBinarySearchTree(tree_path)
+    assert len(mapped_files) == 1 and mapped_files[0].closed
+
+
+def test_nan_lookup(tree_path):
+    """Test NaN is found nowhere, whatever the key column."""
+    for dict_ in (OrderedDict([(1, 'a'), (2, 'b')]),
+                  OrderedDict([(1.5, 'a'), (2.5, 'b')])):
+        dump(BinarySearchTree(dict_), tree_path)
+        with load(tree_path) as mapped:
+            assert float('nan') not in mapped
+            with pytest.raises(KeyError):
+                mapped[float('nan')]
+
+
+def test_read_only_exception(tree_path):
+    """Test mapped search trees can not be changed."""
+    dump(BinarySearchTree(OrderedDict([(1, 'a')])), tree_path)
+    with load(tree_path) as mapped:
+        with pytest.raises(TypeError):
+            mapped[2] = 'b'
+        with pytest.raises(TypeError):
+            mapped.update([(2, 'b')])
+        assert repr(mapped) == 'MappedBinarySearchTree({!r})'.format(
+            tree_path)
@@ -2,7 +2,17 @@
 
 Classes
 -------
+TestBinaryTree - Test streaming and lazy binary tree construction.
 TestBinarySearchTree - Test binary search tree class.
+TestAVLTree - Test self-balancing AVL tree class.
+TestSplayTree - Test self-adjusting splay tree class.
+TestIntervalTree - Test interval overlap query tree class.
+TestArrayBinaryTree - Test array backed binary tree class.
+TestArrayBinarySearchTree - Test array backed binary search tree class.
+TestThreadSafeBinarySearchTree - Test locked binary search tree classes.
+TestPersistentBinarySearchTree - Test path copying binary search tree class.
+TestFrozenBinarySearchTree - Test level order array search tree class.
+TestBPlusTree - Test B+ tree ordered map class.
 
 
 Fixtures
@@ -11,14 +21,29 @@ pytest_generate_tests - read in data for fixtures w/dynamic parameters.
 init_instance - factory for binary search tree.
 """
 from collections import OrderedDict
+from itertools import count
+from itertools import islice
+import math
+import operator
+import pickle
 import random
+import threading
 
 from hypothesis import given
 import hypothesis.strategies as st
 import pytest
 
+from datastructures.trees import ArrayBinarySearchTree
+from datastructures.trees import ArrayBinaryTree
+from datastructures.trees import AVLTree
 from datastructures.trees import BinarySearchTree
 from datastructures.trees import BinaryTree
+from datastructures.trees import BPlusTree
+from datastructures.trees import IntervalTree
+from datastructures.trees import PersistentBinarySearchTree
+from datastructures.trees import SplayTree
+from datastructures.trees import ThreadSafeAVLTree
+from datastructures.trees import ThreadSafeBinarySearchTree
 
 
 def pytest_generate_tests(metafunc):
@@ -85,6 +110,45 @@ def init_instance():
     return _init_instance
 
 
+class TestBinaryTree:
+    """Test for BinaryTree Class."""
+
+    @given(items=st.lists(st.one_of(st.none(), st.integers()), min_size=1)
+           .filter(lambda items: items[0] is not None))
+    def test_lazy_same_as_eager(self, items):
+        expected = BinaryTree(items)
+        assert BinaryTree(iter(items)) == expected
+        tree = BinaryTree(iter(items), lazy=True)
+        assert tree.items_as_tree() == expected.items_as_tree()
+        assert len(tree) == len(expected)
+        assert [node.item for node in tree.iter_inorder()] == \
+            [node.item for node in expected.iter_inorder()]
+
+    def test_lazy_reads_on_demand(self):
+        read = []
+        items = (read.append(item) or item for item in range(1, 100))
+        tree = BinaryTree(items, lazy=True)
+        assert tree and read == [1]
+        assert tree._root.left_child.item == 2 and read == [1, 2, 3]
+        assert tree._root.right_child.left_child.item == 6
+        assert read == list(range(1, 8))
+        assert len(tree) == 99 and read == list(range(1, 100))
+
+    def test_lazy_unbounded(self):
+        tree = BinaryTree(count(), lazy=True)
+        node = tree._root
+        for _ in range(10):
+            node = node.right_child
+        assert node.item == 2 ** 11 - 2
+        assert [node.item for node in islice(tree.iter_preorder(), 4)] == \
+            [0, 1, 3, 7]
+
+    def test_empty(self):
+        for lazy in (False, True):
+            tree = BinaryTree(iter([]), lazy=lazy)
+            assert not tree and len(tree) == 0 and tree.items_as_tree() == []
+
+
 class TestBinarySearchTree:
     """Test for BinarySearchTree Class."""
 
@@ -163,10 +227,68 @@ class TestBinarySearchTree:
         tree = init_instance(OrderedDict(gen_input))
         assert tree[random.choice(list(gen_input.keys()))] is not None
 
-    @given(gen_input=st.dictionaries(st.characters(), st.characters(), min_size=1))
-    def test_insert_non_numeric_keys_exception(self, init_instance, gen_input):
+    @given(gen_input=st.dictionaries(
+        st.one_of(st.text(), st.tuples(st.integers(), st.text())),
+        st.characters()))
+    def test_comparable_keys(self, init_instance, gen_input):
+        keys = [key for key in gen_input if isinstance(key, str)]
+        tree = init_instance(OrderedDict((key, gen_input[key])
+                                         for key in keys))
+        assert list(tree.irange()) == sorted(keys)
+        assert all(tree[key] == gen_input[key] for key in keys)
+        tuples = [key for key in gen_input if isinstance(key, tuple)]
+        tree = init_instance(OrderedDict((key, gen_input[key])
+                                         for key in tuples))
+        assert list(tree.irange()) == sorted(tuples)
+        assert self._is_valid_BST(tree) or len(tree) < 2
+
+    def test_mixed_keys_exception(self, init_instance):
+        tree = init_instance(OrderedDict([(1, 'a')]))
+        with pytest.raises(TypeError):
+            tree['a'] = 'a'
+
+    @given(gen_input=st.dictionaries(st.text('abcABC'), st.integers()),
+           gen_key=st.text('abcABC'))
+    def test_key_function(self, init_instance, gen_input, gen_key):
+        tree = BinarySearchTree(OrderedDict(gen_input), key=str.lower)
+        expected = {}
+        for key, item in gen_input.items():
+            expected[key.lower()] = item
+        assert list(tree.irange()) == sorted(expected)
+        assert all(tree[key.upper().lower()] == expected[key.lower()]
+                   for key in gen_input)
+        assert (gen_key.upper() in tree) == (gen_key.lower() in expected)
+        assert tree.rank(gen_key.upper()) == len(
+            [key for key in expected if key < gen_key.lower()])
+        left, right = tree.split(gen_key.upper())
+        assert all(key < gen_key.lower() for key in left.irange())
+        right[gen_key.upper()] = 'new'
+        assert right[gen_key.lower()] == 'new'
+
+    def test_key_function_reverse(self):
+        for tree_class in (BinarySearchTree, AVLTree,
+                           PersistentBinarySearchTree):
+            tree = tree_class(OrderedDict((key, key) for key in range(10)),
+                              key=operator.neg)
+            assert tree[3] == 3 and 3 in tree and -3 not in tree
+            assert list(tree.irange(5, 2)) == [-5, -4, -3, -2]
+            assert tree.floor(4.5) == -5 and tree.count_range(5, 2) == 4
+            assert tree.delete_range(5, 2) == 4
+            assert tree.pop(9) == 9 and list(tree.irange()) == \
+                [-8, -7, -6, -1, 0]
+            assert tree.merge(tree_class.from_sorted(
+                [-12, -11], ['l', 'k'])).keys_as_list() == \
+                tree_class.from_sorted(
+                    [-12, -11, -8, -7, -6, -1, 0], range(7)).keys_as_list()
+
+    def test_nan_key_exception(self, init_instance):
+        key = float('nan')
+        tree = init_instance(OrderedDict([(1.0, 'a')]))
         with pytest.raises(ValueError):
-            init_instance(OrderedDict(gen_input))
+            tree[key] = 'nan'
+        with pytest.raises(ValueError):
+            tree.update([(key, 'nan')])
+        assert float('nan') not in tree and len(tree) == 1
 
     @given(gen_input=st.dictionaries(st.integers(), st.characters(), min_size=1))
     def test_repr(self, init_instance, gen_input):
@@ -177,12 +299,398 @@ class TestBinarySearchTree:
         inputs, shuffled_inputs, is_equal = get_test_eq
         assert bool(init_instance(inputs) == init_instance(shuffled_inputs)) is is_equal
 
+    def test_setitem_deep_sorted_tree(self, init_instance):
+        tree = init_instance(OrderedDict((key, key) for key in range(5000)))
+        tree[5000] = 'new'
+        tree[2500] = 'updated'
+        assert len(tree) == 5001
+        assert tree[5000] == 'new' and tree[2500] == 'updated'
+
+    @given(gen_input=st.lists(st.tuples(st.integers(), st.integers())))
+    def test_update_same_as_setitem(self, init_instance, gen_input):
+        expected = init_instance(OrderedDict())
+        for key, item in gen_input:
+            expected[key] = item
+        tree = init_instance(OrderedDict())
+        tree.update(gen_input)
+        assert tree.keys_as_tree() == expected.keys_as_tree()
+        assert tree.items_as_tree() == expected.items_as_tree()
+        assert len(tree) == len(expected)
+
+    def test_update_existing_tree(self, init_instance):
+        tree = init_instance(OrderedDict([(5, 'e'), (2, 'b'), (7, 'g')]))
+        tree.update(OrderedDict([(9, 'i'), (1, 'a'), (7, 'G'), (6, 'f')]))
+        assert tree.keys_as_tree() == [5, 2, 7, 1, None, 6, 9]
+        assert tree.items_as_list() == ['e', 'b', 'G', 'a', 'f', 'i']
+
+    def test_update_string_keys(self, init_instance):
+        tree = init_instance(OrderedDict())
+        tree.update([('b', 2), ('a', 1), ('c', 3)])
+        assert tree.keys_as_tree() == ['b', 'a', 'c'] and tree['a'] == 1
+
+    @given(gen_input=st.dictionaries(st.integers(), st.integers()))
+    def test_from_sorted_balanced(self, gen_input):
+        keys = sorted(gen_input)
+        tree = BinarySearchTree.from_sorted(keys,
+                                            [gen_input[key] for key in keys])
+        assert len(tree) == len(gen_input)
+        assert self._is_valid_BST(tree) is bool(gen_input)
+        assert len(tree.keys_as_tree()) < 2 * len(gen_input) + 1
+        for key, item in gen_input.items():
+            assert tree[key] == item
+
+    @given(gen_input=st.lists(st.tuples(st.integers(), st.integers())))
+    def test_from_sorted_sort_unsorted(self, gen_input):
+        tree = BinarySearchTree.from_sorted([key for key, _ in gen_input],
+                                            [item for _, item in gen_input],
+                                            sort=True)
+        expected = dict(gen_input)
+        assert len(tree) == len(expected)
+        for key, item in expected.items():
+            assert tree[key] == item
+
+    @pytest.mark.parametrize('keys, items', [([2, 1], ['b', 'a']),
+                                             ([1, 1], ['a', 'a']),
+                                             ([1, 2], ['a']),
+                                             ([float('nan')], ['a'])],
+                             ids=['unsorted', 'duplicate', 'length',
+                                  'nan'])
+    def test_from_sorted_exception(self, keys, items):
+        with pytest.raises(ValueError):
+            BinarySearchTree.from_sorted(keys, items)
+
+    @given(gen_input=st.dictionaries(st.integers(), st.integers()))
+    def test_iter_inorder(self, init_instance, gen_input):
+        tree = init_instance(OrderedDict(gen_input))
+        assert [node.key for node in tree.iter_inorder()] == sorted(gen_input)
+
+    @given(gen_input=st.dictionaries(st.integers(-50, 50), st.integers(),
+                                     min_size=1),
+           gen_key=st.integers(-60, 60))
+    def test_navigation(self, init_instance, gen_input, gen_key):
+        tree = init_instance(OrderedDict(gen_input))
+        keys = sorted(gen_input)
+        assert tree.min() == keys[0] and tree.max() == keys[-1]
+        expected = [
+            max((key for key in keys if key <= gen_key), default=None),
+            min((key for key in keys if key >= gen_key), default=None),
+            max((key for key in keys if key < gen_key), default=None),
+            min((key for key in keys if key > gen_key), default=None)]
+        methods = [tree.floor, tree.ceiling, tree.predecessor, tree.successor]
+        for method, expected_key in zip(methods, expected):
+            if expected_key is None:
+                with pytest.raises(KeyError):
+                    method(gen_key)
+            else:
+                assert method(gen_key) == expected_key
+
+    @given(gen_input=st.dictionaries(st.integers(-50, 50), st.integers()),
+           low=st.one_of(st.none(), st.integers(-60, 60)),
+           high=st.one_of(st.none(), st.integers(-60, 60)))
+    def test_irange(self, init_instance, gen_input, low, high):
+        tree = init_instance(OrderedDict(gen_input))
+        expected = [key for key in sorted(gen_input)
+                    if (low is None or key >= low)
+                    and (high is None or key <= high)]
+        assert list(tree.irange(low, high)) == expected
+
+    @given(gen_input=st.lists(st.tuples(st.integers(), st.integers())),
+           more_input=st.lists(st.tuples(st.integers(), st.integers())))
+    def test_sizes_after_update_and_setitem(self, init_instance, gen_input,
+                                            more_input):
+        tree = init_instance(OrderedDict())
+        tree.update(gen_input)
+        for key, item in more_input:
+            tree[key] = item
+        tree.update(sorted(more_input, reverse=True) + gen_input)
+        assert self._sizes_valid(tree._root)
+        assert len(tree) == len(dict(gen_input + more_input))
+
+    @given(gen_input=st.dictionaries(st.integers(-50, 50), st.integers()),
+           gen_key=st.integers(-60, 60),
+           gen_high=st.integers(-60, 60))
+    def test_rank_count_range(self, init_instance, gen_input, gen_key,
+                              gen_high):
+        tree = init_instance(OrderedDict(gen_input))
+        keys = sorted(gen_input)
+        assert tree.rank(gen_key) == len([key for key in keys
+                                          if key < gen_key])
+        assert tree.count_range(gen_key, gen_high) == \
+            len([key for key in keys if gen_key <= key <= gen_high])
+        assert tree.count_range(None, gen_high) == \
+            len([key for key in keys if key <= gen_high])
+        assert tree.count_range(gen_key) == \
+            len([key for key in keys if gen_key <= key])
+        assert tree.count_range() == len(keys)
+
+    @given(gen_input=st.dictionaries(st.integers(), st.integers(),
+                                     min_size=1))
+    def test_select(self, init_instance, gen_input):
+        tree = init_instance(OrderedDict(gen_input))
+        keys = sorted(gen_input)
+        for index in range(-len(keys), len(keys)):
+            assert tree.select(index) == keys[index]
+        for index in (len(keys), -len(keys) - 1):
+            with pytest.raises(IndexError):
+                tree.select(index)
+
+    def test_sizes_sorted_update(self, init_instance):
+        tree = init_instance(OrderedDict())
+        tree.update((key, key) for key in range(3000))
+        tree.update((key, key) for key in range(-1, -3000, -1))
+        assert tree._root.size == len(tree) == 5999
+        assert tree.select(3000) == 1 and tree.rank(0) == 2999
+
+    @given(gen_input=st.dictionaries(st.integers(), st.integers()))
+    def test_iter_orders(self, init_instance, gen_input):
+        tree = init_instance(OrderedDict(gen_input))
+        assert [node.key for node in tree.iter_preorder()] == \
+            self._preorder_keys(tree._root)
+        assert [node.key for node in tree.iter_postorder()] == \
+            self._postorder_keys(tree._root)
+        assert [node.key for node in tree.iter_breadth_first()] == \
+            tree.keys_as_list()
+
+    def test_nested_iteration(self, init_instance):
+        tree = init_instance(OrderedDict([(2, 'b'), (1, 'a'), (3, 'c')]))
+        pairs = [(outer.key, inner.key) for outer in tree for inner in tree]
+        assert len(pairs) == 9
+
+    def test_stats_shape(self, init_instance):
+        tree = init_instance(OrderedDict([(5, 'e'), (2, 'b'), (7, 'g'),
+                                          (1, 'a')]))
+        assert tree.stats() == {'size': 4, 'height': 3, 'average_depth': 1.0,
+                                'leaf_count': 2}
+        assert init_instance(OrderedDict()).stats() == {
+            'size': 0, 'height': 0, 'average_depth': 0.0, 'leaf_count': 0}
+
+    def test_instrumentation_counters_and_hook(self, init_instance):
+        tree = init_instance(OrderedDict([(5, 'e'), (2, 'b'), (7, 'g')]))
+        events = []
+        tree.enable_instrumentation(
+            hook=lambda *event: events.append(event))
+        tree[7]
+        assert 3 not in tree
+        tree[1] = 'a'
+        tree[5] = 'E'
+        stats = tree.stats()
+        assert stats['lookups'] == 2 and stats['inserts'] == 2
+        assert stats['node_hops'] == 2 + 2 + 2 + 1
+        assert stats['comparisons'] == 4 + 3 + 2 + 2
+        assert stats['depth_histogram'] == {1: 2}
+        assert events == [('lookup', 7, 1, 4), ('lookup', 3, 1, 3),
+                          ('insert', 1, 2, 2), ('insert', 5, 0, 2)]
+        assert tree.keys_as_tree() == [5, 2, 7, 1]
+
+        tree.disable_instrumentation()
+        tree[7]
+        assert 'lookups' not in tree.stats()
+        assert '_get_node' not in vars(tree)
+
+    @given(gen_input=st.lists(st.tuples(st.integers(), st.integers())))
+    def test_instrumented_same_tree(self, init_instance, gen_input):
+        tree = init_instance(OrderedDict())
+        tree.enable_instrumentation()
+        expected = init_instance(OrderedDict())
+        for key, item in gen_input:
+            tree[key] = item
+            expected[key] = item
+        assert tree == expected
+        assert all(tree[key] == expected[key] for key, _ in gen_input)
+        assert tree.stats()['lookups'] == len(gen_input)
+
+    def test_min_max_empty_exception(self, init_instance):
+        tree = init_instance(OrderedDict())
+        with pytest.raises(KeyError):
+            tree.min()
+        with pytest.raises(KeyError):
+            tree.max()
+
+    def test_hash_invalidated_on_setitem(self, init_instance):
+        tree = init_instance(OrderedDict([(2, 'b'), (1, 'a')]))
+        other = init_instance(OrderedDict([(2, 'b'), (1, 'a')]))
+        assert hash(tree) == hash(other)
+        tree[1] = 'z'
+        assert tree != other
+        assert hash(tree) == hash(init_instance(OrderedDict([(2, 'b'),
+                                                             (1, 'z')])))
+        tree.update([(3, 'c')])
+        assert tree == init_instance(OrderedDict([(2, 'b'), (1, 'z'),
+                                                  (3, 'c')]))
+
+    def test_eq_hash_collision(self, init_instance):
+        # hash(-1) == hash(-2) in CPython.
+        assert init_instance(OrderedDict([(1, -1)])) != \
+            init_instance(OrderedDict([(1, -2)]))
+        assert BinaryTree([-1]) != BinaryTree([-2])
+
+    @given(gen_input=st.dictionaries(st.integers(), st.integers()),
+           other_input=st.dictionaries(st.integers(), st.integers()))
+    def test_eq_same_as_tree_lists(self, init_instance, gen_input,
+                                   other_input):
+        tree = init_instance(OrderedDict(gen_input))
+        other = init_instance(OrderedDict(other_input))
+        assert (tree == other) is (
+            tree.keys_as_tree() == other.keys_as_tree()
+            and tree.items_as_tree() == other.items_as_tree())
+
+    def test_iter_as_tree(self, init_instance, get_test_as_tree_data):
+        inputs, expected = get_test_as_tree_data
+        tree = init_instance(inputs)
+        assert list(tree.iter_keys_as_tree()) == expected
+        assert list(tree.iter_items_as_tree()) == [
+            inputs[key] if key is not None else None for key in expected]
+
+    def test_as_tree_wide(self):
+        tree = BinarySearchTree.from_sorted(range(2 ** 16 - 2),
+                                            range(2 ** 16 - 2))
+        keys_as_tree = tree.keys_as_tree()
+        assert len(keys_as_tree) < 2 ** 16
+        assert [key for key in keys_as_tree if key is not None] == \
+            tree.keys_as_list()
+
     # def test_negative_cases(self):
     #     pass
-    #
-    # def test_del_node(self):
-    #     pass
 
+    @given(gen_input=st.dictionaries(st.integers(-50, 50), st.integers()),
+           gen_keys=st.lists(st.integers(-60, 60)))
+    def test_del_node(self, init_instance, gen_input, gen_keys):
+        tree = init_instance(OrderedDict(gen_input))
+        expected = dict(gen_input)
+        for key in gen_keys:
+            if key in expected:
+                del tree[key]
+                del expected[key]
+            else:
+                with pytest.raises(KeyError):
+                    del tree[key]
+            assert key not in tree
+        assert len(tree) == len(expected)
+        assert self._preorder_keys(tree._root) == \
+            [node.key for node in tree.iter_preorder()]
+        assert list(tree.irange()) == sorted(expected)
+        assert all(tree[key] == item for key, item in expected.items())
+        assert self._sizes_valid(tree._root)
+        assert self._parents_valid(tree._root)
+
+    def test_pop(self, init_instance):
+        tree = init_instance(OrderedDict([(2, 'b'), (1, 'a'), (3, 'c')]))
+        assert tree.pop(2) == 'b'
+        assert tree.pop(2, None) is None
+        with pytest.raises(KeyError):
+            tree.pop(2)
+        assert tree.keys_as_list() == [3, 1] and len(tree) == 2
+
+    @given(gen_input=st.dictionaries(st.integers(-50, 50), st.integers()),
+           low=st.integers(-60, 60),
+           high=st.integers(-60, 60))
+    def test_delete_range(self, init_instance, gen_input, low, high):
+        tree = init_instance(OrderedDict(gen_input))
+        expected = {key: item for key, item in gen_input.items()
+                    if not low <= key <= high}
+        assert tree.delete_range(low, high) == len(gen_input) - len(expected)
+        assert len(tree) == len(expected)
+        assert list(tree.irange()) == sorted(expected)
+        assert all(tree[key] == item for key, item in expected.items())
+        assert self._sizes_valid(tree._root)
+        assert self._parents_valid(tree._root)
+        tree[low] = 'new'
+        assert tree[low] == 'new' and self._is_valid_BST(tree)
+
+    @given(gen_input=st.dictionaries(st.integers(-50, 50), st.integers()),
+           gen_key=st.integers(-60, 60))
+    def test_split_join(self, init_instance, gen_input, gen_key):
+        tree = init_instance(OrderedDict(gen_input))
+        left, right = tree.split(gen_key)
+        assert len(tree) == 0 and list(tree.irange()) == []
+        assert list(left.irange()) == sorted(key for key in gen_input
+                                             if key < gen_key)
+        assert list(right.irange()) == sorted(key for key in gen_input
+                                              if key >= gen_key)
+        for part in (left, right):
+            assert len(part) == part._size_of(part._root)
+            assert self._sizes_valid(part._root)
+            assert self._parents_valid(part._root)
+        joined = BinarySearchTree.join(left, right)
+        assert len(left) == len(right) == 0
+        assert list(joined.irange()) == sorted(gen_input)
+        assert all(joined[key] == item for key, item in gen_input.items())
+        assert self._sizes_valid(joined._root)
+        assert self._parents_valid(joined._root)
+
+    def test_join_exceptions(self, init_instance):
+        low = init_instance(OrderedDict([(1, 'a'), (5, 'e')]))
+        high = init_instance(OrderedDict([(3, 'c')]))
+        with pytest.raises(ValueError):
+            BinarySearchTree.join(low, high)
+        with pytest.raises(ValueError):
+            BinarySearchTree.join(low, AVLTree(OrderedDict([(9, 'i')])))
+        assert BinarySearchTree.join(
+            low, init_instance(OrderedDict())).keys_as_list() == [1, 5]
+        low = init_instance(OrderedDict([(1, 'a'), (5, 'e')]))
+        keyed = BinarySearchTree(OrderedDict([(-9, 'i')]), key=abs)
+        with pytest.raises(ValueError):
+            BinarySearchTree.join(low, keyed)
+        assert len(keyed) == 1 and low.keys_as_list() == [1, 5]
+        left, right = keyed.split(5)
+        assert BinarySearchTree.join(left, right)[-9] == 'i'
+
+    @given(gen_input=st.dictionaries(st.integers(-50, 50), st.integers()),
+           other_input=st.dictionaries(st.integers(-50, 50), st.integers()))
+    def test_merge(self, init_instance, gen_input, other_input):
+        tree = init_instance(OrderedDict(gen_input))
+        other = AVLTree(OrderedDict(other_input))
+        merged = tree.merge(other)
+        expected = dict(gen_input)
+        expected.update(other_input)
+        assert type(merged) is BinarySearchTree
+        assert list(merged.irange()) == sorted(expected)
+        assert all(merged[key] == item for key, item in expected.items())
+        assert merged.keys_as_tree() == BinarySearchTree.from_sorted(
+            sorted(expected), [expected[key] for key in sorted(expected)]
+        ).keys_as_tree()
+        assert list(tree.irange()) == sorted(gen_input)
+        assert list(other.irange()) == sorted(other_input)
+        with pytest.raises(ValueError):
+            tree.merge(OrderedDict())
+
+    def _parents_valid(self, root):
+        # Root has no parent and every child links back to its parent.
+        if root is None:
+            return True
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for child in (node.left_child, node.right_child):
+                if child is not None:
+                    if child.parent is not node:
+                        return False
+                    stack.append(child)
+        return root.parent is None
+
+    def _preorder_keys(self, node):
+        if node is None:
+            return []
+        return ([node.key] + self._preorder_keys(node.left_child)
+                + self._preorder_keys(node.right_child))
+
+    def _postorder_keys(self, node):
+        if node is None:
+            return []
+        return (self._postorder_keys(node.left_child)
+                + self._postorder_keys(node.right_child) + [node.key])
+
+    def _sizes_valid(self, root):
+        # Every node size is one more than the sizes of its children.
+        stack = [root] if root is not None else []
+        while stack:
+            node = stack.pop()
+            children = [child for child in (node.left_child, node.right_child)
+                        if child is not None]
+            if node.size != 1 + sum(child.size for child in children):
+                return False
+            stack.extend(children)
+        return True
 
     def _is_valid_BST(self, bst):
         # Check each node's children based on node's parent values.
@@ -208,3 +716,940 @@ class TestBinarySearchTree:
             if node.right_child.key < node.key:
                 return False
         return True
+
+    @pytest.mark.parametrize('tree_class', [
+        BinarySearchTree, AVLTree, SplayTree, PersistentBinarySearchTree])
+    @given(gen_aggregate=st.sampled_from([('sum', sum), ('min', min),
+                                          ('max', max),
+                                          (operator.add, ''.join)]),
+           gen_input=st.dictionaries(st.integers(-50, 50),
+                                     st.integers(-100, 100)),
+           gen_operations=st.lists(st.tuples(st.booleans(),
+                                             st.integers(-60, 60),
+                                             st.integers(-100, 100))),
+           low=st.integers(-60, 60) | st.none(),
+           high=st.integers(-60, 60) | st.none())
+    def test_aggregate(self, tree_class, gen_aggregate, gen_input,
+                       gen_operations, low, high):
+        # Concatenation is associative but not commutative, so it checks
+        # the items are combined in key order.
+        aggregate, function = gen_aggregate
+        to_item = str if aggregate is operator.add else int
+
+        def expected_aggregate(keys):
+            items = [expected[key] for key in sorted(keys)]
+            return function(items) if items else None
+
+        tree = tree_class(OrderedDict(
+            (key, to_item(item)) for key, item in gen_input.items()),
+            aggregate=aggregate)
+        expected = {key: to_item(item) for key, item in gen_input.items()}
+        for is_set, key, item in gen_operations:
+            if is_set:
+                tree[key] = expected[key] = to_item(item)
+            else:
+                assert tree.pop(key, None) == expected.pop(key, None)
+        assert tree.aggregate(low, high) == expected_aggregate(
+            key for key in expected
+            if (low is None or low <= key) and (high is None or key <= high))
+
+        if low is not None and high is not None:
+            tree.delete_range(low, high)
+            left, right = tree.split(low)
+            assert left.aggregate() == expected_aggregate(
+                key for key in expected if key < low)
+            assert right.aggregate() == expected_aggregate(
+                key for key in expected if key > high and key >= low)
+
+    def test_aggregate_invalid(self):
+        with pytest.raises(ValueError):
+            BinarySearchTree(OrderedDict(), aggregate='median')
+        plain_tree = BinarySearchTree(OrderedDict([(1, 'a')]))
+        with pytest.raises(ValueError):
+            plain_tree.aggregate()
+        # Only trees with an aggregate pay for the slot.
+        assert not hasattr(plain_tree._root, 'aggregate')
+        tree = BinarySearchTree.from_sorted(range(10), range(10),
+                                            aggregate='max')
+        assert tree.merge(BinarySearchTree(OrderedDict([(20, -1)]))
+                          ).aggregate(5) == 9
+        assert tree.aggregate(20, default=0) == 0
+
+    @pytest.mark.parametrize('aggregate', [None, 'max'])
+    def test_join_aggregate_mismatch(self, aggregate):
+        left = AVLTree.from_sorted(range(10), range(10), aggregate='sum')
+        right = AVLTree.from_sorted(range(10, 30), range(10, 30),
+                                    aggregate=aggregate)
+        with pytest.raises(ValueError):
+            AVLTree.join(left, right)
+        with pytest.raises(ValueError):
+            AVLTree.join(AVLTree.from_sorted([-1], [-1],
+                                             aggregate=aggregate), left)
+        assert left.aggregate() == 45 and len(left) == 10
+        assert list(right.irange()) == list(range(10, 30))
+        assert left._root.parent is None and right._root.parent is None
+        if aggregate is not None:
+            assert right.aggregate() == 29
+
+    @pytest.mark.parametrize('tree_class', [BinarySearchTree, AVLTree,
+                                            IntervalTree])
+    def test_aggregate_pickle(self, tree_class):
+        keys = [(key, key + 2) for key in range(20)]
+        tree = tree_class.from_sorted(keys, range(20), aggregate='sum')
+        copy = pickle.loads(pickle.dumps(tree))
+        assert copy == tree and copy.aggregate() == 190
+        copy[(20, 22)] = 10
+        assert copy.aggregate() == 200 and tree.aggregate() == 190
+
+
+class TestAVLTree:
+    """Test for AVLTree Class."""
+
+    @pytest.mark.parametrize('keys', [list(range(1000)),
+                                      list(range(1000, 0, -1))],
+                             ids=['sorted', 'reverse sorted'])
+    def test_height_sorted_input(self, keys):
+        tree = AVLTree(OrderedDict((key, str(key)) for key in keys))
+        assert len(tree) == 1000
+        assert tree.height() <= 1.44 * math.log2(1000 + 2)
+        assert self._is_balanced(tree._root)
+
+    def test_rotations_3_nodes(self):
+        assert AVLTree(OrderedDict([(3, 'c'), (1, 'a'), (2, 'b')])
+                       ).keys_as_tree() == [2, 1, 3]
+        assert AVLTree(OrderedDict([(1, 'a'), (3, 'c'), (2, 'b')])
+                       ).keys_as_tree() == [2, 1, 3]
+
+    @given(gen_input=st.dictionaries(st.integers(), st.integers()))
+    def test_balanced_and_ordered(self, gen_input):
+        tree = AVLTree(OrderedDict(gen_input))
+        assert len(tree) == len(gen_input)
+        assert self._is_balanced(tree._root)
+        assert self._inorder_keys(tree._root) == sorted(gen_input)
+        for key, item in gen_input.items():
+            assert tree[key] == item
+
+    @given(gen_input=st.lists(st.tuples(st.integers(), st.integers())))
+    def test_update_balanced(self, gen_input):
+        tree = AVLTree(OrderedDict())
+        tree.update(gen_input)
+        assert self._is_balanced(tree._root)
+        assert self._inorder_keys(tree._root) == sorted(dict(gen_input))
+        assert len(tree) == len(dict(gen_input))
+
+    def test_from_sorted_then_insert(self):
+        tree = AVLTree.from_sorted(range(100), range(100))
+        assert self._is_balanced(tree._root)
+        for key in range(100, 200):
+            tree[key] = key
+        assert self._is_balanced(tree._root)
+        assert self._inorder_keys(tree._root) == list(range(200))
+
+    @given(gen_input=st.dictionaries(st.integers(), st.characters()))
+    def test_repr(self, gen_input):
+        tree = AVLTree(OrderedDict(gen_input))
+        assert repr(tree).startswith('AVLTree(')
+        assert eval(repr(tree)) == tree
+
+    @given(gen_input=st.dictionaries(st.integers(-50, 50), st.integers()),
+           gen_keys=st.lists(st.integers(-60, 60)))
+    def test_del_node_balanced(self, gen_input, gen_keys):
+        tree = AVLTree(OrderedDict(gen_input))
+        expected = dict(gen_input)
+        for key in gen_keys:
+            assert tree.pop(key, None) == expected.pop(key, None)
+            assert self._is_balanced(tree._root)
+        assert self._inorder_keys(tree._root) == sorted(expected)
+        assert len(tree) == len(expected)
+
+    @given(gen_input=st.dictionaries(st.integers(-500, 500), st.integers()),
+           low=st.integers(-600, 600),
+           high=st.integers(-600, 600))
+    def test_delete_range_balanced(self, gen_input, low, high):
+        tree = AVLTree(OrderedDict(gen_input))
+        expected = sorted(key for key in gen_input if not low <= key <= high)
+        tree.delete_range(low, high)
+        assert self._is_balanced(tree._root)
+        assert tree._root is None or tree._root.parent is None
+        assert self._inorder_keys(tree._root) == expected
+        assert len(tree) == len(expected)
+
+    def test_delete_range_large(self):
+        tree = AVLTree.from_sorted(range(10000), range(10000))
+        assert tree.delete_range(100, 9899) == 9800
+        assert self._is_balanced(tree._root)
+        assert tree.height() <= 1.44 * math.log2(200 + 2)
+        assert list(tree.irange(95, 9905)) == \
+            list(range(95, 100)) + list(range(9900, 9906))
+
+    @given(gen_input=st.dictionaries(st.integers(-500, 500), st.integers()),
+           gen_key=st.integers(-600, 600),
+           other_size=st.integers(0, 300))
+    def test_split_join_balanced(self, gen_input, gen_key, other_size):
+        left, right = AVLTree(OrderedDict(gen_input)).split(gen_key)
+        for part in (left, right):
+            assert self._is_balanced(part._root)
+            assert part._root is None or part._root.parent is None
+        assert self._inorder_keys(right._root) == \
+            sorted(key for key in gen_input if key >= gen_key)
+
+        # Join trees of very different heights.
+        other = AVLTree.from_sorted(range(1000, 1000 + other_size),
+                                    range(other_size))
+        joined = AVLTree.join(AVLTree.join(left, right), other)
+        assert self._is_balanced(joined._root)
+        assert joined._root is None or joined._root.parent is None
+        assert self._inorder_keys(joined._root) == \
+            sorted(gen_input) + list(range(1000, 1000 + other_size))
+        assert len(joined) == len(gen_input) + other_size
+
+    def _is_balanced(self, node, check_parents=True):
+        # Heights stored are correct, balanced and parent links consistent.
+        if node is None:
+            return True
+        left_height = node.left_child.height if node.left_child else 0
+        right_height = node.right_child.height if node.right_child else 0
+        for child in (node.left_child, node.right_child):
+            if (check_parents and child is not None
+                    and child.parent is not node):
+                return False
+        left_size = node.left_child.size if node.left_child else 0
+        right_size = node.right_child.size if node.right_child else 0
+        return (node.height == 1 + max(left_height, right_height)
+                and node.size == 1 + left_size + right_size
+                and abs(left_height - right_height) <= 1
+                and self._is_balanced(node.left_child, check_parents)
+                and self._is_balanced(node.right_child, check_parents))
+
+    def _inorder_keys(self, node):
+        if node is None:
+            return []
+        return (self._inorder_keys(node.left_child) + [node.key]
+                + self._inorder_keys(node.right_child))
+
+
+class TestSplayTree:
+    """Test for SplayTree Class."""
+
+    @given(gen_input=st.dictionaries(st.integers(-50, 50), st.integers()),
+           gen_keys=st.lists(st.integers(-60, 60)))
+    def test_lookups_splay_to_root(self, gen_input, gen_keys):
+        tree = SplayTree(OrderedDict(gen_input))
+        for key in gen_keys:
+            assert (key in tree) == (key in gen_input)
+            if key in gen_input:
+                assert tree[key] == gen_input[key]
+                assert tree._root.key == key
+            assert self._is_valid(tree)
+        assert list(tree.irange()) == sorted(gen_input)
+        assert len(tree) == len(gen_input)
+
+    @given(gen_input=st.lists(st.tuples(st.integers(), st.integers())))
+    def test_insert_splays_new_key(self, gen_input):
+        tree = SplayTree(OrderedDict())
+        for key, item in gen_input:
+            is_new = key not in tree
+            tree[key] = item
+            if is_new:
+                assert tree._root.key == key
+        assert self._is_valid(tree)
+        assert list(tree.irange()) == sorted(dict(gen_input))
+
+        updated = SplayTree(OrderedDict())
+        updated.update(gen_input)
+        assert self._is_valid(updated)
+        assert list(updated.irange()) == sorted(dict(gen_input))
+
+    def test_sorted_input_then_lookups(self):
+        tree = SplayTree(OrderedDict((key, key) for key in range(10000)))
+        assert tree.stats()['height'] == 10000
+        for key in range(0, 10000, 7):
+            assert tree[key] == key
+        assert self._is_valid(tree)
+        assert tree.stats()['height'] < 10000
+        assert tree.rank(5000) == 5000
+        assert tree.floor(5000.5) == 5000
+
+    @given(gen_input=st.dictionaries(st.integers(-500, 500), st.integers()),
+           gen_keys=st.lists(st.integers(-600, 600)),
+           low=st.integers(-600, 600),
+           high=st.integers(-600, 600))
+    def test_delete(self, gen_input, gen_keys, low, high):
+        tree = SplayTree(OrderedDict(gen_input))
+        expected = dict(gen_input)
+        for key in gen_keys:
+            assert tree.pop(key, None) == expected.pop(key, None)
+            assert self._is_valid(tree)
+        tree.delete_range(low, high)
+        assert self._is_valid(tree)
+        assert list(tree.irange()) == \
+            sorted(key for key in expected if not low <= key <= high)
+
+    @given(gen_input=st.dictionaries(st.integers(-500, 500), st.integers()),
+           gen_key=st.integers(-600, 600))
+    def test_split_join(self, gen_input, gen_key):
+        left, right = SplayTree(OrderedDict(gen_input)).split(gen_key)
+        assert self._is_valid(left) and self._is_valid(right)
+        assert list(right.irange()) == \
+            sorted(key for key in gen_input if key >= gen_key)
+        joined = SplayTree.join(left, right)
+        assert self._is_valid(joined)
+        assert list(joined.irange()) == sorted(gen_input)
+
+    def test_hot_key_hops(self):
+        tree = SplayTree(OrderedDict((key, key) for key in range(1000)))
+        tree.enable_instrumentation()
+        tree[0]
+        first_hops = tree.stats()['node_hops']
+        tree[0]
+        assert tree.stats()['node_hops'] == first_hops + 1
+        assert tree._root.key == 0
+        assert self._is_valid(tree)
+
+    def _is_valid(self, tree):
+        # Keys in order, sizes and parent links consistent, iteratively as
+        # splay trees can be as deep as they are large.
+        if tree._root is None:
+            return len(tree) == 0
+        if tree._root.parent is not None or tree._root.size != len(tree):
+            return False
+        keys = []
+        stack = [(tree._root, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                keys.append(node.key)
+                continue
+            left_size = node.left_child.size if node.left_child else 0
+            right_size = node.right_child.size if node.right_child else 0
+            if node.size != 1 + left_size + right_size:
+                return False
+            if node.right_child is not None:
+                if node.right_child.parent is not node:
+                    return False
+                stack.append((node.right_child, False))
+            stack.append((node, True))
+            if node.left_child is not None:
+                if node.left_child.parent is not node:
+                    return False
+                stack.append((node.left_child, False))
+        return keys == sorted(set(keys)) and len(keys) == len(tree)
+
+
+class TestIntervalTree:
+    """Test for IntervalTree Class."""
+
+    intervals = st.tuples(st.integers(0, 100), st.integers(0, 20)).map(
+        lambda pair: (pair[0], pair[0] + pair[1]))
+
+    @given(gen_input=st.dictionaries(intervals, st.integers()),
+           gen_deleted=st.lists(intervals),
+           low=st.integers(-5, 125),
+           length=st.integers(0, 30))
+    def test_overlapping(self, gen_input, gen_deleted, low, length):
+        tree = IntervalTree(OrderedDict())
+        for interval, item in gen_input.items():
+            tree[interval] = item
+        assert self._max_ends_valid(tree._root)
+        expected = dict(gen_input)
+        for interval in gen_deleted:
+            assert tree.pop(interval, None) == expected.pop(interval, None)
+        assert self._max_ends_valid(tree._root)
+
+        high = low + length
+        assert list(tree.overlapping(low, high)) == sorted(
+            (start, end) for start, end in expected
+            if start <= high and end >= low)
+        assert list(tree.stabbing(low)) == sorted(
+            (start, end) for start, end in expected if start <= low <= end)
+
+    @given(gen_input=st.dictionaries(intervals, st.integers()),
+           gen_key=intervals)
+    def test_bulk_and_split(self, gen_input, gen_key):
+        tree = IntervalTree.from_sorted(gen_input, gen_input.values(),
+                                        sort=True)
+        assert self._max_ends_valid(tree._root)
+        tree.update(OrderedDict([((200, 300), 'long')]))
+        assert list(tree.stabbing(250)) == [(200, 300)]
+        left, right = tree.split(gen_key)
+        assert self._max_ends_valid(left._root)
+        assert self._max_ends_valid(right._root)
+
+    def test_long_interval_in_left_subtree(self):
+        tree = IntervalTree(OrderedDict(((start, start + 1), start)
+                                        for start in range(100)))
+        tree[(-1, 1000)] = 'long'
+        assert list(tree.stabbing(500)) == [(-1, 1000)]
+        assert list(tree.stabbing(50)) == [(-1, 1000), (49, 50), (50, 51)]
+        del tree[(-1, 1000)]
+        assert list(tree.stabbing(500)) == []
+
+    @pytest.mark.parametrize('key', [(2, 1), 3, (1, 2, 3),
+                                     (float('nan'), 1)])
+    def test_invalid_interval(self, key):
+        tree = IntervalTree(OrderedDict())
+        with pytest.raises(ValueError):
+            tree[key] = 'a'
+        with pytest.raises(ValueError):
+            tree.update([(key, 'a')])
+        with pytest.raises(ValueError):
+            IntervalTree.from_sorted([key], ['a'])
+        assert len(tree) == 0
+
+    def test_key_function_checked_after(self):
+        def ordered(span):
+            return (min(span), max(span))
+
+        tree = IntervalTree(OrderedDict([((4, 1), 'a')]), key=ordered)
+        tree[(9, 5)] = 'b'
+        tree.update([((7, 6), 'c')])
+        assert list(tree.irange()) == [(1, 4), (5, 9), (6, 7)]
+        assert tree[(4, 1)] == 'a'
+        tree = IntervalTree.from_sorted([(4, 1), (9, 5)], 'ab', key=ordered)
+        assert list(tree.irange()) == [(1, 4), (5, 9)] and tree[(9, 5)] == 'b'
+
+        def reversed_span(span):
+            return span[::-1]
+
+        tree = IntervalTree(OrderedDict(), key=reversed_span)
+        with pytest.raises(ValueError):
+            tree[(1, 2)] = 'a'
+        with pytest.raises(ValueError):
+            tree.update([((1, 2), 'a')])
+        with pytest.raises(ValueError):
+            IntervalTree.from_sorted([(1, 2)], ['a'], key=reversed_span)
+        assert len(tree) == 0
+
+    def _max_ends_valid(self, node):
+        # Every node holds the largest end of its subtree.
+        if node is None:
+            return True
+        max_end = max([node.key[1]] + [
+            child.max_end for child in (node.left_child, node.right_child)
+            if child is not None])
+        return (node.max_end == max_end
+                and self._max_ends_valid(node.left_child)
+                and self._max_ends_valid(node.right_child))
+
+
+class TestArrayBinaryTree:
+    """Test for ArrayBinaryTree Class."""
+
+    @pytest.mark.parametrize('items', [[],
+                                       [1, 2, 3],
+                                       [1, None, 2, 3],
+                                       [5, 4, 7, 3, None, 2, None, -1, None, 9],
+                                       [5, 1, 4, None, None, 3, 6]])
+    def test_same_as_binary_tree(self, items):
+        tree = ArrayBinaryTree(items)
+        expected = BinaryTree(items)
+        assert tree.items_as_tree() == expected.items_as_tree()
+        assert tree.keys_as_list() == expected.keys_as_list()
+        assert len(tree) == len(expected)
+        assert ArrayBinaryTree.from_tree(expected) == tree
+        assert eval(repr(tree)) == tree
+
+    def test_iter_inorder(self):
+        items = [5, 4, 7, 3, None, 2, None, -1, None, 9]
+        tree = ArrayBinaryTree(items)
+        keys = tree._nodes.keys
+        assert ([keys[index] for index in tree.iter_inorder()]
+                == [node.key for node in BinaryTree(items).iter_inorder()])
+
+    def test_eq_structure(self):
+        assert ArrayBinaryTree([1, None, 2]) != ArrayBinaryTree([1, 2])
+        assert ArrayBinaryTree([1, 2]) == ArrayBinaryTree([1, 2])
+        assert ArrayBinaryTree([1, 2]) == BinaryTree([1, 2])
+
+    def test_iter_as_tree(self):
+        items = [5, 4, 7, 3, None, 2, None, -1, None, 9]
+        tree = ArrayBinaryTree(items)
+        assert list(tree.iter_items_as_tree()) == items
+        assert list(tree.iter_keys_as_tree()) == items
+
+    def test_iter_orders(self):
+        items = [5, 4, 7, 3, None, 2, None, -1, None, 9]
+        tree = ArrayBinaryTree(items)
+        expected = BinaryTree(items)
+        keys = tree._nodes.keys
+        for method in ('iter_preorder', 'iter_postorder',
+                       'iter_breadth_first'):
+            assert ([keys[index] for index in getattr(tree, method)()]
+                    == [node.key for node in getattr(expected, method)()])
+
+    def test_packed_keys(self):
+        tree = ArrayBinaryTree([1, None, 2, 3], key_typecode='q')
+        assert tree.keys_as_tree() == [1, None, 2, 3]
+
+    def test_init_not_iterable_exception(self):
+        with pytest.raises(ValueError):
+            ArrayBinaryTree(1)
+
+
+class TestArrayBinarySearchTree:
+    """Test for ArrayBinarySearchTree Class."""
+
+    def test_as_tree(self, get_test_as_tree_data):
+        inputs, expected = get_test_as_tree_data
+        assert ArrayBinarySearchTree(inputs).keys_as_tree() == expected
+
+    def test_items_as_tree(self, get_test_items_as_tree_data):
+        inputs, expected = get_test_items_as_tree_data
+        assert ArrayBinarySearchTree(inputs).items_as_tree() == expected
+
+    def test_as_list(self, get_test_as_list_data):
+        inputs, expected = get_test_as_list_data
+        assert ArrayBinarySearchTree(inputs).keys_as_list() == expected
+
+    @given(gen_input=st.lists(st.tuples(st.integers(-2 ** 63, 2 ** 63 - 1),
+                                        st.integers())))
+    def test_same_as_binary_search_tree(self, gen_input):
+        tree = ArrayBinarySearchTree(OrderedDict(), key_typecode='q')
+        expected = BinarySearchTree(OrderedDict())
+        for key, item in gen_input:
+            tree[key] = item
+            expected[key] = item
+        assert tree.keys_as_tree() == expected.keys_as_tree()
+        assert tree.items_as_tree() == expected.items_as_tree()
+        assert len(tree) == len(expected)
+        assert ArrayBinarySearchTree.from_tree(expected) == tree
+        for key, item in gen_input:
+            assert key in tree
+            assert tree[key] == dict(gen_input)[key]
+
+    @given(gen_input=st.dictionaries(st.integers(), st.characters()))
+    def test_repr(self, gen_input):
+        tree = ArrayBinarySearchTree(OrderedDict(gen_input))
+        assert eval(repr(tree)) == tree
+
+    def test_missing_key_exception(self):
+        tree = ArrayBinarySearchTree(OrderedDict([(1, None)]))
+        assert 1 in tree and 2 not in tree
+        with pytest.raises(KeyError):
+            tree[2]
+
+    @pytest.mark.parametrize('key_typecode', [None, 'd'])
+    def test_nan_lookup(self, key_typecode):
+        tree = ArrayBinarySearchTree(OrderedDict([(1, 'a'), (2, 'b')]),
+                                     key_typecode=key_typecode)
+        assert float('nan') not in tree
+        with pytest.raises(KeyError):
+            tree[float('nan')]
+
+    def test_string_keys(self):
+        tree = ArrayBinarySearchTree(OrderedDict([('b', 2), ('a', 1)]))
+        assert tree.keys_as_tree() == ['b', 'a'] and tree['a'] == 1
+        with pytest.raises(ValueError):
+            tree[float('nan')] = 'nan'
+        with pytest.raises(TypeError):
+            ArrayBinarySearchTree(OrderedDict([('a', 1)]), key_typecode='q')
+
+
+class TestThreadSafeBinarySearchTree:
+    """Test for ThreadSafeBinarySearchTree and ThreadSafeAVLTree Classes."""
+
+    @pytest.mark.parametrize('tree_class', [ThreadSafeBinarySearchTree,
+                                            ThreadSafeAVLTree])
+    def test_concurrent_readers_and_writer(self, tree_class):
+        tree = tree_class(OrderedDict((key, key) for key in range(0, 2000, 2)))
+        errors = []
+
+        def reader():
+            try:
+                for _ in range(20):
+                    keys = tree.keys_as_list()
+                    assert len(keys) == len(set(keys))
+                    assert all(tree[key] == key for key in range(0, 2000, 50))
+            except Exception as error:
+                errors.append(error)
+
+        def writer():
+            for key in range(1, 2000, 2):
+                tree[key] = key
+
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        assert len(tree) == 2000
+        assert list(tree.irange()) == list(range(2000))
+
+    def test_join_opposite_orders(self):
+        first = ThreadSafeAVLTree(OrderedDict())
+        second = ThreadSafeAVLTree(OrderedDict())
+
+        def joiner(left, right):
+            for _ in range(2000):
+                ThreadSafeAVLTree.join(left, right)
+
+        # Daemons, so a deadlock fails the test instead of hanging the run.
+        threads = [threading.Thread(target=joiner, args=(first, second),
+                                    daemon=True),
+                   threading.Thread(target=joiner, args=(second, first),
+                                    daemon=True)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        assert not any(thread.is_alive() for thread in threads)
+
+    def test_merge_read_locks_other(self):
+        tree = ThreadSafeAVLTree(OrderedDict([(1, 'a')]))
+        other = ThreadSafeAVLTree(OrderedDict([(2, 'b')]))
+        merged = []
+        with other.write_locked():
+            thread = threading.Thread(target=lambda: merged.append(
+                tree.merge(other)), daemon=True)
+            thread.start()
+            thread.join(timeout=0.2)
+            assert thread.is_alive() and not merged
+            other[3] = 'c'
+        thread.join()
+        assert list(merged[0].irange()) == [1, 2, 3]
+        assert list(tree.merge(AVLTree(OrderedDict([(0, 'z')]))).irange()) \
+            == [0, 1]
+
+    def test_eq_read_locks_other(self):
+        tree = ThreadSafeAVLTree(OrderedDict([(1, 'a')]))
+        other = ThreadSafeAVLTree(OrderedDict([(1, 'a')]))
+        results = []
+        with other.write_locked():
+            thread = threading.Thread(
+                target=lambda: results.append(tree == other), daemon=True)
+            thread.start()
+            thread.join(timeout=0.2)
+            assert thread.is_alive() and not results
+            other[1] = 'b'
+        thread.join()
+        assert results == [False]
+        assert tree == ThreadSafeAVLTree(OrderedDict([(1, 'a')]))
+        assert hash(tree) == hash(ThreadSafeAVLTree(OrderedDict([(1, 'a')])))
+
+    def test_split_join(self):
+        tree = ThreadSafeAVLTree(OrderedDict((key, key) for key in range(100)))
+        left, right = tree.split(50)
+        assert type(left) is type(right) is ThreadSafeAVLTree
+        assert left.max() == 49 and right.min() == 50
+        joined = ThreadSafeAVLTree.join(left, right)
+        assert list(joined.merge(left).irange()) == list(range(100))
+        assert list(joined.irange()) == list(range(100))
+
+    def test_balanced(self):
+        tree = ThreadSafeAVLTree(OrderedDict((key, key) for key in range(100)))
+        assert tree.height() <= 8
+        assert tree == ThreadSafeAVLTree(OrderedDict(
+            (key, key) for key in range(100)))
+
+
+class TestPersistentBinarySearchTree:
+    """Test for PersistentBinarySearchTree Class."""
+
+    @given(gen_input=st.lists(st.tuples(st.integers(-30, 30), st.integers())))
+    def test_snapshots_unchanged(self, gen_input):
+        tree = PersistentBinarySearchTree(OrderedDict())
+        snapshots, expected = [], {}
+        for key, item in gen_input:
+            snapshots.append((tree.snapshot(), dict(expected)))
+            tree[key] = item
+            expected[key] = item
+        snapshots.append((tree, expected))
+        for snapshot, expected in snapshots:
+            assert len(snapshot) == len(expected)
+            assert list(snapshot.irange()) == sorted(expected)
+            assert [node.item for node in snapshot.iter_inorder()] == \
+                [expected[key] for key in sorted(expected)]
+            assert all(snapshot[key] == item for key, item in expected.items())
+            assert TestAVLTree()._is_balanced(snapshot._root,
+                                              check_parents=False)
+
+    def test_snapshot_writes_fork(self):
+        tree = PersistentBinarySearchTree.from_sorted(range(50), range(50))
+        fork = tree.snapshot()
+        fork[100] = 'new'
+        fork[5] = 'five'
+        del fork[3]
+        fork.delete_range(10, 20)
+        left, right = fork.split(30)
+        fork = PersistentBinarySearchTree.join(left, right)
+        assert list(tree.irange()) == list(range(50))
+        assert [node.item for node in tree.iter_inorder()] == list(range(50))
+        assert len(fork) == 39 and fork[5] == 'five' and 3 not in fork
+        tree[3] = 'three'
+        assert 3 not in fork
+
+    def test_snapshot_of_instrumented_tree(self):
+        tree = PersistentBinarySearchTree.from_sorted(range(10), range(10))
+        tree.enable_instrumentation()
+        old = tree.snapshot()
+        tree[3] = 'new'
+        del tree[5]
+        lookups = tree.stats()['lookups']
+        assert old[3] == 3 and 5 in old
+        assert 'lookups' not in old.stats()
+        assert tree.stats()['lookups'] == lookups
+        assert tree[3] == 'new' and 5 not in tree
+        assert tree.stats()['lookups'] == lookups + 2
+
+    def test_path_copying_shares_nodes(self):
+        tree = PersistentBinarySearchTree.from_sorted(range(1024),
+                                                      range(1024))
+        old = tree.snapshot()
+        tree[2000] = 'new'
+        tree[512] = 'updated'
+        old_nodes = set(map(id, old.iter_preorder()))
+        new_nodes = [node for node in tree.iter_preorder()
+                     if id(node) not in old_nodes]
+        assert len(new_nodes) <= 4 * math.log2(1024)
+        assert old[512] == 512 and 2000 not in old
+        assert tree[512] == 'updated' and tree[2000] == 'new'
+
+    @given(gen_input=st.dictionaries(st.integers(-30, 30), st.integers()),
+           gen_keys=st.lists(st.integers(-30, 30)))
+    def test_delete_snapshots_unchanged(self, gen_input, gen_keys):
+        tree = PersistentBinarySearchTree(OrderedDict(gen_input))
+        old = tree.snapshot()
+        expected = dict(gen_input)
+        for key in gen_keys:
+            assert tree.pop(key, None) == expected.pop(key, None)
+        assert tree.delete_range(-5, 5) == \
+            len([key for key in expected if -5 <= key <= 5])
+        expected = {key: item for key, item in expected.items()
+                    if not -5 <= key <= 5}
+        assert len(tree) == len(expected)
+        assert list(tree.irange()) == sorted(expected)
+        assert list(old.irange()) == sorted(gen_input)
+        assert all(old[key] == item for key, item in gen_input.items())
+        assert TestAVLTree()._is_balanced(tree._root, check_parents=False)
+
+    @given(gen_input=st.dictionaries(st.integers(-100, 100), st.integers()),
+           gen_key=st.integers(-110, 110))
+    def test_split_join_snapshots_unchanged(self, gen_input, gen_key):
+        tree = PersistentBinarySearchTree(OrderedDict(gen_input))
+        old = tree.snapshot()
+        left, right = tree.split(gen_key)
+        joined = PersistentBinarySearchTree.join(left, right)
+        merged = old.merge(joined)
+        for part in (left, right, joined, merged):
+            assert TestAVLTree()._is_balanced(part._root,
+                                              check_parents=False)
+        assert list(joined.irange()) == list(merged.irange()) == \
+            list(old.irange()) == sorted(gen_input)
+        assert all(old[key] == item for key, item in gen_input.items())
+        assert all(joined[key] == item for key, item in gen_input.items())
+
+    @given(gen_input=st.dictionaries(st.integers(-50, 50), st.integers()),
+           low=st.one_of(st.none(), st.integers(-60, 60)),
+           high=st.one_of(st.none(), st.integers(-60, 60)))
+    def test_irange_postorder(self, gen_input, low, high):
+        tree = PersistentBinarySearchTree(OrderedDict(gen_input))
+        expected = AVLTree(OrderedDict(gen_input))
+        assert list(tree.irange(low, high)) == list(expected.irange(low, high))
+        assert [node.key for node in tree.iter_postorder()] == \
+            [node.key for node in expected.iter_postorder()]
+
+
+class TestFrozenBinarySearchTree:
+    """Test for FrozenBinarySearchTree Class."""
+
+    @given(gen_input=st.dictionaries(st.integers(-2 ** 40, 2 ** 40),
+                                     st.integers()),
+           gen_keys=st.lists(st.integers(-2 ** 40, 2 ** 40)))
+    def test_get_many(self, gen_input, gen_keys):
+        pytest.importorskip('numpy')
+        frozen = BinarySearchTree(OrderedDict(gen_input)).freeze()
+        keys = list(gen_input) + gen_keys
+        assert frozen.get_many(keys, default='missing') == \
+            [gen_input.get(key, 'missing') for key in keys]
+        assert frozen.contains_many(keys).tolist() == \
+            [key in gen_input for key in keys]
+        assert len(frozen) == len(gen_input)
+
+    @given(gen_input=st.dictionaries(st.floats(allow_nan=False), st.text(),
+                                     min_size=1))
+    def test_getitem_float_keys(self, gen_input):
+        pytest.importorskip('numpy')
+        frozen = AVLTree(OrderedDict(gen_input)).freeze()
+        for key, item in gen_input.items():
+            assert key in frozen
+            assert frozen[key] == item
+
+    def test_key_function(self):
+        pytest.importorskip('numpy')
+        frozen = AVLTree(OrderedDict([('b', 2), ('A', 1), ('c', 3)]),
+                         key=str.lower).freeze()
+        assert frozen.keys_as_tree() == ['b', 'a', 'c']
+        assert frozen['C'] == 3 and 'B' in frozen and 'd' not in frozen
+        assert frozen.get_many(['A', 'x', 'b']) == [1, None, 2]
+        assert frozen.contains_many(['C', 'D']).tolist() == [True, False]
+
+    @pytest.mark.parametrize('keys', [[(1, 2), (3, 4)], [(1, 2), (3,)]])
+    def test_tuple_keys(self, keys):
+        pytest.importorskip('numpy')
+        frozen = BinarySearchTree(OrderedDict(
+            zip(keys, range(len(keys))))).freeze()
+        assert frozen.get_many(keys + [(1,)]) == [0, 1, None]
+        assert keys[1] in frozen and (3, 5) not in frozen
+
+    @pytest.mark.parametrize('keys', [[1, 2, 2 ** 60 + 1],
+                                      [1, 2.5, 2 ** 60 + 1],
+                                      [0.5, 2.0 ** 60],
+                                      [-2 ** 63, 2 ** 63 - 1, 2 ** 64]])
+    @given(gen_keys=st.lists(st.one_of(
+        st.integers(-2 ** 65, 2 ** 65), st.floats(allow_nan=False),
+        st.sampled_from([2 ** 60, 2 ** 60 + 1, 2.0 ** 60, 2 ** 63, 2.5]))))
+    def test_mixed_int_float_batches(self, keys, gen_keys):
+        pytest.importorskip('numpy')
+        import numpy as np
+        expected = dict(zip(keys, 'abcd'))
+        frozen = AVLTree(OrderedDict(expected)).freeze()
+        batch = keys + gen_keys
+        assert frozen.get_many(batch) == [expected.get(key) for key in batch]
+        for key in batch:
+            assert frozen.get_many([key]) == [expected.get(key)]
+            assert (key in frozen) == (key in expected)
+        ints = [key for key in batch if isinstance(key, int)]
+        floats = [key for key in batch if isinstance(key, float)]
+        for array in (np.array([key for key in ints if abs(key) < 2 ** 63],
+                               dtype=np.int64),
+                      np.array([key for key in ints if abs(key) < 2 ** 31],
+                               dtype=np.int32),
+                      np.array(floats, dtype=np.float64),
+                      np.array([key for key in floats if abs(key) < 2 ** 100],
+                               dtype=np.float32)):
+            assert frozen.contains_many(array).tolist() == \
+                [key in expected for key in array.tolist()]
+
+    @pytest.mark.parametrize('size', [0, 1, 2, 7, 8, 100])
+    def test_level_order_layout(self, size):
+        pytest.importorskip('numpy')
+        frozen = BinarySearchTree.from_sorted(range(size), range(size)).freeze()
+        assert BinaryTree(frozen.keys_as_tree()).keys_as_tree() == \
+            frozen.keys_as_tree()
+        assert [node.key for node in BinaryTree(
+            frozen.keys_as_tree()).iter_inorder()] == list(range(size))
+        with pytest.raises(KeyError):
+            frozen[size]
+
+
+class TestBPlusTree:
+    """Test for BPlusTree Class."""
+
+    @given(gen_input=st.lists(st.tuples(st.integers(-100, 100),
+                                        st.integers())),
+           gen_keys=st.lists(st.integers(-110, 110)),
+           order=st.integers(3, 6))
+    def test_same_as_dict(self, gen_input, gen_keys, order):
+        tree = BPlusTree(OrderedDict(), order=order)
+        expected = {}
+        for key, item in gen_input:
+            tree[key] = item
+            expected[key] = item
+            assert tree[key] == item
+        self._assert_valid(tree, expected)
+        for key in gen_keys:
+            if key in expected:
+                assert tree.pop(key) == expected.pop(key)
+            else:
+                with pytest.raises(KeyError):
+                    del tree[key]
+            assert key not in tree
+        self._assert_valid(tree, expected)
+
+    @given(gen_input=st.dictionaries(st.integers(-50, 50), st.integers()),
+           gen_key=st.integers(-60, 60))
+    def test_navigation(self, gen_input, gen_key):
+        tree = BPlusTree(OrderedDict(gen_input), order=4)
+        expected = AVLTree(OrderedDict(gen_input))
+        for method in ('floor', 'ceiling', 'predecessor', 'successor'):
+            try:
+                result = getattr(expected, method)(gen_key)
+            except KeyError:
+                with pytest.raises(KeyError):
+                    getattr(tree, method)(gen_key)
+            else:
+                assert getattr(tree, method)(gen_key) == result
+        if gen_input:
+            assert (tree.min(), tree.max()) == (min(gen_input),
+                                                max(gen_input))
+
+    @given(gen_input=st.dictionaries(st.integers(-50, 50), st.integers()),
+           low=st.one_of(st.none(), st.integers(-60, 60)),
+           high=st.one_of(st.none(), st.integers(-60, 60)))
+    def test_irange_delete_range(self, gen_input, low, high):
+        tree = BPlusTree(OrderedDict(gen_input), order=3)
+        in_range = [key for key in sorted(gen_input)
+                    if (low is None or key >= low)
+                    and (high is None or key <= high)]
+        assert list(tree.irange(low, high)) == in_range
+        assert tree.delete_range(low, high) == len(in_range)
+        self._assert_valid(tree, {key: item for key, item in gen_input.items()
+                                  if key not in in_range})
+
+    @given(gen_input=st.dictionaries(st.integers(), st.integers()),
+           order=st.integers(3, 8))
+    def test_from_sorted(self, gen_input, order):
+        tree = BPlusTree.from_sorted(sorted(gen_input),
+                                     [gen_input[key] for key in
+                                      sorted(gen_input)], order=order)
+        self._assert_valid(tree, gen_input)
+        assert tree == BPlusTree(OrderedDict(gen_input))
+        assert hash(tree) == hash(BPlusTree(OrderedDict(gen_input)))
+
+    def test_sorted_inserts_height(self):
+        tree = BPlusTree(OrderedDict((key, key) for key in range(100000)),
+                         order=32)
+        assert tree.height() <= 1 + math.log(100000, 16)
+        self._assert_valid(tree, {key: key for key in range(100000)})
+        tree.delete_range(10, 99989)
+        assert list(tree) == list(range(10)) + list(range(99990, 100000))
+        assert tree.height() <= 2
+
+    @given(gen_input=st.dictionaries(st.integers(), st.characters()))
+    def test_repr(self, gen_input):
+        tree = BPlusTree(OrderedDict(gen_input))
+        assert eval(repr(tree)) == tree
+
+    def test_exceptions(self):
+        with pytest.raises(ValueError):
+            BPlusTree({1: 'a'})
+        with pytest.raises(ValueError):
+            BPlusTree(OrderedDict(), order=2)
+        tree = BPlusTree(OrderedDict())
+        with pytest.raises(ValueError):
+            tree[float('nan')] = 'a'
+        for method in (tree.min, tree.max):
+            with pytest.raises(KeyError):
+                method()
+        assert tree.pop(1, None) is None
+
+    def _assert_valid(self, tree, expected):
+        # Contents, fill, separators and equal leaf depths of the tree.
+        leaves = []
+
+        def check(node, low, high, depth):
+            assert node.keys == sorted(node.keys)
+            assert all((low is None or key >= low)
+                       and (high is None or key < high) for key in node.keys)
+            if node is not tree._root:
+                assert tree._min_fill <= len(node.children or node.keys)
+            if node.children is None:
+                assert len(node.keys) == len(node.items) <= tree._order
+                leaves.append((node, depth))
+                return
+            assert len(node.children) == len(node.keys) + 1 <= tree._order
+            bounds = [low] + node.keys + [high]
+            for index, child in enumerate(node.children):
+                check(child, bounds[index], bounds[index + 1], depth + 1)
+
+        check(tree._root, None, None, 0)
+        assert len({depth for _, depth in leaves}) == 1
+        for (leaf, _), (next_leaf, _) in zip(leaves, leaves[1:]):
+            assert leaf.next_leaf is next_leaf
+        assert leaves[-1][0].next_leaf is None
+        assert len(tree) == len(expected)
+        assert list(tree) == tree.keys_as_list() == sorted(expected)
+        assert tree.items_as_list() == [expected[key]
+                                        for key in sorted(expected)]
@@ -4,13 +4,179 @@ Classes
 -------
 BinaryTree - an immutable representation based on sequence of values.
 BinarySearchTree - binary search tree (unique keys and sort order)
+AVLTree - self-balancing binary search tree with O(log n) height.
+SplayTree - self-adjusting BST moving recently accessed keys to the root.
+IntervalTree - AVLTree of (start, end) intervals for overlap queries.
+ArrayBinaryTree - BinaryTree stored as struct of arrays instead of nodes.
+ArrayBinarySearchTree - BinarySearchTree stored as struct of arrays.
+ThreadSafeBinarySearchTree - BinarySearchTree guarded by a read/write lock.
+ThreadSafeAVLTree - AVLTree guarded by a read/write lock.
+PersistentBinarySearchTree - balanced BST with path copying and snapshots.
+FrozenBinarySearchTree - read only BST in level order arrays for batch lookups.
+BPlusTree - ordered map with many keys per node and chained leaves.
 """
 
+from bisect import bisect_left
+from bisect import bisect_right
+from collections import Counter
 from collections import deque
 from collections import OrderedDict
 from collections import Iterable
+from contextlib import contextmanager
+from contextlib import ExitStack
+import heapq
+from itertools import zip_longest
+from operator import add
+from operator import itemgetter
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from datastructures.locks import ReadWriteLock
+from datastructures.locks import with_read_lock
+from datastructures.locks import with_write_lock
+from datastructures.nodes import AggregateAVLTreeNode
+from datastructures.nodes import AggregateBinarySearchTreeNode
+from datastructures.nodes import AggregateIntervalTreeNode
+from datastructures.nodes import AVLTreeNode
+from datastructures.nodes import BinaryTreeArrays
 from datastructures.nodes import BinaryTreeNode
+from datastructures.nodes import BinarySearchTreeNode
+from datastructures.nodes import BPlusTreeNode
+from datastructures.nodes import IntervalTreeNode
+from datastructures.nodes import LazyBinaryTreeNode
+from datastructures.nodes import NULL_INDEX
+
+# Default of methods where None is a valid argument.
+_MISSING = object()
+# Named aggregates of BinarySearchTree, any associative function will do.
+AGGREGATES = {'sum': add, 'min': min, 'max': max}
+# Node class of trees with an aggregate by the node class of the tree.
+_AGGREGATE_NODE_CLASSES = {
+    BinarySearchTreeNode: AggregateBinarySearchTreeNode,
+    AVLTreeNode: AggregateAVLTreeNode,
+    IntervalTreeNode: AggregateIntervalTreeNode,
+}
+
+
+def _aggregate_node_class(node_class):
+    # Subclass of node_class with an aggregate slot, so nodes of trees
+    # without an aggregate do not carry it. Node classes defined outside
+    # nodes get one created once, which can not be pickled.
+    if node_class not in _AGGREGATE_NODE_CLASSES:
+        _AGGREGATE_NODE_CLASSES[node_class] = type(
+            'Aggregate' + node_class.__name__, (node_class,),
+            {'__slots__': ('aggregate',),
+             '__module__': node_class.__module__})
+    return _AGGREGATE_NODE_CLASSES[node_class]
+
+
+def _check_interval(key):
+    # Interval keys are (start, end) pairs with start <= end, which also
+    # rules out NaN ends.
+    if not (isinstance(key, tuple) and len(key) == 2 and key[0] <= key[1]):
+        raise ValueError('Keys must be (start, end) intervals with start <= '
+                         'end, not {!r}.'.format(key))
+    return key
+
+
+def _sorted_pairs(keys, items, sort):
+    # Lists of keys and items checked (or sorted) for a bulk load.
+    keys, items = list(keys), list(items)
+    if len(keys) != len(items):
+        raise ValueError('Must have the same number of keys and items.')
+    for key in keys:
+        _check_key(key)
+
+    if sort:
+        # Stable sort so the last of duplicate keys follows the others.
+        unique = _last_of_equal(keys, sorted(range(len(keys)),
+                                             key=keys.__getitem__))
+        keys = [keys[index] for index in unique]
+        items = [items[index] for index in unique]
+    elif any(keys[index] >= keys[index + 1]
+             for index in range(len(keys) - 1)):
+        raise ValueError('Keys must be unique and in ascending order.')
+    return keys, items
+
+
+def _last_of_equal(keys, order):
+    # Indexes of order, a stable sort of keys, without those followed by an
+    # equal key.
+    return [index for position, index in enumerate(order)
+            if position + 1 == len(order)
+            or keys[order[position + 1]] != keys[index]]
+
+
+def _check_key(key):
+    # Keys must be totally ordered, NaN compares false with everything so
+    # it could never be found again.
+    if key != key:
+        raise ValueError('Keys must be totally ordered, not {!r}.'.format(
+            key))
+
+
+@contextmanager
+def _locked_in_order(trees, write):
+    # Hold the locks of the thread safe trees among trees. Locks are always
+    # taken in id() order, so threads locking the same trees in another
+    # order can not deadlock.
+    trees = {id(tree): tree for tree in trees
+             if isinstance(tree, ThreadSafeBinarySearchTree)}
+    with ExitStack() as stack:
+        for tree_id in sorted(trees):
+            tree = trees[tree_id]
+            stack.enter_context(tree.write_locked() if write
+                                else tree.read_locked())
+        yield
+
+
+class _LevelOrderBuilder:
+    # Creates the nodes of a BinaryTree from items in level order, None for
+    # a missing node, reading only as far as requested. Parents wait in a
+    # queue in level order to read their two children.
+
+    __slots__ = ('tree', 'items', 'lazy', 'parents')
+
+    def __init__(self, tree, items, lazy):
+        self.tree = tree
+        self.items = items
+        self.lazy = lazy
+        self.parents = deque([])
+        for item in items:
+            # Root of tree.
+            tree._root = self._new_node(item, None)
+            break
+        if lazy and self.parents:
+            tree._builder = self
+
+    def _new_node(self, item, parent):
+        if self.lazy:
+            node = LazyBinaryTreeNode(item, item, parent, self)
+        else:
+            node = BinaryTreeNode(item, item, parent)
+        self.tree._size += 1
+        self.parents.append(node)
+        return node
+
+    def expand(self, node=None):
+        """Read children of the waiting parents up to node, or all."""
+        parents = self.parents
+        items = self.items
+        while parents and (node is None or node.builder is not None):
+            parent = parents.popleft()
+            if self.lazy:
+                parent.builder = None
+            left_item = next(items, None)
+            if left_item is not None:
+                parent.left_child = self._new_node(left_item, parent)
+            right_item = next(items, None)
+            if right_item is not None:
+                parent.right_child = self._new_node(right_item, parent)
+        if not parents:
+            self.tree._builder = None
 
 
 class BinaryTree:
@@ -22,10 +188,19 @@ class BinaryTree:
     Immutability due to lack of rules governing how nodes should be added
     to tree, which is left to other classes.
 
+    Items are read one at a time rather than copied up front, so any
+    iterator works as input. A lazy tree reads only as much of the input as
+    the nodes accessed so far need, reading the children of a node on the
+    first access of either, so it can be used before all input is read or
+    built from an unbounded iterator. len() and traversals of the whole
+    tree read all the input.
+
     Parameters
     ----------
     items : iterable
         Items to initialize the items of the nodes.
+    lazy : bool (optional)
+        Create nodes on first access instead of up front.
 
     Examples
     --------
@@ -40,47 +215,29 @@ class BinaryTree:
     [5, 4, 7, 3, None, 2, None, -1, None, 9]
     >>> BinaryTree([5, 1, 4, None, None, 3, 6]).items_as_tree()
     [5, 1, 4, None, None, 3, 6]
+    >>> from itertools import count, islice
+    >>> tree = BinaryTree(count(1), lazy=True)
+    >>> tree._root.left_child.right_child.item
+    5
+    >>> [node.item for node in islice(tree, 7)]
+    [1, 2, 3, 4, 5, 6, 7]
 
     """
 
-    def __init__(self, items):
+    # Reads the rest of the input of a lazy tree, None once all is read.
+    _builder = None
+
+    def __init__(self, items, lazy=False):
         if not isinstance(items, Iterable):
             raise ValueError('Must be initialized with Iterable.')
 
         self._size = 0
         self._root = None
+        self._hash = None
 
-        create_nodes_queue = deque(items)
-        assign_children_queue = deque([])
-        if create_nodes_queue:
-            # Root of tree.
-            item = create_nodes_queue.popleft()
-            new_node = BinaryTreeNode(item, item, None)
-            self._root = new_node
-            self._size += 1
-            assign_children_queue.append(new_node)
-
-            while create_nodes_queue:
-                parent = assign_children_queue.popleft()
-                if create_nodes_queue:
-                    left_item = create_nodes_queue.popleft()
-                    if left_item is not None:
-                        left_child = BinaryTreeNode(left_item,
-                                                    left_item,
-                                                    parent)
-                        parent.left_child = left_child
-                        self._size += 1
-                        assign_children_queue.append(left_child)
-
-                if create_nodes_queue:
-                    right_item = create_nodes_queue.popleft()
-                    if right_item is not None:
-                        right_child = BinaryTreeNode(right_item,
-                                                     right_item,
-                                                     parent)
-                        parent.right_child = right_child
-                        self._size += 1
-                        assign_children_queue.append(right_child)
+        builder = _LevelOrderBuilder(self, iter(items), lazy)
+        if not lazy:
+            builder.expand()
 
     def keys_as_list(self):
         """List of node keys in iter sequence."""
@@ -94,68 +251,189 @@ class BinaryTree:
         """List of node keys in iter sequence with None padding to preserve
         internal tree structure.
         """
-        return [node.key if node is not None else None
-                for node in self._nodes_as_tree()]
+        return list(self.iter_keys_as_tree())
 
     def items_as_tree(self):
         """List of node items in iter sequence with None padding to preserve
         internal tree structure.
         """
-        return [node.item if node is not None else None
-                for node in self._nodes_as_tree()]
+        return list(self.iter_items_as_tree())
+
+    def iter_keys_as_tree(self):
+        """Iterate node keys as in keys_as_tree without building a list."""
+        return (node.key if node is not None else None
+                for node in self._iter_nodes_as_tree())
 
-    def _nodes_as_tree(self):
-        # Traverse thru the tree until frontier is empty.
+    def iter_items_as_tree(self):
+        """Iterate node items as in items_as_tree without building a list."""
+        return (node.item if node is not None else None
+                for node in self._iter_nodes_as_tree())
+
+    def _iter_nodes_as_tree(self):
+        # Traverse thru the tree until only None padding is left in the
+        # frontier, counting the nodes pending keeps it linear.
         frontier = deque([])
-        if len(self) > 0:
+        if self._root is not None:
             frontier.append(self._root)
+        pending_nodes = len(frontier)
 
-        tree_padding_list = []
-        while frontier and not all(node is None for node in frontier):
+        while pending_nodes:
             # Popping off node indicates node visited.
             node = frontier.popleft()
-            tree_padding_list.append(node)
+            yield node
 
             if node is not None:
+                pending_nodes -= 1
+                for child in (node.left_child, node.right_child):
+                    frontier.append(child)
+                    if child is not None:
+                        pending_nodes += 1
+
+    def iter_inorder(self):
+        """Iterate nodes in order (left subtree, node, right subtree).
+
+        Walks parent links instead of keeping a stack, O(1) amortized per
+        node.
+        """
+        node = self._leftmost(self._root)
+        while node is not None:
+            yield node
+            node = self._next_inorder(node)
+
+    @staticmethod
+    def _leftmost(node):
+        while node is not None and node.left_child is not None:
+            node = node.left_child
+        return node
+
+    @staticmethod
+    def _rightmost(node):
+        while node is not None and node.right_child is not None:
+            node = node.right_child
+        return node
+
+    def _next_inorder(self, node):
+        # In order successor node via parent links, None if last.
+        if node.right_child is not None:
+            return self._leftmost(node.right_child)
+        while node.parent is not None and node.parent.right_child is node:
+            node = node.parent
+        return node.parent
+
+    def _prev_inorder(self, node):
+        # In order predecessor node via parent links, None if first.
+        if node.left_child is not None:
+            return self._rightmost(node.left_child)
+        while node.parent is not None and node.parent.left_child is node:
+            node = node.parent
+        return node.parent
+
+    def __iter__(self):
+        """Iterate nodes in breadth first sequence.
+
+        Each call returns an independent iterator, so nested loops and
+        concurrent readers do not interfere.
+        """
+        return self.iter_breadth_first()
+
+    def iter_breadth_first(self):
+        """Iterate nodes in breadth first sequence."""
+        frontier = deque([])
+        if self._root is not None:
+            frontier.append(self._root)
+        while frontier:
+            node = frontier.popleft()
+            if node.left_child is not None:
                 frontier.append(node.left_child)
+            if node.right_child is not None:
                 frontier.append(node.right_child)
-        return [node if node is not None else None
-                for node in tree_padding_list]
+            yield node
 
-    def __iter__(self):
-        self._frontier = deque([])
-        if len(self) > 0:
-            self._frontier.append(self._root)
-        return self
-
-    def __next__(self):
-        """Iterate in breadth first sequence."""
-
-        if self._frontier:
-            node = self._frontier.popleft()
-            if not node.is_leaf():
-                if node.left_child is not None:
-                    self._frontier.append(node.left_child)
-                if node.right_child is not None:
-                    self._frontier.append(node.right_child)
-            return node
-        else:
-            raise StopIteration
+    def iter_preorder(self):
+        """Iterate nodes in pre-order (node, left subtree, right subtree)."""
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.right_child is not None:
+                stack.append(node.right_child)
+            if node.left_child is not None:
+                stack.append(node.left_child)
+
+    def iter_postorder(self):
+        """Iterate nodes in post-order (left subtree, right subtree, node).
+
+        Walks parent links instead of keeping a stack.
+        """
+        node = self._first_postorder(self._root)
+        while node is not None:
+            yield node
+            parent = node.parent
+            if (parent is not None and parent.left_child is node
+                    and parent.right_child is not None):
+                node = self._first_postorder(parent.right_child)
+            else:
+                node = parent
+
+    @staticmethod
+    def _first_postorder(node):
+        # Deepest node reached by preferring left children.
+        while node is not None and not node.is_leaf():
+            if node.left_child is not None:
+                node = node.left_child
+            else:
+                node = node.right_child
+        return node
 
     def __bool__(self):
         """False if empty."""
+        if self._builder is not None:
+            # A lazy tree reads its root up front.
+            return self._root is not None
         return len(self) > 0
 
     def __len__(self) -> int:
         """Number of nodes in tree."""
+        if self._builder is not None:
+            self._builder.expand()
         return self._size
 
     def __hash__(self):
-        """Hash based on tree structure items."""
-        return hash(tuple(self.items_as_tree()))
+        """Hash based on tree structure items, computed once."""
+        if self._hash is None:
+            self._hash = hash(tuple(self.iter_items_as_tree()))
+        return self._hash
 
     def __eq__(self, other):
-        return isinstance(self, type(other)) and self.__hash__() == other.__hash__()
+        """Same tree structure and node data, stops at first difference."""
+        if self is other:
+            return True
+        if not isinstance(self, type(other)) or len(self) != len(other):
+            return False
+        if (self._hash is not None and other._hash is not None
+                and self._hash != other._hash):
+            return False
+        missing = object()
+        return all(value == other_value for value, other_value
+                   in zip_longest(self._walk(), other._walk(),
+                                  fillvalue=missing))
+
+    def _walk(self):
+        # Preorder node data with None for missing children, which is
+        # unique to the tree structure.
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                yield None
+            else:
+                yield self._node_data(node)
+                stack.append(node.right_child)
+                stack.append(node.left_child)
+
+    def _node_data(self, node):
+        # Data of node which takes part in equality.
+        return node.item
 
     def __repr__(self):
         # Can instantiate by copy and paste.
@@ -163,17 +441,36 @@ class BinaryTree:
 
 
 class BinarySearchTree(BinaryTree):
-    """A binary search tree created with unique numerical keys.
+    """A binary search tree created with unique comparable keys.
 
     Primarily used for fast search via key comparisons for a large tree. Tree
     representation is typically under the hood to the user.
 
     Order does matter in determining the structure of the tree.
 
+    Keys may be of any totally ordered type e.g. numbers, strings or tuples
+    of them, as long as all keys of a tree compare with each other. Node
+    keys are compared directly, so numeric keys run on the interpreter's
+    own int and float comparisons without any call per comparison.
+
     Parameters
     ----------
     dict_ : OrderedDict
         Key, item pairs to initialize the BST.
+    key : callable (optional)
+        Applied once to every key passed to the tree, as the key of sorted.
+        Nodes store and order by the results, so e.g. str.lower gives a
+        case insensitive tree with lower case keys.
+    aggregate : str or callable (optional)
+        'sum', 'min', 'max' or an associative function of two items,
+        maintained per subtree for O(log n) aggregate(low, high) queries on
+        balanced trees.
+
+    Raises
+    ------
+    ValueError
+        For a key which is not equal to itself, such as NaN, or an unknown
+        aggregate name.
 
     Examples
     --------
@@ -184,45 +481,294 @@ class BinarySearchTree(BinaryTree):
     [1, 2, 3]
     >>> tree.items_as_list()
     ['a', 'b', 'c']
+    >>> tree = BinarySearchTree(OrderedDict([('b', 1), ('A', 2)]),
+    ...                         key=str.lower)
+    >>> tree['B'], tree.keys_as_list()
+    (1, ['b', 'a'])
     """
 
-    def __init__(self, dict_):
+    _node_class = BinarySearchTreeNode
+    # Self-balancing trees must restore invariants after every insert,
+    # others may defer updating node data until the end of a bulk update.
+    _balanced = False
+    _key_function = None
+    _aggregate_function = None
+
+    def __init__(self, dict_, key=None, aggregate=None):
         if not isinstance(dict_, OrderedDict):
             raise ValueError('Must be initialized with OrderedDict.')
+        if isinstance(aggregate, str):
+            if aggregate not in AGGREGATES:
+                raise ValueError('Unknown aggregate {}, expected one of {} '
+                                 'or a function.'.format(
+                                     aggregate, ', '.join(AGGREGATES)))
+            aggregate = AGGREGATES[aggregate]
 
         super().__init__([])
+        self._key_function = key
+        if aggregate is not None:
+            self._aggregate_function = aggregate
+            self._node_class = _aggregate_node_class(self._node_class)
         if dict_:
-            for key, items in dict_.items():
-                self[key] = items
+            self.update(dict_)
+
+    @classmethod
+    def from_sorted(cls, keys, items, sort=False, key=None, aggregate=None):
+        """Build a perfectly balanced tree from keys in ascending order.
+
+        Linear time, nodes are created directly at their final position
+        without descending the tree per key.
+
+        Parameters
+        ----------
+        keys : iterable
+            Unique keys in strictly ascending order.
+        items : iterable
+            Items paired with keys.
+        sort : bool
+            Sort the pairs by key first, the last item wins for duplicate
+            keys. Costs O(n log n).
+        key : callable (optional)
+            As for the tree, applied to keys before checking their order.
+        aggregate : str or callable (optional)
+            As for the tree.
+
+        Raises
+        ------
+        ValueError
+            If keys and items differ in length, a key is NaN or keys are not
+            strictly ascending when sort is False.
+
+        Examples
+        --------
+        >>> tree = BinarySearchTree.from_sorted([1, 2, 3], ['a', 'b', 'c'])
+        >>> tree.keys_as_tree()
+        [2, 1, 3]
+        >>> BinarySearchTree.from_sorted([3, 1], ['c', 'a'], sort=True)
+        BinarySearchTree(OrderedDict([(3, 'c'), (1, 'a')]))
+        """
+        if key is not None:
+            keys = map(key, keys)
+        keys, items = _sorted_pairs(keys, items, sort)
+        tree = cls(OrderedDict(), key=key, aggregate=aggregate)
+        tree._root = tree._build_balanced(keys, items, 0, len(keys), None)
+        tree._size = len(keys)
+        return tree
+
+    def _build_balanced(self, keys, items, low, high, parent_node):
+        # Middle of keys[low:high] roots the subtree, recursion depth is
+        # only log n.
+        if low >= high:
+            return None
+        middle = (low + high) // 2
+        node = self._node_class(keys[middle], items[middle], parent_node)
+        node.left_child = self._build_balanced(keys, items, low, middle, node)
+        node.right_child = self._build_balanced(keys, items, middle + 1, high,
+                                                node)
+        self._update_node(node)
+        return node
+
+    def freeze(self):
+        """Read only copy laid out for vectorized batch lookups.
+
+        See FrozenBinarySearchTree, requires numpy.
+        """
+        return FrozenBinarySearchTree(self)
+
+    def update(self, pairs):
+        """Update or create node items from a mapping or (key, item) pairs.
+
+        Faster than setting keys one at a time when loading many pairs. Keys
+        beyond the current min / max key are attached directly to the min /
+        max node without descending the tree, so sorted input does not pay
+        for a descent per key.
+        """
+        if hasattr(pairs, 'items'):
+            pairs = pairs.items()
+        key_function = self._key_function
+        if key_function is not None:
+            pairs = ((key_function(key), item) for key, item in pairs)
+        self._update_keys(pairs)
+
+    def _update_keys(self, pairs):
+        # update of pairs whose keys already went thru the key function.
+        self._hash = None
+
+        min_node = max_node = self._root
+        while max_node is not None and max_node.right_child is not None:
+            max_node = max_node.right_child
+        while min_node is not None and min_node.left_child is not None:
+            min_node = min_node.left_child
+
+        # Appending to a sorted run would update every ancestor per key,
+        # which is O(n) each on an unbalanced tree, so defer to the end.
+        deferred_nodes = [] if not self._balanced else None
+        node_class = self._node_class
+        after_insert = self._after_insert
+        insert = self._insert
+        aggregating = self._aggregate_function is not None
+        for key, item in pairs:
+            if key != key:
+                _check_key(key)
+
+            # Min / max nodes never have a left / right child respectively.
+            if max_node is not None and key > max_node.key:
+                new_node = node_class(key, item, max_node)
+                max_node.right_child = new_node
+                max_node = new_node
+            elif min_node is not None and key < min_node.key:
+                new_node = node_class(key, item, min_node)
+                min_node.left_child = new_node
+                min_node = new_node
+            else:
+                new_node = insert(key, item)
+                if max_node is None:
+                    min_node = max_node = new_node
+                continue
+            self._size += 1
+            if deferred_nodes is not None:
+                deferred_nodes.append(new_node)
+                if aggregating:
+                    # Inserts between keys may retrace thru deferred nodes,
+                    # which are all recomputed at the end.
+                    new_node.aggregate = item
+            else:
+                after_insert(new_node)
+
+        if deferred_nodes:
+            self._update_paths(deferred_nodes)
 
     def _insert(self, key, item):
-        # Add a node to the BST if it does not already exist.
-        if key in self:
-            return
+        # Single descent which updates the node item if the key exists or
+        # else attaches a new leaf node. Returns the new node or None.
+        self._hash = None
+        parent_node = None
+        current_node = self._root
+        while current_node is not None:
+            if key < current_node.key:
+                parent_node = current_node
+                current_node = current_node.left_child
+            elif key > current_node.key:
+                parent_node = current_node
+                current_node = current_node.right_child
+            else:
+                current_node.item = item
+                if self._aggregate_function is not None:
+                    self._update_path(current_node)
+                return None
+        return self._attach_leaf(parent_node, key, item)
 
-        # Attach new node to appropriate existing node.
-        if len(self) > 0:
-            parent_node = self._get_insert_loc(self._root, key)
-            self._add_edge(parent_node, key, item)
-        elif len(self) == 0:
-            self._root = BinaryTreeNode(key, item, None)
+    def _attach_leaf(self, parent_node, key, item):
+        # Add a new leaf node for key under parent_node found by a descent.
+        new_node = self._node_class(key, item, parent_node)
+        if parent_node is None:
+            self._root = new_node
+        elif key < parent_node.key:
+            parent_node.left_child = new_node
         else:
-            raise AttributeError('Length less than 0.')
+            parent_node.right_child = new_node
         self._size += 1
+        self._after_insert(new_node)
+        return new_node
 
-    def _get_insert_loc(self, current_node, key):
-        # Traverse the tree from root and get the appropriate parent to
-        # for this node.
-        if key < current_node.key:
-            if current_node.left_child is not None:
-                return self._get_insert_loc(current_node.left_child, key)
+    def _after_insert(self, node):
+        # Hook for subclasses to restore invariants after a new leaf node.
+        if (type(self)._update_node is BinarySearchTree._update_node
+                and self._aggregate_function is None):
+            # Only sizes change, each ancestor gained one node.
+            node = node.parent
+            while node is not None:
+                node.size += 1
+                node = node.parent
         else:
-            if current_node.right_child is not None:
-                return self._get_insert_loc(current_node.right_child, key)
-        return current_node
+            self._update_path(node)
+
+    def _update_node(self, node):
+        # Hook for subclasses to recompute per node data from its children.
+        left_child, right_child = node.left_child, node.right_child
+        node.size = (1 + self._size_of(left_child)
+                     + self._size_of(right_child))
+        function = self._aggregate_function
+        if function is not None:
+            # In key order, the function need not be commutative.
+            aggregate = node.item
+            if left_child is not None:
+                aggregate = function(left_child.aggregate, aggregate)
+            if right_child is not None:
+                aggregate = function(aggregate, right_child.aggregate)
+            node.aggregate = aggregate
+
+    @staticmethod
+    def _size_of(node):
+        return node.size if node is not None else 0
+
+    def _update_path(self, node):
+        # Recompute node data from node up to the root.
+        while node is not None:
+            self._update_node(node)
+            node = node.parent
+
+    def _update_paths(self, nodes):
+        # Recompute node data of nodes and all their ancestors once each,
+        # children before parents.
+        stale_nodes = set()
+        for node in nodes:
+            while node is not None and node not in stale_nodes:
+                stale_nodes.add(node)
+                node = node.parent
+
+        preorder = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            preorder.append(node)
+            for child in (node.left_child, node.right_child):
+                if child in stale_nodes:
+                    stack.append(child)
+        for node in reversed(preorder):
+            self._update_node(node)
+
+    def _replace_child(self, parent_node, old_child, new_child):
+        # Point parent (or root) at new_child in place of old_child.
+        if parent_node is None:
+            self._root = new_child
+        elif parent_node.left_child is old_child:
+            parent_node.left_child = new_child
+        else:
+            parent_node.right_child = new_child
+        if new_child is not None:
+            new_child.parent = parent_node
+
+    def _rotate_left(self, node):
+        # Right child of node takes its place, returns the new subtree root.
+        pivot = node.right_child
+        node.right_child = pivot.left_child
+        if pivot.left_child is not None:
+            pivot.left_child.parent = node
+        self._replace_child(node.parent, node, pivot)
+        pivot.left_child = node
+        node.parent = pivot
+        self._update_node(node)
+        self._update_node(pivot)
+        return pivot
+
+    def _rotate_right(self, node):
+        # Left child of node takes its place, returns the new subtree root.
+        pivot = node.left_child
+        node.left_child = pivot.right_child
+        if pivot.right_child is not None:
+            pivot.right_child.parent = node
+        self._replace_child(node.parent, node, pivot)
+        pivot.right_child = node
+        node.parent = pivot
+        self._update_node(node)
+        self._update_node(pivot)
+        return pivot
 
     def __getitem__(self, key):
         """Get node by key."""
+        if self._key_function is not None:
+            key = self._key_function(key)
         node = self._get_node(key)
         if node is not None:
             return node.item
@@ -230,24 +776,649 @@ class BinarySearchTree(BinaryTree):
 
     def __contains__(self, key):
         """Contains node key."""
-        try:
-            return self[key] is not None
-        except KeyError:
-            return False
+        if self._key_function is not None:
+            key = self._key_function(key)
+        return self._get_node(key) is not None
 
     def __missing__(self, key):
         raise KeyError('{}'.format(key))
 
     def __setitem__(self, key, item):
         """Update or create node item by key.  """
-        if not isinstance(key, (int, float)):
-            raise ValueError('Keys can only be ints or floats.')
+        if self._key_function is not None:
+            key = self._key_function(key)
+        if key != key:
+            _check_key(key)
 
+        self._insert(key, item)
+
+    def __delitem__(self, key):
+        """Delete node by key."""
+        if self._key_function is not None:
+            key = self._key_function(key)
         node = self._get_node(key)
-        if node is not None:
-            node.item = item
+        if node is None:
+            self.__missing__(key)
+        self._delete_node(node)
+
+    def pop(self, key, default=_MISSING):
+        """Delete node by key and return its item.
+
+        Returns default if given and the key is missing, else KeyError.
+        """
+        if self._key_function is not None:
+            key = self._key_function(key)
+        node = self._get_node(key)
+        if node is None:
+            if default is _MISSING:
+                self.__missing__(key)
+            return default
+        self._delete_node(node)
+        return node.item
+
+    def delete_range(self, low, high):
+        """Delete keys from low to high inclusive, returns how many.
+
+        Splits the tree around low and high and joins the outer parts, so k
+        deleted keys cost O(k + log n) on an AVL tree (O(k + height) for an
+        unbalanced tree) instead of a descent per key.
+
+        Examples
+        --------
+        >>> tree = AVLTree(OrderedDict((key, str(key)) for key in range(7)))
+        >>> tree.delete_range(2, 4)
+        3
+        >>> list(tree.irange()), len(tree)
+        ([0, 1, 5, 6], 4)
+        """
+        low, high = self._bounds(low, high)
+        if self._root is None or low > high:
+            return 0
+        self._hash = None
+        left, low_node, rest = self._split(self._root, low)
+        middle, high_node, right = self._split(rest, high)
+        deleted = (self._size_of(middle) + (low_node is not None)
+                   + (high_node is not None))
+        self._root = self._join_trees(left, right)
+        self._size -= deleted
+        return deleted
+
+    def split(self, key):
+        """Split into a tree of keys < key and a tree of keys >= key.
+
+        Moves the nodes instead of copying them, so this tree is left empty.
+        O(log n) for an AVL tree, O(height) otherwise.
+
+        Examples
+        --------
+        >>> tree = AVLTree(OrderedDict((key, str(key)) for key in range(6)))
+        >>> left, right = tree.split(3)
+        >>> list(left.irange()), list(right.irange()), len(tree)
+        ([0, 1, 2], [3, 4, 5], 0)
+        """
+        if self._key_function is not None:
+            key = self._key_function(key)
+        left, found_node, right = self._split(self._root, key)
+        if found_node is not None:
+            right = self._join(None, found_node, right)
+        trees = self._tree_of(left), self._tree_of(right)
+        self._root = None
+        self._size = 0
+        self._hash = None
+        return trees
+
+    @classmethod
+    def join(cls, left, right):
+        """Tree of the keys of left and right, where left keys < right keys.
+
+        Moves the nodes instead of copying them, so left and right are left
+        empty. O(log n) for AVL trees, O(height) otherwise.
+
+        Raises
+        ------
+        ValueError
+            If left and right are not both of this class, have different
+            key or aggregate functions or their key ranges overlap.
+
+        Examples
+        --------
+        >>> left = AVLTree(OrderedDict([(1, 'a'), (2, 'b')]))
+        >>> right = AVLTree(OrderedDict([(5, 'e')]))
+        >>> AVLTree.join(left, right)
+        AVLTree(OrderedDict([(2, 'b'), (1, 'a'), (5, 'e')]))
+        """
+        if type(left) is not cls or type(right) is not cls:
+            raise ValueError('Can only join two {} trees.'.format(
+                cls.__name__))
+        # Keys of right would be read with the key function of left.
+        if left._key_function != right._key_function:
+            raise ValueError('Can only join trees with the same key '
+                             'function.')
+        # Nodes of right would keep aggregates of another function, or none.
+        if left._aggregate_function != right._aggregate_function:
+            raise ValueError('Can only join trees with the same aggregate '
+                             'function.')
+        if left and right and not left.max() < right.min():
+            raise ValueError('Keys of left must be less than keys of right.')
+
+        tree = left._tree_of(left._join_trees(left._root, right._root))
+        for joined_tree in (left, right):
+            joined_tree._root = None
+            joined_tree._size = 0
+            joined_tree._hash = None
+        return tree
+
+    def merge(self, other):
+        """New balanced tree of the keys of this tree and other.
+
+        Merges the two in order streams and builds with from_sorted, O(n + m)
+        for any overlap of keys. Items of other win for keys in both, as in
+        update. Neither tree is changed. Keys of other are taken as stored,
+        the new tree applies the key function of this tree from then on.
+
+        Examples
+        --------
+        >>> tree = BinarySearchTree(OrderedDict([(1, 'a'), (3, 'c')]))
+        >>> other = AVLTree(OrderedDict([(3, 'z'), (2, 'b')]))
+        >>> tree.merge(other)
+        BinarySearchTree(OrderedDict([(2, 'b'), (1, 'a'), (3, 'z')]))
+        """
+        if not isinstance(other, BinarySearchTree):
+            raise ValueError('Can only merge with a BinarySearchTree.')
+
+        keys, items = [], []
+        # Stable, so the pair of other follows the pair of self on ties.
+        for key, item in heapq.merge(self._iter_pairs(), other._iter_pairs(),
+                                     key=itemgetter(0)):
+            if keys and keys[-1] == key:
+                items[-1] = item
+            else:
+                keys.append(key)
+                items.append(item)
+        tree = self.__class__.from_sorted(
+            keys, items, aggregate=self._aggregate_function)
+        tree._key_function = self._key_function
+        return tree
+
+    def _iter_pairs(self):
+        return ((node.key, node.item) for node in self.iter_inorder())
+
+    def _tree_of(self, root):
+        # Empty tree of this class adopting the subtree at root.
+        tree = self.__class__(OrderedDict(), key=self._key_function,
+                              aggregate=self._aggregate_function)
+        tree._root = root
+        tree._size = self._size_of(root)
+        return tree
+
+    def _delete_node(self, node):
+        # Unlink node, a node with two children is replaced by its in order
+        # successor. Retraces from the lowest node whose subtree changed.
+        self._hash = None
+        if node.left_child is None:
+            retrace_node = node.parent
+            self._replace_child(node.parent, node, node.right_child)
+        elif node.right_child is None:
+            retrace_node = node.parent
+            self._replace_child(node.parent, node, node.left_child)
+        else:
+            successor = self._leftmost(node.right_child)
+            if successor.parent is node:
+                retrace_node = successor
+            else:
+                retrace_node = successor.parent
+                self._replace_child(successor.parent, successor,
+                                    successor.right_child)
+                successor.right_child = node.right_child
+                successor.right_child.parent = successor
+            self._replace_child(node.parent, node, successor)
+            successor.left_child = node.left_child
+            successor.left_child.parent = successor
+        node.parent = node.left_child = node.right_child = None
+        self._size -= 1
+        self._after_delete(retrace_node)
+
+    def _after_delete(self, node):
+        # Hook for subclasses to restore invariants from node up to the root
+        # after a node was unlinked below it.
+        self._update_path(node)
+
+    def _split(self, node, key):
+        # Split the subtree rooted at node into the subtrees of keys < key
+        # and keys > key plus the node with key (or None). Returned roots
+        # have no parent.
+        path = []
+        found_node = left = right = None
+        while node is not None:
+            if key < node.key:
+                path.append(node)
+                node = node.left_child
+            elif key > node.key:
+                path.append(node)
+                node = node.right_child
+            else:
+                found_node = node
+                left, right = node.left_child, node.right_child
+                node.parent = node.left_child = node.right_child = None
+                break
+
+        # Bottom up, each node on the path joins its untouched subtree onto
+        # the side of the split it belongs to.
+        for node in reversed(path):
+            if key < node.key:
+                right = self._join(right, node, node.right_child)
+            else:
+                left = self._join(node.left_child, node, left)
+        for root in (left, right):
+            if root is not None:
+                root.parent = None
+        return left, found_node, right
+
+    def _join(self, left, node, right):
+        # Root of a tree of left subtree, node and right subtree whose keys
+        # are in that order. Either subtree may be None.
+        node.parent = None
+        node.left_child = left
+        node.right_child = right
+        if left is not None:
+            left.parent = node
+        if right is not None:
+            right.parent = node
+        self._update_node(node)
+        return node
+
+    def _join_trees(self, left, right):
+        # Root of a tree of the left and right subtrees, every key in left
+        # less than every key in right.
+        if left is None:
+            return right
+        if right is None:
+            return left
+        left, max_node, _ = self._split(left, self._rightmost(left).key)
+        return self._join(left, max_node, right)
+
+    def min(self):
+        """Smallest key, KeyError if empty."""
+        if self._root is None:
+            raise KeyError('min of empty tree')
+        return self._leftmost(self._root).key
+
+    def max(self):
+        """Largest key, KeyError if empty."""
+        if self._root is None:
+            raise KeyError('max of empty tree')
+        return self._rightmost(self._root).key
+
+    def floor(self, key):
+        """Largest key <= key, KeyError if there is none."""
+        if self._key_function is not None:
+            key = self._key_function(key)
+        return self._key_or_missing(self._floor_node(key, False), key)
+
+    def ceiling(self, key):
+        """Smallest key >= key, KeyError if there is none."""
+        if self._key_function is not None:
+            key = self._key_function(key)
+        return self._key_or_missing(self._ceiling_node(key, False), key)
+
+    def predecessor(self, key):
+        """Largest key < key, KeyError if there is none."""
+        if self._key_function is not None:
+            key = self._key_function(key)
+        return self._key_or_missing(self._floor_node(key, True), key)
+
+    def successor(self, key):
+        """Smallest key > key, KeyError if there is none."""
+        if self._key_function is not None:
+            key = self._key_function(key)
+        return self._key_or_missing(self._ceiling_node(key, True), key)
+
+    def irange(self, low=None, high=None):
+        """Lazily iterate keys in order from low to high inclusive.
+
+        None leaves that end unbounded. Visits O(log n + k) nodes for k
+        keys in range.
+
+        Examples
+        --------
+        >>> tree = BinarySearchTree(OrderedDict([(5, 'e'), (2, 'b'), (7, 'g')]))
+        >>> list(tree.irange(2, 6))
+        [2, 5]
+        >>> list(tree.irange())
+        [2, 5, 7]
+        """
+        low, high = self._bounds(low, high)
+        if low is None:
+            node = self._leftmost(self._root)
         else:
-            self._insert(key, item)
+            node = self._ceiling_node(low, False)
+        while node is not None and (high is None or not node.key > high):
+            yield node.key
+            node = self._next_inorder(node)
+
+    def rank(self, key):
+        """Number of keys < key.
+
+        Examples
+        --------
+        >>> tree = BinarySearchTree(OrderedDict([(5, 'e'), (2, 'b'), (7, 'g')]))
+        >>> tree.rank(5), tree.rank(6)
+        (1, 2)
+        """
+        if self._key_function is not None:
+            key = self._key_function(key)
+        return self._count_before(key, False)
+
+    def select(self, index):
+        """Key at position index in sorted order, negative counts from end.
+
+        Examples
+        --------
+        >>> tree = BinarySearchTree(OrderedDict([(5, 'e'), (2, 'b'), (7, 'g')]))
+        >>> tree.select(0), tree.select(-1)
+        (2, 7)
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('Tree index out of range.')
+
+        current_node = self._root
+        while True:
+            left_size = self._size_of(current_node.left_child)
+            if index < left_size:
+                current_node = current_node.left_child
+            elif index > left_size:
+                index -= left_size + 1
+                current_node = current_node.right_child
+            else:
+                return current_node.key
+
+    def count_range(self, low=None, high=None):
+        """Number of keys from low to high inclusive.
+
+        None leaves that end unbounded, like irange.
+
+        Examples
+        --------
+        >>> tree = BinarySearchTree(OrderedDict([(5, 'e'), (2, 'b'), (7, 'g')]))
+        >>> tree.count_range(2, 6), tree.count_range(None, 5)
+        (2, 2)
+        """
+        low, high = self._bounds(low, high)
+        below_high = (len(self) if high is None
+                      else self._count_before(high, True))
+        below_low = 0 if low is None else self._count_before(low, False)
+        return max(0, below_high - below_low)
+
+    def aggregate(self, low=None, high=None, default=None):
+        """Aggregate of the items of keys from low to high inclusive.
+
+        Combines the items in key order with the aggregate function the
+        tree was built with, reusing the aggregates of whole subtrees so it
+        visits O(log n) nodes on a balanced tree. None leaves that end
+        unbounded.
+
+        Returns
+        -------
+        Any
+            The aggregate, or default if no key is in range.
+
+        Raises
+        ------
+        ValueError
+            If the tree was built without an aggregate.
+
+        Examples
+        --------
+        >>> tree = AVLTree(OrderedDict((key, key * 10) for key in range(8)),
+        ...                aggregate='sum')
+        >>> tree.aggregate(2, 4), tree.aggregate(), tree.aggregate(9, 12)
+        (90, 280, None)
+        >>> tree[3] = 0
+        >>> tree.aggregate(2, 4)
+        60
+        """
+        function = self._aggregate_function
+        if function is None:
+            raise ValueError('Tree was built without an aggregate.')
+        low, high = self._bounds(low, high)
+
+        # Highest node in range, every other node in range is below it.
+        split_node = self._root
+        while split_node is not None:
+            if high is not None and split_node.key > high:
+                split_node = split_node.left_child
+            elif low is not None and split_node.key < low:
+                split_node = split_node.right_child
+            else:
+                break
+        if split_node is None:
+            return default
+
+        # Nodes in range on the path to low, each with its right subtree,
+        # are found from right to left and nodes on the path to high, each
+        # with its left subtree, from left to right.
+        left_parts = []
+        node = split_node.left_child
+        while node is not None:
+            if low is not None and node.key < low:
+                node = node.right_child
+                continue
+            if low is None:
+                left_parts.append(node.aggregate)
+                break
+            if node.right_child is not None:
+                left_parts.append(node.right_child.aggregate)
+            left_parts.append(node.item)
+            node = node.left_child
+        right_parts = []
+        node = split_node.right_child
+        while node is not None:
+            if high is not None and node.key > high:
+                node = node.left_child
+                continue
+            if high is None:
+                right_parts.append(node.aggregate)
+                break
+            if node.left_child is not None:
+                right_parts.append(node.left_child.aggregate)
+            right_parts.append(node.item)
+            node = node.right_child
+
+        aggregate = split_node.item
+        for part in left_parts:
+            aggregate = function(part, aggregate)
+        for part in right_parts:
+            aggregate = function(aggregate, part)
+        return aggregate
+
+    def _bounds(self, low, high):
+        # Range bounds passed thru the key function, None stays unbounded.
+        key_function = self._key_function
+        if key_function is None:
+            return low, high
+        return (key_function(low) if low is not None else None,
+                key_function(high) if high is not None else None)
+
+    def _count_before(self, key, inclusive):
+        # Number of keys < key (<= key if inclusive), single descent.
+        count = 0
+        current_node = self._root
+        while current_node is not None:
+            if current_node.key < key or (inclusive
+                                          and current_node.key == key):
+                count += self._size_of(current_node.left_child) + 1
+                current_node = current_node.right_child
+            else:
+                current_node = current_node.left_child
+        return count
+
+    def enable_instrumentation(self, hook=None):
+        """Count key comparisons, node hops and depths of descents.
+
+        Lookups (_get_node) and inserts (_insert) of this tree are swapped
+        for counting versions, trees without instrumentation run the plain
+        methods and pay nothing. Counters are reset on every call.
+
+        Parameters
+        ----------
+        hook : callable (optional)
+            Called as hook(operation, key, depth, comparisons) after every
+            counted 'lookup' or 'insert' e.g. to export metrics.
+
+        Examples
+        --------
+        >>> tree = BinarySearchTree(OrderedDict([(2, 'b'), (1, 'a')]))
+        >>> tree.enable_instrumentation()
+        >>> tree[1]
+        'a'
+        >>> stats = tree.stats()
+        >>> stats['lookups'], stats['node_hops'], stats['depth_histogram']
+        (1, 2, {1: 1})
+        """
+        self._counters = Counter()
+        self._depth_histogram = Counter()
+        self._hook = hook
+        self._get_node = self._instrumented_get_node
+        if type(self)._insert is BinarySearchTree._insert:
+            self._insert = self._instrumented_insert
+
+    def disable_instrumentation(self):
+        """Restore the plain lookup and insert methods."""
+        for name in ('_get_node', '_insert', '_counters', '_depth_histogram',
+                     '_hook'):
+            self.__dict__.pop(name, None)
+
+    def stats(self):
+        """Shape statistics and, if instrumented, the counters.
+
+        Returns
+        -------
+        dict
+            size, height (levels), average_depth (root at depth 0) and
+            leaf_count. If instrumented also lookups, inserts, comparisons,
+            node_hops and depth_histogram of lookup depths.
+        """
+        height = depth_total = leaf_count = 0
+        stack = [(self._root, 0)] if len(self) > 0 else []
+        while stack:
+            node, depth = stack.pop()
+            height = max(height, depth + 1)
+            depth_total += depth
+            if node.is_leaf():
+                leaf_count += 1
+            for child in (node.left_child, node.right_child):
+                if child is not None:
+                    stack.append((child, depth + 1))
+
+        stats = {'size': len(self),
+                 'height': height,
+                 'average_depth': depth_total / len(self) if self else 0.0,
+                 'leaf_count': leaf_count}
+        if '_counters' in self.__dict__:
+            for name in ('lookups', 'inserts', 'comparisons', 'node_hops'):
+                stats[name] = self._counters[name]
+            stats['depth_histogram'] = dict(sorted(
+                self._depth_histogram.items()))
+        return stats
+
+    def _instrumented_get_node(self, key):
+        # _get_node which records comparisons, hops and the depth reached.
+        comparisons = node_hops = 0
+        found_node = last_node = None
+        current_node = self._root
+        while current_node is not None:
+            node_hops += 1
+            comparisons += 1
+            last_node = current_node
+            if key < current_node.key:
+                current_node = current_node.left_child
+                continue
+            comparisons += 1
+            if key > current_node.key:
+                current_node = current_node.right_child
+            else:
+                if key == current_node.key:
+                    found_node = current_node
+                break
+        depth = max(node_hops - 1, 0)
+        self._depth_histogram[depth] += 1
+        self._record('lookup', key, depth, comparisons, node_hops)
+        self._after_lookup(last_node)
+        return found_node
+
+    def _after_lookup(self, node):
+        # Hook for self-adjusting subclasses, node is the last node visited
+        # by a lookup (None if empty). Only the instrumented lookup calls
+        # it, subclasses which adapt override _get_node as well.
+        pass
+
+    def _instrumented_insert(self, key, item):
+        # _insert which records comparisons, hops and the depth reached.
+        self._hash = None
+        comparisons = node_hops = 0
+        parent_node = None
+        current_node = self._root
+        while current_node is not None:
+            node_hops += 1
+            comparisons += 1
+            if key < current_node.key:
+                parent_node = current_node
+                current_node = current_node.left_child
+                continue
+            comparisons += 1
+            if key > current_node.key:
+                parent_node = current_node
+                current_node = current_node.right_child
+            else:
+                current_node.item = item
+                if self._aggregate_function is not None:
+                    self._update_path(current_node)
+                self._record('insert', key, node_hops - 1, comparisons,
+                             node_hops)
+                return None
+        self._record('insert', key, node_hops, comparisons, node_hops)
+        return self._attach_leaf(parent_node, key, item)
+
+    def _record(self, operation, key, depth, comparisons, node_hops):
+        counters = self._counters
+        counters[operation + 's'] += 1
+        counters['comparisons'] += comparisons
+        counters['node_hops'] += node_hops
+        if self._hook is not None:
+            self._hook(operation, key, depth, comparisons)
+
+    def _key_or_missing(self, node, key):
+        if node is None:
+            self.__missing__(key)
+        return node.key
+
+    def _floor_node(self, key, strict):
+        # Node with largest key <= key (< key if strict), single descent.
+        floor_node = None
+        current_node = self._root
+        while current_node is not None:
+            if current_node.key < key or (not strict
+                                          and current_node.key == key):
+                floor_node = current_node
+                current_node = current_node.right_child
+            else:
+                current_node = current_node.left_child
+        return floor_node
+
+    def _ceiling_node(self, key, strict):
+        # Node with smallest key >= key (> key if strict), single descent.
+        ceiling_node = None
+        current_node = self._root
+        while current_node is not None:
+            if current_node.key > key or (not strict
+                                          and current_node.key == key):
+                ceiling_node = current_node
+                current_node = current_node.left_child
+            else:
+                current_node = current_node.right_child
+        return ceiling_node
 
     def _get_node(self, key):
         # Search thru tree via binary search
@@ -260,26 +1431,1655 @@ class BinarySearchTree(BinaryTree):
             elif key == current_node.key:
                 return current_node
             else:
-                continue
+                # Unordered key such as NaN, found nowhere.
+                break
         return None
 
-    def _add_edge(self, parent_node, key, item):
-        # Add links from child to parent and vice versa.
-        new_leaf_node = BinaryTreeNode(key, item, parent_node)
-        if key > parent_node.key:
-            parent_node.right_child = new_leaf_node
-        else:
-            parent_node.left_child = new_leaf_node
-
     def __hash__(self):
-        """Hash by tree structure keys and items."""
-        return hash((tuple(self.keys_as_tree()), tuple(self.items_as_tree())))
+        """Hash by tree structure keys and items, computed once per change."""
+        if self._hash is None:
+            self._hash = hash((tuple(self.iter_keys_as_tree()),
+                               tuple(self.iter_items_as_tree())))
+        return self._hash
 
-    def __eq__(self, other):
-        return isinstance(self, type(other)) and self.__hash__() == other.__hash__()
+    def _node_data(self, node):
+        return node.key, node.item
+
+    def __repr__(self):
+        # Can instantiate by copy and paste.
+        return '{}({})'.format(self.__class__.__name__,
+                               OrderedDict(zip(self.keys_as_list(),
+                                               self.items_as_list())))
+
+
+class AVLTree(BinarySearchTree):
+    """A self-balancing binary search tree created with unique comparable keys.
+
+    Drop in replacement for BinarySearchTree when keys may arrive in sorted
+    order. Subtree heights of any node differ by at most one, so the height
+    of the tree stays O(log n) and so does every lookup and insert.
+
+    Parameters
+    ----------
+    dict_ : OrderedDict
+        Key, item pairs to initialize the AVL tree.
+    key : callable (optional)
+        Applied to every key passed to the tree, see BinarySearchTree.
+    aggregate : str or callable (optional)
+        Aggregate of items maintained per subtree, see BinarySearchTree.
+
+    Examples
+    --------
+    >>> tree = AVLTree(OrderedDict([(1, 'a'), (2, 'b'), (3, 'c')]))
+    >>> tree.keys_as_tree()
+    [2, 1, 3]
+    >>> tree.keys_as_list()
+    [2, 1, 3]
+    >>> tree.items_as_list()
+    ['b', 'a', 'c']
+    """
+
+    _node_class = AVLTreeNode
+    _balanced = True
+
+    def height(self):
+        """Height of the tree, 0 if empty."""
+        return self._height(self._root)
+
+    @staticmethod
+    def _height(node):
+        return node.height if node is not None else 0
+
+    def _update_node(self, node):
+        super()._update_node(node)
+        node.height = 1 + max(self._height(node.left_child),
+                              self._height(node.right_child))
+
+    def _after_insert(self, node):
+        if (type(self)._update_node is not AVLTree._update_node
+                or self._aggregate_function is not None):
+            self._rebalance(node)
+            return
+
+        # Heights change up to the first node whose height stays the same
+        # or which rotates back to its old height, above it only sizes.
+        node = node.parent
+        while node is not None:
+            old_height = node.height
+            self._update_node(node)
+            balance = (self._height(node.left_child)
+                       - self._height(node.right_child))
+            if balance > 1:
+                if (self._height(node.left_child.left_child)
+                        < self._height(node.left_child.right_child)):
+                    self._rotate_left(node.left_child)
+                node = self._rotate_right(node)
+            elif balance < -1:
+                if (self._height(node.right_child.right_child)
+                        < self._height(node.right_child.left_child)):
+                    self._rotate_right(node.right_child)
+                node = self._rotate_left(node)
+            elif node.height != old_height:
+                node = node.parent
+                continue
+            node = node.parent
+            break
+        while node is not None:
+            node.size += 1
+            node = node.parent
+
+    def _after_delete(self, node):
+        self._rebalance(node)
+
+    def _join(self, left, node, right):
+        # Hang node and the shorter subtree off the spine of the taller one
+        # where heights meet, then retrace. Costs O(height difference) so
+        # the joins of a split add up to O(log n).
+        left_height, right_height = self._height(left), self._height(right)
+        if abs(left_height - right_height) <= 1:
+            return super()._join(left, node, right)
+
+        # Retracing must stop at the root of the taller subtree.
+        for root in (left, right):
+            if root is not None:
+                root.parent = None
+        if left_height > right_height:
+            parent_node = left
+            while self._height(parent_node.right_child) > right_height + 1:
+                parent_node = parent_node.right_child
+            subtree = super()._join(parent_node.right_child, node, right)
+            parent_node.right_child = subtree
+        else:
+            parent_node = right
+            while self._height(parent_node.left_child) > left_height + 1:
+                parent_node = parent_node.left_child
+            subtree = super()._join(left, node, parent_node.left_child)
+            parent_node.left_child = subtree
+        subtree.parent = parent_node
+
+        # A rotation at the top points _root at the joined tree, callers
+        # set _root once done.
+        self._rebalance(parent_node)
+        while subtree.parent is not None:
+            subtree = subtree.parent
+        return subtree
+
+    def _rebalance(self, node):
+        # Retrace from node up to the root, rotating any unbalanced node.
+        while node is not None:
+            self._update_node(node)
+            balance = (self._height(node.left_child)
+                       - self._height(node.right_child))
+            if balance > 1:
+                if (self._height(node.left_child.left_child)
+                        < self._height(node.left_child.right_child)):
+                    self._rotate_left(node.left_child)
+                node = self._rotate_right(node)
+            elif balance < -1:
+                if (self._height(node.right_child.right_child)
+                        < self._height(node.right_child.left_child)):
+                    self._rotate_right(node.right_child)
+                node = self._rotate_left(node)
+            node = node.parent
+
+
+class SplayTree(BinarySearchTree):
+    """A self-adjusting binary search tree created with unique comparable keys.
+
+    Every lookup and every insert of a new key rotates the node reached to
+    the root along its parent pointers (splaying), so recently accessed keys
+    sit near the root. Any sequence of operations costs O(log n) amortized
+    each, and skewed access such as a few hot keys costs far fewer node hops
+    than a static tree of the same keys.
+
+    Lookups change the tree structure, so unlike the other trees reads are
+    not safe to run concurrently and the hash changes with lookups.
+
+    Fewer hops do not make lookups faster in Python, every splay rotation
+    costs far more than a hop. In benchmarks/baseline.json random getitem
+    on 10,000 keys runs at about 95k ops/s against 1.9M for AVLTree, and
+    zipfian getitem at about 190k against 2.8M. Prefer a static tree unless
+    node hops themselves are expensive, e.g. for nodes paged in from disk.
+
+    Parameters
+    ----------
+    dict_ : OrderedDict
+        Key, item pairs to initialize the splay tree.
+    key : callable (optional)
+        Applied to every key passed to the tree, see BinarySearchTree.
+    aggregate : str or callable (optional)
+        Aggregate of items maintained per subtree, see BinarySearchTree.
+
+    Examples
+    --------
+    >>> tree = SplayTree(OrderedDict([(1, 'a'), (2, 'b'), (3, 'c')]))
+    >>> tree.keys_as_tree()
+    [3, 2, None, 1]
+    >>> tree[2]
+    'b'
+    >>> tree.keys_as_tree()
+    [2, 1, 3]
+    """
+
+    # Splaying after every insert keeps the amortized bound.
+    _balanced = True
+
+    def _after_insert(self, node):
+        # Rotations recompute every ancestor of node from its children, so
+        # splaying also accounts for the new node.
+        self._update_node(node)
+        self._splay(node)
+
+    def _after_lookup(self, node):
+        if node is not None:
+            self._splay(node)
+
+    def _get_node(self, key):
+        # Descent as BinarySearchTree._get_node, then splays the node found
+        # or else the last node visited so misses adapt the tree too.
+        found_node = last_node = None
+        current_node = self._root
+        while current_node is not None:
+            last_node = current_node
+            if key < current_node.key:
+                current_node = current_node.left_child
+            elif key > current_node.key:
+                current_node = current_node.right_child
+            else:
+                if key == current_node.key:
+                    found_node = current_node
+                break
+        if last_node is not None:
+            self._splay(last_node)
+        return found_node
+
+    def _splay(self, node):
+        # Rotate node up to the root by zig-zig and zig-zag steps, which
+        # roughly halve the depth of every node on the path.
+        if node.parent is None:
+            return
+        self._hash = None
+        while node.parent is not None:
+            parent_node = node.parent
+            grandparent_node = parent_node.parent
+            if grandparent_node is None:
+                self._rotate_up(node)
+            elif ((grandparent_node.left_child is parent_node)
+                  == (parent_node.left_child is node)):
+                self._rotate_up(parent_node)
+                self._rotate_up(node)
+            else:
+                self._rotate_up(node)
+                self._rotate_up(node)
+
+    def _rotate_up(self, node):
+        # Swap node with its parent by a single rotation.
+        if node.parent.left_child is node:
+            self._rotate_right(node.parent)
+        else:
+            self._rotate_left(node.parent)
+
+
+class IntervalTree(AVLTree):
+    """An AVL tree of closed (start, end) intervals for overlap queries.
+
+    Intervals are ordered by start then end, every node also tracks the
+    largest end in its subtree so queries skip subtrees ending before the
+    query range. Intervals with the same start and end share one node, the
+    last item wins as for any key.
+
+    Parameters
+    ----------
+    dict_ : OrderedDict
+        Interval, item pairs to initialize the interval tree.
+    key : callable (optional)
+        Applied to every key passed to the tree, see BinarySearchTree.
+    aggregate : str or callable (optional)
+        Aggregate of items maintained per subtree, see BinarySearchTree.
+
+    Raises
+    ------
+    ValueError
+        For a key which is not a (start, end) tuple with start <= end.
+
+    Examples
+    --------
+    >>> tree = IntervalTree(OrderedDict([((1, 4), 'a'), ((2, 3), 'b'),
+    ...                                  ((5, 9), 'c')]))
+    >>> list(tree.stabbing(3))
+    [(1, 4), (2, 3)]
+    >>> list(tree.overlapping(4, 6))
+    [(1, 4), (5, 9)]
+    >>> tree[(5, 9)]
+    'c'
+    """
+
+    _node_class = IntervalTreeNode
+
+    # Intervals are checked after the key function, which the base class
+    # applies itself, so these pass checked keys on past it.
+
+    @classmethod
+    def from_sorted(cls, keys, items, sort=False, key=None, aggregate=None):
+        """Build a perfectly balanced tree, see BinarySearchTree."""
+        if key is not None:
+            keys = map(key, keys)
+        tree = super().from_sorted(map(_check_interval, keys), items, sort,
+                                   aggregate=aggregate)
+        tree._key_function = key
+        return tree
+
+    def __setitem__(self, key, item):
+        """Update or create node item by interval."""
+        if self._key_function is not None:
+            key = self._key_function(key)
+        self._insert(_check_interval(key), item)
+
+    def update(self, pairs):
+        """Update or create node items, see BinarySearchTree."""
+        if hasattr(pairs, 'items'):
+            pairs = pairs.items()
+        key_function = self._key_function
+        if key_function is not None:
+            pairs = ((key_function(key), item) for key, item in pairs)
+        self._update_keys((_check_interval(key), item) for key, item in pairs)
+
+    def _update_node(self, node):
+        super()._update_node(node)
+        max_end = node.key[1]
+        for child in (node.left_child, node.right_child):
+            if child is not None and child.max_end > max_end:
+                max_end = child.max_end
+        node.max_end = max_end
+
+    def overlapping(self, low, high):
+        """Lazily iterate intervals overlapping [low, high] in order.
+
+        An interval (start, end) overlaps if start <= high and end >= low.
+        Subtrees whose largest end is below low are skipped and the walk
+        stops at the first start above high, so k intervals cost
+        O(min(n, (k + 1) log n)).
+        """
+        stack = []
+        node = self._root
+        while True:
+            # Descend left while the subtree can still reach low.
+            while node is not None and node.max_end >= low:
+                stack.append(node)
+                node = node.left_child
+            if not stack:
+                return
+            node = stack.pop()
+            if node.key[0] > high:
+                return
+            if node.key[1] >= low:
+                yield node.key
+            node = node.right_child
+
+    def stabbing(self, point):
+        """Lazily iterate intervals containing point in order."""
+        return self.overlapping(point, point)
+
+
+class ThreadSafeBinarySearchTree(BinarySearchTree):
+    """A binary search tree which may be shared by threads.
+
+    Lookups hold a shared read lock so readers run concurrently, inserts and
+    updates hold an exclusive write lock so readers never see a tree part
+    way through a change.
+
+    Lazy iterators (iteration, iter_* and irange) do not lock by
+    themselves, consume them inside read_locked() when writers may run.
+
+    Parameters
+    ----------
+    dict_ : OrderedDict
+        Key, item pairs to initialize the BST.
+    key : callable (optional)
+        Applied to every key passed to the tree, see BinarySearchTree.
+    aggregate : str or callable (optional)
+        Aggregate of items maintained per subtree, see BinarySearchTree.
+
+    Examples
+    --------
+    >>> tree = ThreadSafeBinarySearchTree(OrderedDict([(2, 'b'), (1, 'a')]))
+    >>> tree[3] = 'c'
+    >>> with tree.read_locked():
+    ...     list(tree.irange(2, 3))
+    [2, 3]
+    """
+
+    def __init__(self, dict_, key=None, aggregate=None):
+        self._lock = ReadWriteLock()
+        super().__init__(dict_, key, aggregate)
+
+    def read_locked(self):
+        """Context manager holding the tree read lock."""
+        return self._lock.read_locked()
+
+    def write_locked(self):
+        """Context manager holding the tree write lock."""
+        return self._lock.write_locked()
+
+    __getitem__ = with_read_lock(BinarySearchTree.__getitem__)
+    __contains__ = with_read_lock(BinarySearchTree.__contains__)
+    __hash__ = with_read_lock(BinarySearchTree.__hash__)
+    __repr__ = with_read_lock(BinarySearchTree.__repr__)
+    keys_as_list = with_read_lock(BinarySearchTree.keys_as_list)
+    items_as_list = with_read_lock(BinarySearchTree.items_as_list)
+    keys_as_tree = with_read_lock(BinarySearchTree.keys_as_tree)
+    items_as_tree = with_read_lock(BinarySearchTree.items_as_tree)
+    min = with_read_lock(BinarySearchTree.min)
+    max = with_read_lock(BinarySearchTree.max)
+    floor = with_read_lock(BinarySearchTree.floor)
+    ceiling = with_read_lock(BinarySearchTree.ceiling)
+    predecessor = with_read_lock(BinarySearchTree.predecessor)
+    successor = with_read_lock(BinarySearchTree.successor)
+    rank = with_read_lock(BinarySearchTree.rank)
+    select = with_read_lock(BinarySearchTree.select)
+    count_range = with_read_lock(BinarySearchTree.count_range)
+    aggregate = with_read_lock(BinarySearchTree.aggregate)
+
+    __setitem__ = with_write_lock(BinarySearchTree.__setitem__)
+    __delitem__ = with_write_lock(BinarySearchTree.__delitem__)
+    update = with_write_lock(BinarySearchTree.update)
+    pop = with_write_lock(BinarySearchTree.pop)
+    delete_range = with_write_lock(BinarySearchTree.delete_range)
+    split = with_write_lock(BinarySearchTree.split)
+
+    def __eq__(self, other):
+        """See BinarySearchTree.__eq__, holds the read locks of both trees."""
+        with _locked_in_order((self, other), write=False):
+            return super().__eq__(other)
+
+    def merge(self, other):
+        """See BinarySearchTree.merge, holds the read locks of both trees.
+
+        The lock of other is only taken if other is thread safe too.
+        """
+        with _locked_in_order((self, other), write=False):
+            return super().merge(other)
+
+    @classmethod
+    def join(cls, left, right):
+        """See BinarySearchTree.join, holds the write locks of both trees.
+
+        The locks are taken in a fixed order, so threads joining the same
+        trees as left and right the other way round do not deadlock.
+        """
+        with _locked_in_order((left, right), write=True):
+            return super().join(left, right)
+
+
+class ThreadSafeAVLTree(ThreadSafeBinarySearchTree, AVLTree):
+    """An AVL tree which may be shared by threads.
+
+    See ThreadSafeBinarySearchTree for the locking and AVLTree for the
+    balancing.
+
+    Parameters
+    ----------
+    dict_ : OrderedDict
+        Key, item pairs to initialize the AVL tree.
+    key : callable (optional)
+        Applied to every key passed to the tree, see BinarySearchTree.
+    aggregate : str or callable (optional)
+        Aggregate of items maintained per subtree, see BinarySearchTree.
+    """
+
+
+class PersistentBinarySearchTree(AVLTree):
+    """A balanced binary search tree which never changes nodes in place.
+
+    Inserts, updates and deletes copy the O(log n) nodes on the path to the
+    key and share every other subtree with the previous version, so
+    snapshot() is O(1) and old versions stay valid and consistent while the
+    tree keeps changing. Balanced as an AVL tree.
+
+    Nodes are shared between versions so their parent links are not kept,
+    traversals use a stack instead.
+
+    Parameters
+    ----------
+    dict_ : OrderedDict
+        Key, item pairs to initialize the tree.
+    key : callable (optional)
+        Applied to every key passed to the tree, see BinarySearchTree.
+    aggregate : str or callable (optional)
+        Aggregate of items maintained per subtree, see BinarySearchTree.
+
+    Examples
+    --------
+    >>> tree = PersistentBinarySearchTree(OrderedDict([(1, 'a'), (2, 'b')]))
+    >>> old = tree.snapshot()
+    >>> tree[3] = 'c'
+    >>> tree[1] = 'z'
+    >>> old
+    PersistentBinarySearchTree(OrderedDict([(1, 'a'), (2, 'b')]))
+    >>> tree
+    PersistentBinarySearchTree(OrderedDict([(2, 'b'), (1, 'z'), (3, 'c')]))
+    """
+
+    def snapshot(self):
+        """Fork of the current version, O(1).
+
+        The snapshot is a full tree of its own which shares nodes with this
+        one. Later changes to either are not seen by the other, so it may
+        be read as a frozen version or changed as an independent copy.
+
+        The snapshot is not instrumented even if this tree is, its lookups
+        are not counted in the stats of this tree.
+
+        Examples
+        --------
+        >>> tree = PersistentBinarySearchTree(OrderedDict([(1, 'a')]))
+        >>> fork = tree.snapshot()
+        >>> fork[2] = 'b'
+        >>> len(fork), len(tree)
+        (2, 1)
+        """
+        snapshot = self.__class__.__new__(self.__class__)
+        snapshot.__dict__.update(self.__dict__)
+        # Instrumented methods are bound to self, drop them with the counters.
+        snapshot.disable_instrumentation()
+        return snapshot
+
+    def update(self, pairs):
+        """Update or create node items from a mapping or (key, item) pairs."""
+        if hasattr(pairs, 'items'):
+            pairs = pairs.items()
+        for key, item in pairs:
+            self[key] = item
+
+    def _insert(self, key, item):
+        # Install a new root which shares all subtrees off the key path.
+        self._hash = None
+        self._root = self._insert_copy(self._root, key, item)
+
+    def _insert_copy(self, node, key, item):
+        # Copy of the subtree rooted at node with key set to item.
+        if node is None:
+            self._size += 1
+            return self._copy(key, item, None, None)
+        if key < node.key:
+            return self._balanced_copy(
+                node.key, node.item,
+                self._insert_copy(node.left_child, key, item),
+                node.right_child)
+        if key > node.key:
+            return self._balanced_copy(
+                node.key, node.item, node.left_child,
+                self._insert_copy(node.right_child, key, item))
+        return self._copy(key, item, node.left_child, node.right_child)
+
+    def _delete_node(self, node):
+        self._hash = None
+        self._root = self._delete_copy(self._root, node.key)
+        self._size -= 1
+
+    def _delete_copy(self, node, key):
+        # Copy of the subtree rooted at node without key, which must exist.
+        if key < node.key:
+            return self._balanced_copy(
+                node.key, node.item,
+                self._delete_copy(node.left_child, key), node.right_child)
+        if key > node.key:
+            return self._balanced_copy(
+                node.key, node.item, node.left_child,
+                self._delete_copy(node.right_child, key))
+        if node.left_child is None:
+            return node.right_child
+        if node.right_child is None:
+            return node.left_child
+        successor = self._leftmost(node.right_child)
+        return self._balanced_copy(
+            successor.key, successor.item, node.left_child,
+            self._delete_copy(node.right_child, successor.key))
+
+    def _split(self, node, key):
+        # Split by copying the nodes on the path to key, shares the rest.
+        if node is None:
+            return None, None, None
+        if key < node.key:
+            left, found_node, right = self._split(node.left_child, key)
+            return left, found_node, self._join(right, node, node.right_child)
+        if key > node.key:
+            left, found_node, right = self._split(node.right_child, key)
+            return self._join(node.left_child, node, left), found_node, right
+        return node.left_child, node, node.right_child
+
+    def _join(self, left, node, right):
+        # Join by copying the nodes down the spine of the taller subtree to
+        # where heights meet, rebalancing the copies on the way back up.
+        left_height, right_height = self._height(left), self._height(right)
+        if left_height > right_height + 1:
+            return self._balanced_copy(
+                left.key, left.item, left.left_child,
+                self._join(left.right_child, node, right))
+        if right_height > left_height + 1:
+            return self._balanced_copy(
+                right.key, right.item,
+                self._join(left, node, right.left_child), right.right_child)
+        return self._copy(node.key, node.item, left, right)
+
+    def _copy(self, key, item, left_child, right_child):
+        node = self._node_class(key, item, None, right_child, left_child)
+        self._update_node(node)
+        return node
+
+    def _balanced_copy(self, key, item, left_child, right_child):
+        # New node over the children with AVL rotations done by copying.
+        balance = self._height(left_child) - self._height(right_child)
+        if balance > 1:
+            if (self._height(left_child.left_child)
+                    < self._height(left_child.right_child)):
+                left_child = self._rotated_left(left_child)
+            return self._rotated_right(
+                self._copy(key, item, left_child, right_child))
+        if balance < -1:
+            if (self._height(right_child.right_child)
+                    < self._height(right_child.left_child)):
+                right_child = self._rotated_right(right_child)
+            return self._rotated_left(
+                self._copy(key, item, left_child, right_child))
+        return self._copy(key, item, left_child, right_child)
+
+    def _rotated_left(self, node):
+        pivot = node.right_child
+        return self._copy(pivot.key, pivot.item,
+                          self._copy(node.key, node.item, node.left_child,
+                                     pivot.left_child),
+                          pivot.right_child)
+
+    def _rotated_right(self, node):
+        pivot = node.left_child
+        return self._copy(pivot.key, pivot.item, pivot.left_child,
+                          self._copy(node.key, node.item, pivot.right_child,
+                                     node.right_child))
+
+    def _build_balanced(self, keys, items, low, high, parent_node):
+        if low >= high:
+            return None
+        middle = (low + high) // 2
+        return self._copy(keys[middle], items[middle],
+                          self._build_balanced(keys, items, low, middle, None),
+                          self._build_balanced(keys, items, middle + 1, high,
+                                               None))
+
+    def iter_inorder(self):
+        """Iterate nodes in order (left subtree, node, right subtree)."""
+        return self._iter_inorder_from(self._root, None)
+
+    def iter_postorder(self):
+        """Iterate nodes in post-order (left subtree, right subtree, node)."""
+        # Reverse of the node, right subtree, left subtree order.
+        stack = [self._root] if len(self) > 0 else []
+        reverse_postorder = []
+        while stack:
+            node = stack.pop()
+            reverse_postorder.append(node)
+            for child in (node.left_child, node.right_child):
+                if child is not None:
+                    stack.append(child)
+        return reversed(reverse_postorder)
+
+    def irange(self, low=None, high=None):
+        """Lazily iterate keys in order from low to high inclusive."""
+        low, high = self._bounds(low, high)
+        for node in self._iter_inorder_from(self._root, low):
+            if high is not None and node.key > high:
+                return
+            yield node.key
+
+    @staticmethod
+    def _iter_inorder_from(node, low):
+        # In order nodes with key >= low, skipping subtrees below low.
+        stack = []
+        while stack or node is not None:
+            if node is not None:
+                if low is not None and node.key < low:
+                    node = node.right_child
+                else:
+                    stack.append(node)
+                    node = node.left_child
+            else:
+                node = stack.pop()
+                yield node
+                node = node.right_child
+
+
+class BPlusTree:
+    """An ordered map storing many keys per node in sorted lists, a B+ tree.
+
+    Alternative to BinarySearchTree for very large maps. Each node holds up
+    to order keys searched with bisect, so a lookup hops O(log n / log
+    order) nodes instead of O(log n) and there is no Python object per key.
+    Items live in the leaves, which are chained in key order so range scans
+    walk along the leaves without descending again.
+
+    Every leaf is at the same depth and every node except the root is at
+    least half full, so inserts and deletes cost O(order log n / log order)
+    in the worst case and O(log n / log order) hops.
+
+    Iteration yields keys in ascending order.
+
+    Parameters
+    ----------
+    dict_ : OrderedDict
+        Key, item pairs to initialize the tree.
+    order : int (optional)
+        Maximum number of keys in a leaf and of children of an internal
+        node, at least 3.
+
+    Examples
+    --------
+    >>> tree = BPlusTree(OrderedDict([(3, 'c'), (1, 'a'), (2, 'b')]), order=3)
+    >>> tree[4] = 'd'
+    >>> tree.keys_as_list()
+    [1, 2, 3, 4]
+    >>> tree.items_as_list()
+    ['a', 'b', 'c', 'd']
+    >>> list(tree.irange(2, 3)), tree.ceiling(2.5)
+    ([2, 3], 3)
+    >>> del tree[1]
+    >>> tree
+    BPlusTree(OrderedDict([(2, 'b'), (3, 'c'), (4, 'd')]))
+    """
+
+    def __init__(self, dict_, order=64):
+        if not isinstance(dict_, OrderedDict):
+            raise ValueError('Must be initialized with OrderedDict.')
+        if order < 3:
+            raise ValueError('Order must be at least 3.')
+
+        self._order = order
+        # Half full, so merging two nodes below it never overflows.
+        self._min_fill = (order + 1) // 2
+        self._root = BPlusTreeNode([], [])
+        self._size = 0
+        self._hash = None
+        if dict_:
+            self.update(dict_)
+
+    @classmethod
+    def from_sorted(cls, keys, items, sort=False, order=64):
+        """Build a tree from keys in ascending order, level by level.
+
+        Linear time, see BinarySearchTree.from_sorted for the parameters.
+
+        Examples
+        --------
+        >>> tree = BPlusTree.from_sorted(range(10), range(10), order=4)
+        >>> tree.height(), len(tree)
+        (2, 10)
+        """
+        keys, items = _sorted_pairs(keys, items, sort)
+        tree = cls(OrderedDict(), order)
+        if not keys:
+            return tree
+
+        level = [BPlusTreeNode(keys[start:end], items[start:end])
+                 for start, end in tree._even_chunks(len(keys))]
+        for leaf, next_leaf in zip(level, level[1:]):
+            leaf.next_leaf = next_leaf
+        # Smallest key under each node of the level.
+        min_keys = [leaf.keys[0] for leaf in level]
+        while len(level) > 1:
+            chunks = list(tree._even_chunks(len(level)))
+            level, min_keys = (
+                [BPlusTreeNode(min_keys[start + 1:end],
+                               children=level[start:end])
+                 for start, end in chunks],
+                [min_keys[start] for start, _ in chunks])
+        tree._root = level[0]
+        tree._size = len(keys)
+        return tree
+
+    def _even_chunks(self, count):
+        # Bounds of the fewest chunks of at most order, sizes differ by one
+        # at most so each is at least half full.
+        chunk_count = -(-count // self._order)
+        for chunk in range(chunk_count):
+            yield (chunk * count // chunk_count,
+                   (chunk + 1) * count // chunk_count)
+
+    def __len__(self):
+        """Number of keys."""
+        return self._size
+
+    def __iter__(self):
+        """Iterate keys in ascending order."""
+        return self.irange()
+
+    def height(self):
+        """Number of levels, 1 for a tree which is a single leaf."""
+        height = 1
+        node = self._root
+        while node.children is not None:
+            node = node.children[0]
+            height += 1
+        return height
+
+    def keys_as_list(self):
+        """List of keys in ascending order."""
+        return list(self.irange())
+
+    def items_as_list(self):
+        """List of items in key order."""
+        return [item for _, item in self._iter_pairs()]
+
+    def _iter_pairs(self):
+        # (key, item) pairs in key order along the leaf chain.
+        leaf = self._leftmost_leaf()
+        while leaf is not None:
+            yield from zip(leaf.keys, leaf.items)
+            leaf = leaf.next_leaf
+
+    def _leftmost_leaf(self):
+        node = self._root
+        while node.children is not None:
+            node = node.children[0]
+        return node
+
+    def _find(self, key):
+        # Descend to the leaf whose range holds key. Returns the (node,
+        # child index) path, the leaf and the index of key in the leaf or
+        # where it would be inserted.
+        path = []
+        node = self._root
+        while node.children is not None:
+            index = bisect_right(node.keys, key)
+            path.append((node, index))
+            node = node.children[index]
+        return path, node, bisect_left(node.keys, key)
+
+    def _find_leaf(self, key):
+        # As _find without keeping the path, for lookups.
+        node = self._root
+        while node.children is not None:
+            node = node.children[bisect_right(node.keys, key)]
+        return node, bisect_left(node.keys, key)
+
+    def __getitem__(self, key):
+        """Get item by key."""
+        leaf, index = self._find_leaf(key)
+        if index < len(leaf.keys) and leaf.keys[index] == key:
+            return leaf.items[index]
+        self.__missing__(key)
+
+    def __contains__(self, key):
+        """Contains key."""
+        leaf, index = self._find_leaf(key)
+        return index < len(leaf.keys) and leaf.keys[index] == key
+
+    def __missing__(self, key):
+        raise KeyError('{}'.format(key))
+
+    def __setitem__(self, key, item):
+        """Update or create item by key."""
+        if key != key:
+            _check_key(key)
+
+        self._insert(key, item)
+
+    def update(self, pairs):
+        """Update or create items from a mapping or (key, item) pairs."""
+        if hasattr(pairs, 'items'):
+            pairs = pairs.items()
+        for key, item in pairs:
+            self[key] = item
+
+    def _insert(self, key, item):
+        self._hash = None
+        path, leaf, index = self._find(key)
+        if index < len(leaf.keys) and leaf.keys[index] == key:
+            leaf.items[index] = item
+            return
+        leaf.keys.insert(index, key)
+        leaf.items.insert(index, item)
+        self._size += 1
+        if len(leaf.keys) > self._order:
+            self._split(leaf, path)
+
+    def _split(self, node, path):
+        # Move the upper half of overfull node to a new sibling, then split
+        # ancestors in turn while they overflow. A split root grows the
+        # tree by a level.
+        while True:
+            half = len(node.keys) // 2
+            if node.children is None:
+                sibling = BPlusTreeNode(node.keys[half:], node.items[half:],
+                                        next_leaf=node.next_leaf)
+                node.next_leaf = sibling
+                separator = sibling.keys[0]
+                del node.keys[half:], node.items[half:]
+            else:
+                separator = node.keys[half]
+                sibling = BPlusTreeNode(node.keys[half + 1:],
+                                        children=node.children[half + 1:])
+                del node.keys[half:], node.children[half + 1:]
+
+            if not path:
+                self._root = BPlusTreeNode([separator],
+                                           children=[node, sibling])
+                return
+            node, index = path.pop()
+            node.keys.insert(index, separator)
+            node.children.insert(index + 1, sibling)
+            if len(node.children) <= self._order:
+                return
+
+    def __delitem__(self, key):
+        """Delete item by key."""
+        path, leaf, index = self._find(key)
+        if index < len(leaf.keys) and leaf.keys[index] == key:
+            self._delete(path, leaf, index)
+        else:
+            self.__missing__(key)
+
+    def pop(self, key, default=_MISSING):
+        """Delete key and return its item.
+
+        Returns default if given and the key is missing, else KeyError.
+        """
+        path, leaf, index = self._find(key)
+        if index < len(leaf.keys) and leaf.keys[index] == key:
+            return self._delete(path, leaf, index)
+        if default is _MISSING:
+            self.__missing__(key)
+        return default
+
+    def delete_range(self, low, high):
+        """Delete keys from low to high inclusive, returns how many.
+
+        Deletes one key at a time, O(k log n / log order) hops for k keys.
+        """
+        keys = list(self.irange(low, high))
+        for key in keys:
+            del self[key]
+        return len(keys)
+
+    def _delete(self, path, leaf, index):
+        # Remove the pair at index of leaf, refill and return the item.
+        self._hash = None
+        del leaf.keys[index]
+        item = leaf.items.pop(index)
+        self._size -= 1
+        self._refill(leaf, path)
+        return item
+
+    def _refill(self, node, path):
+        # Borrow from or merge with a sibling while node is less than half
+        # full. Separators left over from deleted keys still route lookups
+        # correctly so they are not replaced.
+        minimum = self._min_fill
+        while path:
+            if len(node.keys if node.children is None
+                   else node.children) >= minimum:
+                return
+            parent, index = path.pop()
+            if index > 0:
+                left, right = parent.children[index - 1], node
+                sibling, separator_index = left, index - 1
+            else:
+                left, right = node, parent.children[1]
+                sibling, separator_index = right, 0
+            if len(sibling.keys if sibling.children is None
+                   else sibling.children) > minimum:
+                self._borrow(parent, separator_index, left, right,
+                             sibling is left)
+                return
+            self._merge(parent, separator_index, left, right)
+            node = parent
+
+        # Root left with a single child hands over to it.
+        if node.children is not None and len(node.children) == 1:
+            self._root = node.children[0]
+
+    @staticmethod
+    def _borrow(parent, separator_index, left, right, from_left):
+        # Move one key from a sibling across the separator between them.
+        if left.children is None:
+            if from_left:
+                right.keys.insert(0, left.keys.pop())
+                right.items.insert(0, left.items.pop())
+            else:
+                left.keys.append(right.keys.pop(0))
+                left.items.append(right.items.pop(0))
+            parent.keys[separator_index] = right.keys[0]
+        elif from_left:
+            right.keys.insert(0, parent.keys[separator_index])
+            right.children.insert(0, left.children.pop())
+            parent.keys[separator_index] = left.keys.pop()
+        else:
+            left.keys.append(parent.keys[separator_index])
+            left.children.append(right.children.pop(0))
+            parent.keys[separator_index] = right.keys.pop(0)
+
+    @staticmethod
+    def _merge(parent, separator_index, left, right):
+        # Move everything of right into left and drop right from parent.
+        if left.children is None:
+            left.keys.extend(right.keys)
+            left.items.extend(right.items)
+            left.next_leaf = right.next_leaf
+        else:
+            left.keys.append(parent.keys[separator_index])
+            left.keys.extend(right.keys)
+            left.children.extend(right.children)
+        del parent.keys[separator_index]
+        del parent.children[separator_index + 1]
+
+    def min(self):
+        """Smallest key, KeyError if empty."""
+        if not self._size:
+            raise KeyError('min of empty tree')
+        return self._leftmost_leaf().keys[0]
+
+    def max(self):
+        """Largest key, KeyError if empty."""
+        if not self._size:
+            raise KeyError('max of empty tree')
+        node = self._root
+        while node.children is not None:
+            node = node.children[-1]
+        return node.keys[-1]
+
+    def floor(self, key):
+        """Largest key <= key, KeyError if there is none."""
+        return self._key_or_missing(self._floor_key(key, False), key)
+
+    def ceiling(self, key):
+        """Smallest key >= key, KeyError if there is none."""
+        return self._key_or_missing(self._ceiling_key(key, False), key)
+
+    def predecessor(self, key):
+        """Largest key < key, KeyError if there is none."""
+        return self._key_or_missing(self._floor_key(key, True), key)
+
+    def successor(self, key):
+        """Smallest key > key, KeyError if there is none."""
+        return self._key_or_missing(self._ceiling_key(key, True), key)
+
+    def _key_or_missing(self, found_key, key):
+        if found_key is _MISSING:
+            self.__missing__(key)
+        return found_key
+
+    def _floor_key(self, key, strict):
+        # Largest key <= key (< key if strict), single descent. Keys in the
+        # subtree left of the last turn right are all < key.
+        left_subtree = None
+        node = self._root
+        while node.children is not None:
+            index = bisect_right(node.keys, key)
+            if index > 0:
+                left_subtree = node.children[index - 1]
+            node = node.children[index]
+        index = (bisect_left(node.keys, key) if strict
+                 else bisect_right(node.keys, key))
+        if index > 0:
+            return node.keys[index - 1]
+        if left_subtree is None:
+            return _MISSING
+        while left_subtree.children is not None:
+            left_subtree = left_subtree.children[-1]
+        return left_subtree.keys[-1]
+
+    def _ceiling_key(self, key, strict):
+        # Smallest key >= key (> key if strict), keys of the next leaf are
+        # all > key.
+        leaf, index = self._find_leaf(key)
+        if strict and index < len(leaf.keys) and leaf.keys[index] == key:
+            index += 1
+        if index < len(leaf.keys):
+            return leaf.keys[index]
+        if leaf.next_leaf is None:
+            return _MISSING
+        return leaf.next_leaf.keys[0]
+
+    def irange(self, low=None, high=None):
+        """Lazily iterate keys in order from low to high inclusive.
+
+        None leaves that end unbounded. One descent then a walk along the
+        leaf chain, O(log n / log order + k) for k keys.
+        """
+        if low is None:
+            leaf, index = self._leftmost_leaf(), 0
+        else:
+            leaf, index = self._find_leaf(low)
+        while leaf is not None:
+            keys = leaf.keys
+            if high is not None and keys and keys[-1] > high:
+                yield from keys[index:bisect_right(keys, high, index)]
+                return
+            yield from keys[index:]
+            leaf, index = leaf.next_leaf, 0
+
+    def __hash__(self):
+        """Hash by keys and items, computed once per change."""
+        if self._hash is None:
+            self._hash = hash(tuple(self._iter_pairs()))
+        return self._hash
+
+    def __eq__(self, other):
+        """Same keys paired with the same items, node layout does not matter."""
+        if not isinstance(other, BPlusTree) or len(self) != len(other):
+            return False
+        return all(pair == other_pair for pair, other_pair
+                   in zip(self._iter_pairs(), other._iter_pairs()))
+
+    def __repr__(self):
+        # Can instantiate by copy and paste.
+        return '{}({})'.format(self.__class__.__name__,
+                               OrderedDict(self._iter_pairs()))
+
+
+def _object_array(keys):
+    # 1-D array of the keys as they are, even if they are sequences.
+    return np.fromiter(keys, dtype=object, count=len(keys))
+
+
+def _is_int64(key):
+    return isinstance(key, (int, np.integer)) and -2 ** 63 <= key < 2 ** 63
+
+
+def _is_float64(key):
+    # Ints beyond 2 ** 53 would be rounded.
+    return isinstance(key, float) or (isinstance(key, (int, np.integer))
+                                      and -2 ** 53 <= key <= 2 ** 53)
+
+
+def _is_str(key):
+    return isinstance(key, str)
+
+
+def _holds_int64(dtype):
+    return np.can_cast(dtype, 'int64')
+
+
+def _holds_float64(dtype):
+    return np.can_cast(dtype, 'float64') and (dtype.kind == 'f'
+                                              or dtype.itemsize <= 4)
+
+
+def _holds_str(dtype):
+    return dtype.kind == 'U'
+
+
+# dtypes of frozen keys narrowest first, with the test of whether a key and
+# whether arrays of a dtype keep their values and order in it.
+_EXACT_DTYPES = [('int64', _is_int64, _holds_int64),
+                 ('float64', _is_float64, _holds_float64),
+                 ('str', _is_str, _holds_str)]
+
+
+class FrozenBinarySearchTree:
+    """A read only binary search tree laid out for batch lookups.
+
+    Keys are stored in a numpy array as a complete binary tree in level
+    order, the Eytzinger layout, where the children of index i are at
+    2i + 1 and 2i + 2 just as in BinaryTree.items_as_tree. A whole array of
+    keys descends one level at a time in vectorized passes, so a batch costs
+    O(log n) numpy operations instead of Python comparisons per key.
+
+    Keys are stored as int64 if all are ints which fit, float64 if all are
+    floats, str if all are strings and as Python objects otherwise. A batch
+    of lookup keys is converted to that dtype only if no key changes, else
+    both sides are compared as Python objects, so mixed batches are slower
+    but every key is found exactly as in the tree copied.
+
+    Parameters
+    ----------
+    tree : BinarySearchTree
+        Tree to copy, any shape. Its key function, if any, is applied to
+        the keys of every lookup.
+
+    Raises
+    ------
+    ImportError
+        If numpy is not installed.
+
+    Examples
+    --------
+    >>> tree = BinarySearchTree(OrderedDict([(1, 'a'), (2, 'b'), (3, 'c')]))
+    >>> frozen = tree.freeze()
+    >>> frozen.keys_as_tree()
+    [2, 1, 3]
+    >>> frozen.get_many([3, 4, 1])
+    ['c', None, 'a']
+    >>> frozen.contains_many([3, 4, 1]).tolist()
+    [True, False, True]
+    """
+
+    def __init__(self, tree):
+        if np is None:
+            raise ImportError('FrozenBinarySearchTree requires numpy.')
+
+        nodes = list(tree.iter_inorder())
+        order = self._level_order(len(nodes))
+        keys = [nodes[rank].key for rank in order]
+        for self._dtype, self._is_exact, self._holds_exact in _EXACT_DTYPES:
+            if all(map(self._is_exact, keys)):
+                self._keys = np.array(keys, dtype=self._dtype)
+                # Python scalar copy of the keys, made when a batch is
+                # first compared as objects.
+                self._object_keys = None
+                break
+        else:
+            self._dtype = self._is_exact = self._holds_exact = None
+            self._keys = self._object_keys = _object_array(keys)
+        self._items = [nodes[rank].item for rank in order]
+        self._key_function = getattr(tree, '_key_function', None)
+
+    @staticmethod
+    def _level_order(size):
+        # In order rank of each level order position of a complete tree.
+        ranks = [0] * size
+        rank = 0
+        stack = []
+        index = 0
+        while stack or index < size:
+            if index < size:
+                stack.append(index)
+                index = 2 * index + 1
+            else:
+                index = stack.pop()
+                ranks[index] = rank
+                rank += 1
+                index = 2 * index + 2
+        return ranks
+
+    def _lower_bounds(self, keys, tree_keys):
+        # Level order index of the smallest key >= each key, -1 if none.
+        size = len(tree_keys)
+        # 1 based positions, children of k are 2k and 2k + 1.
+        positions = np.ones(keys.shape, dtype=np.int64)
+        for _ in range(size.bit_length()):
+            active = positions <= size
+            node_keys = tree_keys[np.minimum(positions, size) - 1]
+            positions = np.where(active,
+                                 2 * positions + (node_keys < keys),
+                                 positions)
+        # Drop the trailing right turns, the last left turn is the bound.
+        positions //= 2 * ((positions + 1) & -(positions + 1))
+        return positions - 1
+
+    def _key_array(self, keys):
+        # Keys passed thru the key function as an array of the dtype of the
+        # tree keys, or of objects if that dtype would change any key.
+        if self._key_function is not None:
+            keys = [self._key_function(key) for key in keys]
+        exact = self._dtype is not None
+        if isinstance(keys, np.ndarray):
+            if exact and self._holds_exact(keys.dtype):
+                return keys
+            # Python scalars, compared exactly with each other.
+            return keys.astype(object)
+        keys = list(keys)
+        if self._dtype == 'int64':
+            # numpy only infers signed ints if every key is an int which
+            # fits, the common case skips testing each key.
+            try:
+                array = np.asarray(keys)
+            except ValueError:
+                array = None
+            if (array is not None and array.ndim == 1
+                    and array.dtype.kind == 'i'):
+                return array
+        if exact and all(map(self._is_exact, keys)):
+            return np.array(keys, dtype=self._dtype)
+        return _object_array(keys)
+
+    def get_many(self, keys, default=None):
+        """Items of keys, default for keys not in the tree."""
+        found = self._found(self._key_array(keys))
+        return [self._items[index] if is_found else default
+                for index, is_found in zip(found[0].tolist(),
+                                           found[1].tolist())]
+
+    def contains_many(self, keys):
+        """Boolean numpy array, True where the key is in the tree."""
+        return self._found(self._key_array(keys))[1]
+
+    def _found(self, keys):
+        # Lower bound indices and whether they hold the key.
+        if len(self._keys) == 0:
+            return (np.full(keys.shape, -1),
+                    np.zeros(keys.shape, dtype=bool))
+        tree_keys = self._keys
+        if keys.dtype == object and tree_keys.dtype != object:
+            if self._object_keys is None:
+                self._object_keys = tree_keys.astype(object)
+            tree_keys = self._object_keys
+        indices = self._lower_bounds(keys, tree_keys)
+        return indices, (indices >= 0) & (tree_keys[indices] == keys)
+
+    def __getitem__(self, key):
+        """Get item by key."""
+        indices, found = self._found(self._key_array([key]))
+        if not found[0]:
+            raise KeyError('{}'.format(key))
+        return self._items[indices[0]]
+
+    def __contains__(self, key):
+        """Contains key."""
+        return bool(self.contains_many([key])[0])
+
+    def __len__(self):
+        """Number of keys."""
+        return len(self._items)
+
+    def keys_as_tree(self):
+        """Keys in level order, a complete tree so there is no padding."""
+        return self._keys.tolist()
+
+    def items_as_tree(self):
+        """Items in level order, a complete tree so there is no padding."""
+        return list(self._items)
+
+
+class ArrayBinaryTree(BinaryTree):
+    """An immutable binary tree stored as parallel arrays instead of nodes.
+
+    Same interface as BinaryTree but nodes are indices into a
+    BinaryTreeArrays, which takes a fraction of the memory of node objects
+    for large trees. Iterating yields node indices in breadth first sequence.
+
+    Parameters
+    ----------
+    items : iterable
+        Items to initialize the items of the nodes.
+    key_typecode : str (optional)
+        array typecode to pack keys with, see BinaryTreeArrays.
+
+    Examples
+    --------
+    >>> tree = ArrayBinaryTree([1, None, 2, 3])
+    >>> tree.items_as_tree()
+    [1, None, 2, 3]
+    >>> tree.items_as_list()
+    [1, 2, 3]
+    >>> tree == ArrayBinaryTree.from_tree(BinaryTree([1, None, 2, 3]))
+    True
+
+    """
+
+    def __init__(self, items, key_typecode=None):
+        if not isinstance(items, Iterable):
+            raise ValueError('Must be initialized with Iterable.')
+
+        self._nodes = BinaryTreeArrays(key_typecode)
+        self._size = 0
+        self._root = NULL_INDEX
+        self._hash = None
+
+        nodes = self._nodes
+        items = iter(items)
+        assign_children_queue = deque([])
+        for item in items:
+            # Root of tree.
+            self._root = nodes.append(item, item)
+            assign_children_queue.append(self._root)
+            break
+
+        while assign_children_queue:
+            parent = assign_children_queue.popleft()
+            for links in (nodes.left, nodes.right):
+                item = next(items, None)
+                if item is not None:
+                    child = nodes.append(item, item, parent)
+                    links[parent] = child
+                    assign_children_queue.append(child)
+        self._size = len(nodes)
+
+    @classmethod
+    def from_tree(cls, tree, key_typecode=None):
+        """Copy a node based tree into array storage, preserving its shape."""
+        new_tree = cls.__new__(cls)
+        new_tree._nodes = nodes = BinaryTreeArrays(key_typecode)
+        new_tree._size = len(tree)
+        new_tree._root = NULL_INDEX
+        new_tree._hash = None
+
+        if len(tree) > 0:
+            new_tree._root = nodes.append(tree._root.key, tree._root.item)
+            frontier = deque([(tree._root, new_tree._root)])
+            while frontier:
+                node, index = frontier.popleft()
+                for child, links in ((node.left_child, nodes.left),
+                                     (node.right_child, nodes.right)):
+                    if child is not None:
+                        links[index] = nodes.append(child.key, child.item,
+                                                    index)
+                        frontier.append((child, links[index]))
+        return new_tree
+
+    def keys_as_list(self):
+        """List of node keys in iter sequence."""
+        keys = self._nodes.keys
+        return [keys[index] for index in self]
+
+    def items_as_list(self):
+        """List of node item in iter sequence."""
+        items = self._nodes.items
+        return [items[index] for index in self]
+
+    def iter_keys_as_tree(self):
+        """Iterate node keys as in keys_as_tree without building a list."""
+        keys = self._nodes.keys
+        return (keys[index] if index != NULL_INDEX else None
+                for index in self._iter_indices_as_tree())
+
+    def iter_items_as_tree(self):
+        """Iterate node items as in items_as_tree without building a list."""
+        items = self._nodes.items
+        return (items[index] if index != NULL_INDEX else None
+                for index in self._iter_indices_as_tree())
+
+    def _iter_indices_as_tree(self):
+        # Breadth first indices padded with NULL_INDEX, stops once only
+        # padding is left in the frontier.
+        left, right = self._nodes.left, self._nodes.right
+        frontier = deque([])
+        if len(self) > 0:
+            frontier.append(self._root)
+        pending_nodes = len(frontier)
+
+        while pending_nodes:
+            index = frontier.popleft()
+            yield index
+            if index != NULL_INDEX:
+                pending_nodes -= 1
+                for child in (left[index], right[index]):
+                    frontier.append(child)
+                    if child != NULL_INDEX:
+                        pending_nodes += 1
+
+    def iter_inorder(self):
+        """Iterate node indices in order via parent links."""
+        nodes = self._nodes
+        left, right, parent = nodes.left, nodes.right, nodes.parent
+        index = self._root
+        while index != NULL_INDEX and left[index] != NULL_INDEX:
+            index = left[index]
+        while index != NULL_INDEX:
+            yield index
+            if right[index] != NULL_INDEX:
+                index = right[index]
+                while left[index] != NULL_INDEX:
+                    index = left[index]
+            else:
+                while (parent[index] != NULL_INDEX
+                       and right[parent[index]] == index):
+                    index = parent[index]
+                index = parent[index]
+
+    def _walk(self):
+        left, right = self._nodes.left, self._nodes.right
+        stack = [self._root]
+        while stack:
+            index = stack.pop()
+            if index == NULL_INDEX:
+                yield None
+            else:
+                yield self._index_data(index)
+                stack.append(right[index])
+                stack.append(left[index])
+
+    def _index_data(self, index):
+        return self._nodes.items[index]
+
+    def __iter__(self):
+        """Iterate node indices in breadth first sequence."""
+        return self.iter_breadth_first()
+
+    def iter_breadth_first(self):
+        """Iterate node indices in breadth first sequence."""
+        left, right = self._nodes.left, self._nodes.right
+        frontier = deque([])
+        if len(self) > 0:
+            frontier.append(self._root)
+        while frontier:
+            index = frontier.popleft()
+            if left[index] != NULL_INDEX:
+                frontier.append(left[index])
+            if right[index] != NULL_INDEX:
+                frontier.append(right[index])
+            yield index
+
+    def iter_preorder(self):
+        """Iterate node indices in pre-order."""
+        left, right = self._nodes.left, self._nodes.right
+        stack = [self._root] if len(self) > 0 else []
+        while stack:
+            index = stack.pop()
+            yield index
+            if right[index] != NULL_INDEX:
+                stack.append(right[index])
+            if left[index] != NULL_INDEX:
+                stack.append(left[index])
+
+    def iter_postorder(self):
+        """Iterate node indices in post-order via parent links."""
+        nodes = self._nodes
+        left, right, parent = nodes.left, nodes.right, nodes.parent
+
+        def first_postorder(index):
+            while not nodes.is_leaf(index):
+                index = (left[index] if left[index] != NULL_INDEX
+                         else right[index])
+            return index
+
+        index = first_postorder(self._root) if len(self) > 0 else NULL_INDEX
+        while index != NULL_INDEX:
+            yield index
+            parent_index = parent[index]
+            if (parent_index != NULL_INDEX and left[parent_index] == index
+                    and right[parent_index] != NULL_INDEX):
+                index = first_postorder(right[parent_index])
+            else:
+                index = parent_index
+
+
+class ArrayBinarySearchTree(ArrayBinaryTree):
+    """A binary search tree stored as parallel arrays instead of nodes.
+
+    Same interface and tree shape as BinarySearchTree, see ArrayBinaryTree
+    for the storage.
+
+    Parameters
+    ----------
+    dict_ : OrderedDict
+        Key, item pairs to initialize the BST.
+    key_typecode : str (optional)
+        array typecode to pack keys with e.g. 'q' for int keys.
+
+    Examples
+    --------
+    >>> tree = ArrayBinarySearchTree(OrderedDict([(1, 'a'), (2, 'b')]), 'q')
+    >>> tree[3] = 'c'
+    >>> tree.keys_as_tree()
+    [1, None, 2, None, 3]
+    >>> tree[2]
+    'b'
+    >>> 4 in tree
+    False
+    """
+
+    def __init__(self, dict_, key_typecode=None):
+        if not isinstance(dict_, OrderedDict):
+            raise ValueError('Must be initialized with OrderedDict.')
+
+        super().__init__([], key_typecode)
+        if dict_:
+            self.update(dict_)
+
+    def update(self, pairs):
+        """Update or create node items from a mapping or (key, item) pairs."""
+        if hasattr(pairs, 'items'):
+            pairs = pairs.items()
+        self._hash = None
+
+        nodes = self._nodes
+        keys, left, right = nodes.keys, nodes.left, nodes.right
+        min_index = max_index = self._root
+        while max_index != NULL_INDEX and right[max_index] != NULL_INDEX:
+            max_index = right[max_index]
+        while min_index != NULL_INDEX and left[min_index] != NULL_INDEX:
+            min_index = left[min_index]
+
+        for key, item in pairs:
+            if key != key:
+                _check_key(key)
+
+            if max_index != NULL_INDEX and key > keys[max_index]:
+                right[max_index] = max_index = nodes.append(key, item,
+                                                            max_index)
+                self._size += 1
+            elif min_index != NULL_INDEX and key < keys[min_index]:
+                left[min_index] = min_index = nodes.append(key, item,
+                                                           min_index)
+                self._size += 1
+            else:
+                self._insert(key, item)
+                if max_index == NULL_INDEX:
+                    min_index = max_index = self._root
+
+    def _insert(self, key, item):
+        # Single descent which updates the item or attaches a new leaf.
+        self._hash = None
+        nodes = self._nodes
+        keys, left, right = nodes.keys, nodes.left, nodes.right
+        parent = NULL_INDEX
+        index = self._root
+        while index != NULL_INDEX:
+            if key < keys[index]:
+                parent, index = index, left[index]
+            elif key > keys[index]:
+                parent, index = index, right[index]
+            else:
+                nodes.items[index] = item
+                return
+
+        index = nodes.append(key, item, parent)
+        if parent == NULL_INDEX:
+            self._root = index
+        elif key < keys[parent]:
+            left[parent] = index
+        else:
+            right[parent] = index
+        self._size += 1
+
+    def _get_index(self, key):
+        # Search thru tree via binary search
+        keys, left, right = self._nodes.keys, self._nodes.left, self._nodes.right
+        index = self._root
+        while index != NULL_INDEX:
+            if key < keys[index]:
+                index = left[index]
+            elif key > keys[index]:
+                index = right[index]
+            elif key == keys[index]:
+                return index
+            else:
+                # Unordered key such as NaN, found nowhere.
+                break
+        return NULL_INDEX
+
+    def __getitem__(self, key):
+        """Get node by key."""
+        index = self._get_index(key)
+        if index != NULL_INDEX:
+            return self._nodes.items[index]
+        self.__missing__(key)
+
+    def __contains__(self, key):
+        """Contains node key."""
+        return self._get_index(key) != NULL_INDEX
+
+    def __missing__(self, key):
+        raise KeyError('{}'.format(key))
+
+    def __setitem__(self, key, item):
+        """Update or create node item by key."""
+        if key != key:
+            _check_key(key)
+
+        self._insert(key, item)
+
+    def __hash__(self):
+        """Hash by tree structure keys and items, computed once per change."""
+        if self._hash is None:
+            self._hash = hash((tuple(self.iter_keys_as_tree()),
+                               tuple(self.iter_items_as_tree())))
+        return self._hash
+
+    def _index_data(self, index):
+        return self._nodes.keys[index], self._nodes.items[index]
 
     def __repr__(self):
         # Can instantiate by copy and paste.
         return '{}({})'.format(self.__class__.__name__,
                                OrderedDict(zip(self.keys_as_list(),
-                                               self.items_as_list())))
\ No newline at end of file
+                                               self.items_as_list())))